@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+
+"""
+Generate the synthetic corpus of OpenMedia Radio Rundown XML files.
+
+Usage:
+
+    python benchmarks/corpus.py -t ./data/source/synthetic [--days 7] [--stations 4]
+
+The corpus is deterministic: the same options (and seed) always produce
+the same files. Each station has the given number of rundown files per day,
+each file covers the given number of hourly blocks. The files are named as
+the OpenMedia export e.g. `RR_05-09_Plus_20220404.xml`, so they are accepted
+by the `clean_rundown_name`, and their modification time is set to the
+broadcast date, so they are arranged by the `organize`.
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import random
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List
+
+# The stations used in the corpus, the nationwide ones first.
+STATIONS = [
+    "Plus",
+    "Radiožurnál",
+    "ČRo_Brno",
+    "ČRo_Olomouc",
+    "Dvojka",
+    "ČRo_Pardubice",
+    "Vltava",
+    "ČRo_Plzeň",
+]
+
+# The station codes (field 5081) of the stations above.
+STATION_CODES = {
+    "Plus": 13,
+    "Radiožurnál": 11,
+    "ČRo_Brno": 51,
+    "ČRo_Olomouc": 53,
+    "Dvojka": 15,
+    "ČRo_Pardubice": 45,
+    "Vltava": 17,
+    "ČRo_Plzeň": 35,
+}
+
+FORMATS = ["2901", "2903", "2905", "2909", "2911", "2913", "2917", "2701", "2923"]
+TOPICS = [
+    "01-Politika, státní správa a samospráva",
+    "02-Ekonomika",
+    "03-Zahraničí",
+    "05-Zdravotnictví",
+    "07-Kultura",
+    "09-Sport",
+]
+TARGETS = ["Proud", "Web", "Podcast"]
+PEOPLE = [
+    ("Jan", "Kubáček"),
+    ("Lucie", "Dvořáková"),
+    ("Petr", "Novák"),
+    ("Eva", "Malá"),
+    ("Tomáš", "Černý"),
+    ("Jana", "Svobodová"),
+    ("Martin", "Procházka"),
+    ("Zita", "Senková"),
+]
+LABELS = ["politolog", "lékařka; epidemioložka", "ekonom", "starosta", "herečka"]
+AFFILIATIONS = ["BEZPP", "ODS", "ANO", "STAN", "Piráti"]
+WORDS = (
+    "vláda rozpočet nemocnice obec kraj sněmovna volby ceny energie škola "
+    "doprava počasí koncert festival zápas reforma daně dotace soud policie"
+).split()
+
+FIELD_TYPES = {
+    "OM_STRING": "1",
+    "OM_INT32": "2",
+    "OM_DATETIME": "3",
+    "OM_TIMESPAN": "4",
+}
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+@dataclass(frozen=True)
+class CorpusOptions:
+    """
+    The corpus size options.
+
+    :param days: The number of broadcast days starting with the `start` date.
+    :param stations: The number of stations (the first ones of `STATIONS`).
+    :param rundowns: The number of rundown files per station and day.
+    :param blocks: The number of hourly blocks in each rundown file.
+    :param stories: The number of Radio Story objects in each hourly block.
+    :param records: The maximal number of records (contacts, audio) in each story.
+    :param contacts: The number of distinct respondents (Contact Items).
+    """
+
+    days: int = 1
+    stations: int = 2
+    rundowns: int = 4
+    blocks: int = 4
+    stories: int = 12
+    records: int = 3
+    contacts: int = 500
+    start: dt.date = dt.date(2022, 4, 4)
+    seed: int = 0
+
+
+def timestamp(value: dt.datetime) -> str:
+    """Format the `OM_DATETIME` value e.g. `20220404T104056,500`."""
+    return f"{value:%Y%m%dT%H%M%S},{value.microsecond // 1000:03d}"
+
+
+def field(parent: ET.Element, field_id: str, kind: str, value=None) -> None:
+    """Append the `<OM_FIELD>` node with the value node of the given kind."""
+    node = ET.SubElement(
+        parent,
+        "OM_FIELD",
+        FieldType=FIELD_TYPES[kind],
+        FieldID=field_id,
+        IsEmpty="yes" if value is None else "no",
+    )
+    ET.SubElement(node, kind).text = None if value is None else str(value)
+
+
+class _Builder:
+    """Build the rundown objects with unique object IDs."""
+
+    def __init__(self, options: CorpusOptions, rnd: random.Random) -> None:
+        self.options = options
+        self.rnd = rnd
+        self.object_id = 0
+
+    def object(self, parent: ET.Element, template: str) -> ET.Element:
+        self.object_id += 1
+        return ET.SubElement(
+            parent,
+            "OM_OBJECT",
+            SystemID="2",
+            ObjectID=f"{self.object_id:04d}",
+            TemplateName=template,
+        )
+
+    def person(self) -> str:
+        given, family = self.rnd.choice(PEOPLE)
+        return f"{family} {given} ({given[0].lower()}{family.lower()})"
+
+    def title(self, words: int) -> str:
+        return " ".join(self.rnd.choices(WORDS, k=words)).capitalize()
+
+    def contact(self, record: ET.Element) -> str:
+        number = self.rnd.randrange(self.options.contacts)
+        # The same respondent is always generated with the same values.
+        person = random.Random(f"{self.options.seed}-contact-{number}")
+        given, family = person.choice(PEOPLE)
+        name = f"{family}, {given}"
+
+        field(record, "8", "OM_STRING", name)
+        field(record, "5001", "OM_STRING", "Contact Item")
+        header = ET.SubElement(self.object(record, "Contact Item"), "OM_HEADER")
+        field(header, "8", "OM_STRING", name)
+        field(header, "421", "OM_STRING", given)
+        field(header, "422", "OM_STRING", family)
+        field(header, "424", "OM_STRING", person.choice(LABELS))
+        field(header, "5015", "OM_STRING", person.choice(AFFILIATIONS))
+        field(header, "5087", "OM_STRING", f"CI-{number:06d}")
+        field(header, "5088", "OM_INT32", person.choice([1, 2]))
+        return name
+
+    def audio(self, record: ET.Element, duration: int) -> None:
+        name = f"{self.title(2).replace(' ', '_')}_{self.rnd.randrange(10000):04d}.wav"
+        field(record, "8", "OM_STRING", name)
+        field(record, "5001", "OM_STRING", "Audioclip Bin")
+        header = ET.SubElement(self.object(record, "Audioclip"), "OM_HEADER")
+        field(header, "8", "OM_STRING", name)
+        field(header, "1036", "OM_TIMESPAN", duration)
+
+    def story(
+        self,
+        parent: ET.Element,
+        station: str,
+        start: dt.datetime,
+        duration: int,
+        number: int,
+    ) -> None:
+        rnd = self.rnd
+        title = self.title(3)
+        code = STATION_CODES[station]
+
+        field(parent, "8", "OM_STRING", f"{start:%d%m} {title} = {rnd.choice(WORDS)}")
+        field(parent, "1026", "OM_TIMESPAN", duration)
+        field(parent, "5001", "OM_STRING", "Radio Story")
+
+        story = self.object(parent, "Radio Story")
+        header = ET.SubElement(story, "OM_HEADER")
+        end = start + dt.timedelta(milliseconds=duration)
+        field(header, "5", "OM_STRING", self.person())
+        field(header, "6", "OM_STRING", self.person())
+        field(header, "8", "OM_STRING", title)
+        field(
+            header,
+            "12",
+            "OM_STRING",
+            f"{station} - {rnd.choice(['Zprávy', 'Publicistika'])}",
+        )
+        field(header, "14", "OM_STRING", " ".join(rnd.choices(WORDS, k=60)))
+        field(header, "321", "OM_INT32", rnd.choice(FORMATS))
+        field(header, "1000", "OM_DATETIME", timestamp(start))
+        field(header, "1001", "OM_DATETIME", timestamp(end))
+        field(header, "1003", "OM_DATETIME", timestamp(start))
+        field(header, "5001", "OM_STRING", "Radio Story")
+        field(header, "5016", "OM_STRING", rnd.choice(TOPICS))
+        field(header, "5070", "OM_STRING", self.person())
+        field(header, "5071", "OM_STRING", self.person())
+        field(header, "5072", "OM_STRING", f"IN{start:%d%m}{number:03d}")
+        field(header, "5079", "OM_STRING", rnd.choice(TARGETS))
+        field(header, "5081", "OM_INT32", code)
+        field(header, "5082", "OM_STRING", f"PS{code:02d}{start:%y%m%d}{number:04d}")
+        field(header, "5015", "OM_STRING")
+
+        for record_id in range(rnd.randint(0, self.options.records)):
+            record = ET.SubElement(story, "OM_RECORD", RecordID=str(record_id + 1))
+            if rnd.random() < 0.6:
+                self.contact(record)
+            else:
+                self.audio(record, duration)
+
+
+def generate_rundown(
+    path: Path, station: str, date: dt.date, hour: int, options: CorpusOptions
+) -> Path:
+    """Write the rundown file of the station starting at the given hour."""
+    rnd = random.Random(f"{options.seed}-{station}-{date}-{hour}")
+    builder = _Builder(options, rnd)
+    since = dt.datetime.combine(date, dt.time(hour))
+    till = since + dt.timedelta(hours=options.blocks)
+    name = (
+        f"{since:%H}-{till:%H} {station} - {WEEKDAYS[date.weekday()]}, {date:%d.%m.%Y}"
+    )
+
+    root = ET.Element("OPENMEDIA")
+    ET.SubElement(root, "OM_SERVER", ServerID="1", ServerName="OpenMedia")
+    rundown = builder.object(root, "Radio Rundown")
+    header = ET.SubElement(rundown, "OM_HEADER")
+    field(header, "8", "OM_STRING", name)
+    field(header, "1000", "OM_DATETIME", timestamp(since))
+    field(header, "1001", "OM_DATETIME", timestamp(till))
+    field(header, "5081", "OM_INT32", STATION_CODES[station])
+
+    story_number = 0
+    for block in range(options.blocks):
+        start = since + dt.timedelta(hours=block)
+        block_name = f"{start:%H:%M}-{start + dt.timedelta(hours=1):%H:%M}"
+
+        record = ET.SubElement(rundown, "OM_RECORD", RecordID=str(block + 1))
+        field(record, "8", "OM_STRING", block_name)
+        hourly = builder.object(record, "Hourly Rundown")
+        field(ET.SubElement(hourly, "OM_HEADER"), "8", "OM_STRING", block_name)
+
+        # Split the hour into the stories of random duration.
+        weights = [rnd.uniform(0.5, 1.5) for _ in range(options.stories)]
+        for story, weight in enumerate(weights):
+            duration = int(3600000 * weight / sum(weights))
+            story_number += 1
+            story_record = ET.SubElement(hourly, "OM_RECORD", RecordID=str(story + 1))
+            builder.story(story_record, station, start, duration, story_number)
+            start += dt.timedelta(milliseconds=duration)
+
+    ET.indent(root)
+    ET.ElementTree(root).write(path, encoding="UTF-8", xml_declaration=True)
+
+    # Set the modification time to the broadcast date (as exported).
+    mtime = since.timestamp()
+    os.utime(path, (mtime, mtime))
+
+    return path
+
+
+def generate_corpus(directory: Path, options: CorpusOptions) -> List[Path]:
+    """
+    Write the corpus of rundown files into the given directory.
+
+    :returns: The list of written files.
+    """
+    if options.stations > len(STATIONS):
+        raise ValueError(f"The corpus has at most {len(STATIONS)} stations.")
+    if options.rundowns * options.blocks > 24:
+        raise ValueError("The rundowns of one day must fit into 24 hours.")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    # The broadcast starts at 5:00 unless the rundowns need more hours.
+    first_hour = min(5, 24 - options.rundowns * options.blocks)
+
+    paths = []
+    for day in range(options.days):
+        date = options.start + dt.timedelta(days=day)
+        for station in STATIONS[: options.stations]:
+            for rundown in range(options.rundowns):
+                hour = first_hour + rundown * options.blocks
+                till = (hour + options.blocks) % 24
+                name = f"RR_{hour:02d}-{till:02d}_{station}_{date:%Y%m%d}.xml"
+                paths.append(
+                    generate_rundown(directory / name, station, date, hour, options)
+                )
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="The synthetic corpus generator.")
+    parser.add_argument("-t", "--target", required=True, help="The target directory.")
+    for name, default in asdict(CorpusOptions()).items():
+        if isinstance(default, int):
+            parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument(
+        "--start", type=dt.date.fromisoformat, default=CorpusOptions.start
+    )
+    options = parser.parse_args()
+
+    corpus = CorpusOptions(
+        **{name: getattr(options, name) for name in asdict(CorpusOptions())}
+    )
+    paths = generate_corpus(Path(options.target), corpus)
+
+    print(
+        json.dumps(
+            {
+                "files": len(paths),
+                "size_mb": round(sum(p.stat().st_size for p in paths) / 2**20, 2),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compare the per-field XPath lookups with the single-pass field index.
+
+Usage:
+
+    python benchmarks/fields.py [--stories 5000] [--repeat 5]
+"""
+
+import argparse
+import json
+import tempfile
+import timeit
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from loguru import logger
+from memory import generate
+
+from cro.rundown.sdk import RundownParser
+
+# The story header fields read by the parser.
+FIELDS = {
+    "321": "OM_INT32",
+    "5072": "OM_STRING",
+    "5082": "OM_STRING",
+    "8": "OM_STRING",
+    "5001": "OM_STRING",
+    "5079": "OM_STRING",
+    "5081": "OM_INT32",
+    "6": "OM_STRING",
+    "5": "OM_STRING",
+    "12": "OM_STRING",
+    "5071": "OM_STRING",
+    "5070": "OM_STRING",
+    "5016": "OM_STRING",
+    "1000": "OM_DATETIME",
+    "1001": "OM_DATETIME",
+    "1003": "OM_DATETIME",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="The field lookup benchmark.")
+    parser.add_argument("--stories", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    logger.remove()  # The parser logs each story record on the debug level.
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = generate(Path(directory) / "rundown.xml", options.stories)
+        tree = ET.parse(path)
+
+    rundown_parser = RundownParser()
+    headers = tree.findall('.//OM_OBJECT[@TemplateName="Radio Story"]/OM_HEADER')
+
+    def xpath():
+        for header in headers:
+            for field_id, value in FIELDS.items():
+                rundown_parser._extract_text(
+                    header, f"./OM_FIELD[@FieldID='{field_id}']/{value}"
+                )
+
+    def index():
+        for header in headers:
+            fields = rundown_parser._index_fields(header)
+            for field_id in FIELDS:
+                fields.get(field_id)
+
+    def parse():
+        for _ in rundown_parser(tree):
+            pass
+
+    results = {
+        name: min(timeit.repeat(function, number=1, repeat=options.repeat))
+        for name, function in {"xpath": xpath, "index": index, "parse": parse}.items()
+    }
+    results["speedup"] = results["xpath"] / results["index"]
+    results["headers"] = len(headers)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compare the peak memory of the tree and the streaming rundown parser.
+
+Usage:
+
+    python benchmarks/memory.py [--stories 1000 5000]
+
+The rundown files are generated into a temporary directory: each file has
+one hourly block record with the given number of Radio Story records.
+"""
+
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from loguru import logger
+
+from cro.rundown.sdk import RundownParser
+
+HEAD = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<OPENMEDIA>
+  <OM_OBJECT ObjectID="1" TemplateName="Radio Rundown">
+    <OM_HEADER>
+      <OM_FIELD FieldID="8" IsEmpty="no"><OM_STRING>05-09 Plus - Mon, 04.04.2022</OM_STRING></OM_FIELD>
+      <OM_FIELD FieldID="1000" IsEmpty="no"><OM_DATETIME>20220404T050000,000</OM_DATETIME></OM_FIELD>
+    </OM_HEADER>
+    <OM_RECORD RecordID="1">
+      <OM_OBJECT ObjectID="2" TemplateName="Hourly Rundown">
+        <OM_HEADER>
+          <OM_FIELD FieldID="8" IsEmpty="no"><OM_STRING>05:00-06:00</OM_STRING></OM_FIELD>
+        </OM_HEADER>
+"""
+
+STORY = """\
+        <OM_RECORD RecordID="{i}">
+          <OM_FIELD FieldID="8" IsEmpty="no"><OM_STRING>Story {i}</OM_STRING></OM_FIELD>
+          <OM_FIELD FieldID="1026" IsEmpty="no"><OM_TIMESPAN>{i}000</OM_TIMESPAN></OM_FIELD>
+          <OM_OBJECT ObjectID="{i}" TemplateName="Radio Story">
+            <OM_HEADER>
+              <OM_FIELD FieldID="8" IsEmpty="no"><OM_STRING>Story {i}</OM_STRING></OM_FIELD>
+              <OM_FIELD FieldID="14" IsEmpty="no"><OM_STRING>{text}</OM_STRING></OM_FIELD>
+              <OM_FIELD FieldID="321" IsEmpty="no"><OM_INT32>2909</OM_INT32></OM_FIELD>
+              <OM_FIELD FieldID="1000" IsEmpty="no"><OM_DATETIME>20220404T050000,000</OM_DATETIME></OM_FIELD>
+              <OM_FIELD FieldID="5081" IsEmpty="no"><OM_INT32>11</OM_INT32></OM_FIELD>
+              <OM_FIELD FieldID="5082" IsEmpty="no"><OM_STRING>PS{i:07d}</OM_STRING></OM_FIELD>
+            </OM_HEADER>
+            <OM_RECORD RecordID="1">
+              <OM_FIELD FieldID="8" IsEmpty="no"><OM_STRING>Respondent {i}</OM_STRING></OM_FIELD>
+              <OM_FIELD FieldID="5001" IsEmpty="no"><OM_STRING>Contact Item</OM_STRING></OM_FIELD>
+            </OM_RECORD>
+          </OM_OBJECT>
+        </OM_RECORD>
+"""
+
+TAIL = """\
+      </OM_OBJECT>
+    </OM_RECORD>
+  </OM_OBJECT>
+</OPENMEDIA>
+"""
+
+
+def generate(path: Path, stories: int) -> Path:
+    """Write the rundown file with the given number of stories."""
+    with open(path, mode="w", encoding="utf-8") as file:
+        file.write(HEAD)
+        for i in range(stories):
+            file.write(STORY.format(i=i, text="Lorem ipsum dolor sit amet. " * 20))
+        file.write(TAIL)
+    return path
+
+
+def measure(parse, path: Path) -> dict:
+    """
+    Consume the parsed rows and return the elapsed time and the peak memory.
+
+    The time is measured in a separate run as `tracemalloc` slows down
+    the allocations considerably.
+    """
+    start = time.perf_counter()
+    rows = sum(1 for _ in parse(path))
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    for _ in parse(path):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "time_s": round(elapsed, 3),
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="The parser memory benchmark.")
+    parser.add_argument("--stories", type=int, nargs="+", default=[1000, 5000])
+    options = parser.parse_args()
+
+    logger.remove()  # The parser logs each story record on the debug level.
+
+    modes = {
+        "tree": lambda path: RundownParser()(ET.parse(path)),
+        "stream": lambda path: RundownParser().stream(path),
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for stories in options.stories:
+            path = generate(Path(directory) / f"rundown_{stories}.xml", stories)
+            size = path.stat().st_size
+            for mode, parse in modes.items():
+                result = {
+                    "mode": mode,
+                    "stories": stories,
+                    "size_mb": round(size / 2**20, 2),
+                }
+                results.append(result | measure(parse, path))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+"""
+Run the benchmark suite on the synthetic corpora of several sizes.
+
+Usage:
+
+    python benchmarks/suite.py [--sizes small medium] [--repeat 3] [-o results.json]
+    python benchmarks/suite.py --sizes small --compare results.json
+
+The suite covers the `RundownParser` (tree and stream mode), the
+`clean_rundown_content`, the `cleanse_rundown_file`, the `inspect` and
+`organize` functions and the `cro.rundown.cleanse`, `cro.rundown.extract`
+and `cro.rundown.arrange` programs. Each benchmark reports the best time of
+the given repeats. The `*_lxml` benchmarks use the `lxml` XML backend (when
+installed), the others the `ElementTree` backend.
+
+The results are written as JSON with the package version, the git commit
+and the platform, so the results of two versions can be compared with
+the `--compare` option.
+"""
+
+import argparse
+import datetime as dt
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from corpus import CorpusOptions, generate_corpus
+from loguru import logger
+
+from cro.rundown.sdk import (
+    RundownParser,
+    __version__,
+    clean_rundown_content,
+    cleanse_rundown_file,
+    inspect,
+    organize,
+)
+from cro.rundown.sdk._xml import get_backend
+
+# The corpus sizes: the number of files is days * stations * rundowns.
+SIZES: Dict[str, CorpusOptions] = {
+    "small": CorpusOptions(days=1, stations=2),  # 8 files
+    "medium": CorpusOptions(days=7, stations=4),  # 112 files
+    "large": CorpusOptions(days=30, stations=8),  # 960 files
+}
+
+
+def run(command: List[str]) -> None:
+    """Run the program and fail when it fails."""
+    subprocess.run(command, check=True, capture_output=True)
+
+
+def measure(
+    function: Callable[[Path], Optional[int]],
+    corpus: Path,
+    repeat: int,
+    copy: bool = False,
+) -> dict:
+    """
+    Return the best time of the function called on the corpus directory.
+
+    :param copy: Call the function on a fresh copy of the corpus (the copy is
+        not measured) as the function moves or writes the files.
+    """
+    times, rows = [], None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            source = corpus
+            if copy:
+                source = Path(directory) / "corpus"
+                shutil.copytree(corpus, source)  # Keeps the modification times.
+            start = time.perf_counter()
+            rows = function(source)
+            times.append(time.perf_counter() - start)
+
+    return {"time_s": round(min(times), 4), "rows": rows}
+
+
+def parse_tree(backend: str) -> Callable[[Path], int]:
+    def function(corpus: Path) -> int:
+        xml = get_backend(backend)
+        return sum(
+            sum(1 for _ in RundownParser(backend=backend)(xml.parse(path)))
+            for path in sorted(corpus.glob("*.xml"))
+        )
+
+    return function
+
+
+def parse_stream(corpus: Path) -> int:
+    return sum(
+        sum(1 for _ in RundownParser(backend="etree").stream(path))
+        for path in sorted(corpus.glob("*.xml"))
+    )
+
+
+def cleanse_content(trees: List[ET.ElementTree]) -> Callable[[Path], None]:
+    def function(_: Path) -> None:
+        for tree in trees:
+            clean_rundown_content(tree)
+
+    return function
+
+
+def cleanse_file(backend: str) -> Callable[[Path], None]:
+    def function(corpus: Path) -> None:
+        target = corpus.parent / f"target-{backend}"
+        for path in sorted(corpus.glob("*.xml")):
+            cleanse_rundown_file(path, target, backend=backend)
+
+    return function
+
+
+def arrange(corpus: Path) -> None:
+    organize(corpus, inspect(corpus))
+
+
+def cleanse_program(corpus: Path) -> None:
+    target = corpus.parent / "target"
+    target.mkdir()
+    run(["cro.rundown.cleanse", "-s", str(corpus), "-t", str(target)])
+
+
+def extract_program(corpus: Path) -> None:
+    target = corpus.parent / "target"
+    target.mkdir()
+    run(["cro.rundown.extract", "-i", str(corpus), "-o", str(target), "-f", "csv"])
+
+
+def arrange_program(corpus: Path) -> None:
+    run(["cro.rundown.arrange", "-s", str(corpus)])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: List[dict], baseline: List[dict]) -> None:
+    """Print the time ratio of the results to the baseline results."""
+    times = {(r["benchmark"], r["size"]): r["time_s"] for r in baseline}
+
+    print(f"{'benchmark':<20} {'size':<8} {'time_s':>10} {'base_s':>10} {'ratio':>8}")
+    for result in results:
+        base = times.get((result["benchmark"], result["size"]))
+        ratio = "" if not base else f"{result['time_s'] / base:.2f}"
+        print(
+            f"{result['benchmark']:<20} {result['size']:<8} "
+            f"{result['time_s']:>10} {base or '':>10} {ratio:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="The benchmark suite.")
+    parser.add_argument(
+        "--sizes", nargs="+", choices=SIZES, default=["small", "medium"]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--benchmarks", nargs="+", help="Run only the given benchmarks."
+    )
+    parser.add_argument(
+        "-o", "--output", help="The output JSON file (default: stdout)."
+    )
+    parser.add_argument("--compare", help="The JSON file with the baseline results.")
+    options = parser.parse_args()
+
+    logger.remove()  # The parser logs each story record on the debug level.
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in options.sizes:
+            corpus = Path(directory) / size
+            paths = generate_corpus(corpus, SIZES[size])
+            trees = [ET.parse(path) for path in paths]
+
+            benchmarks = {
+                "parse_tree": (parse_tree("etree"), False),
+                "parse_tree_lxml": (parse_tree("lxml"), False),
+                "parse_stream": (parse_stream, False),
+                "cleanse_content": (cleanse_content(trees), False),
+                "cleanse_file": (cleanse_file("etree"), True),
+                "cleanse_file_lxml": (cleanse_file("lxml"), True),
+                "arrange": (arrange, True),
+                "program_cleanse": (cleanse_program, True),
+                "program_extract": (extract_program, True),
+                "program_arrange": (arrange_program, True),
+            }
+            try:
+                get_backend("lxml")
+            except ImportError:
+                benchmarks = {
+                    name: benchmark
+                    for name, benchmark in benchmarks.items()
+                    if not name.endswith("_lxml")
+                }
+            if options.benchmarks:
+                benchmarks = {
+                    name: benchmark
+                    for name, benchmark in benchmarks.items()
+                    if name in options.benchmarks
+                }
+
+            for name, (function, copy) in benchmarks.items():
+                result = {
+                    "benchmark": name,
+                    "size": size,
+                    "files": len(paths),
+                    "size_mb": round(sum(p.stat().st_size for p in paths) / 2**20, 2),
+                }
+                results.append(result | measure(function, corpus, options.repeat, copy))
+                print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = {
+        "version": __version__,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": dt.datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+    if options.output:
+        Path(options.output).write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+    if options.compare:
+        baseline = json.loads(Path(options.compare).read_text())["results"]
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
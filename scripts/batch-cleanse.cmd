@@ -1,4 +1,4 @@
 @echo off
-@REM https://ss64.com/nt/for_l.html
+@REM Cleanse the whole year folder with one worker process per CPU.
 
-FOR %%i IN (21, 22, 23, 24, 25, 26) DO start /b cro.rundown.cleanse -s \\cro.cz\srv\annova\export-avo\TEST\2020\W%%i
+cro.rundown.cleanse -s \\cro.cz\srv\annova\export-avo\TEST\2020 --workers %NUMBER_OF_PROCESSORS%
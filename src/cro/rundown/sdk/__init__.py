@@ -1,16 +1,35 @@
 # -*- coding: utf-8 -*-
 
 from cro.rundown.sdk._arrange import inspect, organize
-from cro.rundown.sdk._cleanse import clean_rundown_content, clean_rundown_name
-from cro.rundown.sdk._extract import RundownParser, table_columns
+from cro.rundown.sdk._cleanse import (
+    clean_rundown_content,
+    clean_rundown_name,
+    clean_rundown_stream,
+    cleanse_rundown_file,
+)
+from cro.rundown.sdk._extract import (
+    Row,
+    RundownParser,
+    parse_rundown_file,
+    table_columns,
+)
+from cro.rundown.sdk._index import RundownFile, RundownIndex
+from cro.rundown.sdk._registry import RespondentRegistry
 
 __all__ = tuple(
     [
+        "Row",
         "RundownParser",
+        "parse_rundown_file",
+        "RundownFile",
+        "RundownIndex",
+        "RespondentRegistry",
         "inspect",
         "organize",
         "clean_rundown_name",
         "clean_rundown_content",
+        "clean_rundown_stream",
+        "cleanse_rundown_file",
     ]
 )
 
@@ -2,5 +2,323 @@
 
 
 """
-This module contains the classes and functions to archive the files and folders with  7z compression.
+This module contains the classes and functions to archive the week folders
+(`YEAR/Wxx`) produced by the `organize` function.
+
+Each week folder is packed into one ZIP archive e.g. `2022/W14.zip`. The
+rundown files are compressed one by one with the Zstandard compression and
+the dictionary trained on the rundown files, so the archive stays seekable:
+a single rundown is read without unpacking the whole week. The archive
+members are stored (not deflated) with the `.zst` suffix and the dictionary
+is stored in the archive as the `.zstd-dictionary` member.
+
+    >>> dictionary = train_dictionary(paths)
+    >>> archive_week(Path("2022/W14"), Path("archive/2022/W14.zip"), dictionary)
+    >>> with RundownArchive(Path("archive/2022/W14.zip")) as archive:
+            content = archive.read("RR_10-12_Plus_20220404.xml")
+
+The Zstandard compression requires the `zstandard` package.
 """
+
+import datetime as dt
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import IO, Iterable, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics, collect_metrics
+
+__all__ = tuple(
+    [
+        "ARCHIVE_SUFFIX",
+        "RundownArchive",
+        "ArchiveResult",
+        "archive_week",
+        "archive_weeks",
+        "train_dictionary",
+        "week_directories",
+    ]
+)
+
+ARCHIVE_SUFFIX = ".zip"
+MEMBER_SUFFIX = ".zst"
+DICTIONARY_NAME = ".zstd-dictionary"
+
+# The dictionary size and the size and count of the training samples.
+DICTIONARY_SIZE = 112_640
+SAMPLE_SIZE = 2**14
+SAMPLES_PER_FILE = 16
+SAMPLES_SIZE = 2**23
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as ex:
+        raise ImportError(
+            "Install the `zstandard` package to archive the rundown files."
+        ) from ex
+    return zstandard
+
+
+class ArchiveResult(NamedTuple):
+    """The archived week folder."""
+
+    source: Path
+    target: Path
+    files: int
+    size: int  # The size of the rundown files.
+    compressed_size: int  # The size of the archive.
+
+
+def week_directories(directory: Path) -> List[Path]:
+    """Find the week folders e.g. `2022/W14` in the given directory."""
+    return sorted(
+        path
+        for path in directory.glob("[0-9][0-9][0-9][0-9]/W[0-9][0-9]")
+        if path.is_dir()
+    )
+
+
+def _rundown_files(directory: Path) -> List[Path]:
+    return sorted(path for path in directory.glob("*.xml") if path.is_file())
+
+
+def train_dictionary(paths: Iterable[Path], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Train the compression dictionary on the given rundown files.
+
+    The files are split into small samples, so the dictionary captures the
+    repeated OpenMedia XML structure (the element and field names). At most
+    `SAMPLES_SIZE` bytes are read from the files taken evenly and at most
+    `SAMPLES_PER_FILE` samples from each file.
+
+    :returns: The dictionary or empty bytes when there is too few samples.
+    """
+    zstd = _zstd()
+
+    paths = list(paths)
+    step = max(1, len(paths) * SAMPLES_PER_FILE * SAMPLE_SIZE // SAMPLES_SIZE)
+    samples = []
+    for path in paths[::step]:
+        with open(path, "rb") as file:
+            for _ in range(SAMPLES_PER_FILE):
+                if not (sample := file.read(SAMPLE_SIZE)):
+                    break
+                samples.append(sample)
+
+    try:
+        return zstd.train_dictionary(size, samples).as_bytes()
+    except zstd.ZstdError as ex:
+        logger.warning(f"The dictionary was not trained: {ex}")
+        return b""
+
+
+def archive_week(
+    source: Path,
+    target: Path,
+    dictionary: bytes = b"",
+    level: int = 12,
+    metrics: Optional[Metrics] = None,
+) -> ArchiveResult:
+    """
+    Pack the rundown files of the week folder into the archive.
+
+    The archive is written to the temporary file first, so the existing
+    archive is replaced only when the new one is complete. The temporary
+    file is removed when the archiving fails.
+
+    :param dictionary: The compression dictionary (see `train_dictionary`).
+    :param level: The Zstandard compression level.
+    """
+    zstd = _zstd()
+    metrics = NULL_METRICS if metrics is None else metrics
+    start = time.perf_counter()
+
+    compressor = zstd.ZstdCompressor(
+        level=level,
+        dict_data=zstd.ZstdCompressionDict(dictionary) if dictionary else None,
+        write_checksum=True,
+    )
+
+    paths = _rundown_files(source)
+    size = 0
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f"{target.name}.partial")
+    try:
+        with zipfile.ZipFile(partial, "w", zipfile.ZIP_STORED) as archive:
+            if dictionary:
+                archive.writestr(DICTIONARY_NAME, dictionary)
+            for path in paths:
+                with metrics.timer("read"):
+                    content = path.read_bytes()
+                    mtime = path.stat().st_mtime
+                with metrics.timer("compress"):
+                    compressed = compressor.compress(content)
+                info = zipfile.ZipInfo(
+                    path.name + MEMBER_SUFFIX,
+                    date_time=dt.datetime.fromtimestamp(mtime).timetuple()[:6],
+                )
+                with metrics.timer("write"):
+                    archive.writestr(info, compressed)
+                size += len(content)
+        os.replace(partial, target)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    result = ArchiveResult(source, target, len(paths), size, target.stat().st_size)
+    metrics.count("folders")
+    metrics.count("files", result.files)
+    metrics.count("bytes", result.size)
+    metrics.count("compressed_bytes", result.compressed_size)
+    metrics.observe(time.perf_counter() - start)
+    return result
+
+
+def archive_weeks(
+    directory: Path,
+    target: Path,
+    workers: int = 1,
+    level: int = 12,
+    force: bool = False,
+    metrics: Optional[Metrics] = None,
+) -> Tuple[List[ArchiveResult], List[Tuple[Path, Exception]]]:
+    """
+    Archive the week folders in the directory to the target directory.
+
+    The dictionary is trained once on the files of all folders and the
+    folders are compressed in the worker processes. The folders with the
+    existing archive are skipped unless `force` is given.
+
+    :returns: The archived folders and the failed folders with the error.
+    """
+    metrics = NULL_METRICS if metrics is None else metrics
+
+    weeks = [
+        (week, target / week.relative_to(directory).with_suffix(ARCHIVE_SUFFIX))
+        for week in week_directories(directory)
+    ]
+    count = len(weeks)
+    weeks = [
+        (week, archive) for week, archive in weeks if force or not archive.exists()
+    ]
+    metrics.count("skipped_folders", count - len(weeks))
+    if not weeks:
+        return [], []
+
+    with metrics.timer("train"):
+        dictionary = train_dictionary(
+            path for week, _ in weeks for path in _rundown_files(week)
+        )
+
+    results, failures = [], []
+    if workers <= 1:
+        for week, archive in weeks:
+            try:
+                results.append(archive_week(week, archive, dictionary, level, metrics))
+            except Exception as ex:
+                failures.append((week, ex))
+        return results, failures
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            (
+                executor.submit(
+                    collect_metrics, archive_week, week, archive, dictionary, level
+                )
+                if metrics.enabled
+                else executor.submit(archive_week, week, archive, dictionary, level)
+            ): week
+            for week, archive in weeks
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as ex:
+                failures.append((futures[future], ex))
+                continue
+            if metrics.enabled:
+                result, worker_metrics = result
+                metrics.merge(worker_metrics)
+            results.append(result)
+
+    return sorted(results), sorted(failures, key=lambda failure: failure[0])
+
+
+class RundownArchive:
+    """
+    The week archive of the rundown files.
+
+    The members are read by the rundown file name e.g.
+    `RR_10-12_Plus_20220404.xml` without decompressing the other files.
+    The plain (not `.zst`) members of other ZIP archives are read as well.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._decompressor = None
+        self._members = {
+            (
+                info.filename[: -len(MEMBER_SUFFIX)]
+                if info.filename.endswith(MEMBER_SUFFIX)
+                else info.filename
+            ): info
+            for info in self._zip.infolist()
+            if not info.is_dir() and info.filename != DICTIONARY_NAME
+        }
+
+    def __enter__(self) -> "RundownArchive":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def names(self) -> List[str]:
+        """The rundown file names."""
+        return sorted(self._members)
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        """Get the archive member of the rundown file."""
+        return self._members[name]
+
+    def open(self, name: str) -> IO[bytes]:
+        """Open the rundown file for streaming decompression."""
+        info = self._members[name]
+        if not info.filename.endswith(MEMBER_SUFFIX):
+            return self._zip.open(info)
+
+        if self._decompressor is None:
+            zstd = _zstd()
+            dictionary = (
+                self._zip.read(DICTIONARY_NAME)
+                if DICTIONARY_NAME in self._zip.NameToInfo
+                else b""
+            )
+            self._decompressor = zstd.ZstdDecompressor(
+                dict_data=zstd.ZstdCompressionDict(dictionary) if dictionary else None
+            )
+        return self._decompressor.stream_reader(self._zip.open(info), closefd=True)
+
+    def read(self, name: str) -> bytes:
+        """Read the rundown file content."""
+        with self.open(name) as file:
+            return file.read()
+
+    def extract(self, name: str, directory: Path) -> Path:
+        """Write the rundown file to the directory."""
+        path = directory / name
+        with self.open(name) as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        mtime = dt.datetime(*self._members[name].date_time).timestamp()
+        os.utime(path, (mtime, mtime))
+        return path
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from cro.rundown.sdk._archive import (
+    ARCHIVE_SUFFIX,
+    RundownArchive,
+    archive_weeks,
+)
+from cro.rundown.sdk._arrange import week_directory
+from cro.rundown.sdk._index import parse_rundown_name
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics, write_metrics
+from cro.rundown.sdk._shared import failure_msg, success_msg
+
+
+def find_archive(directory: Path, name: str) -> Path | None:
+    """
+    Find the week archive with the given rundown file.
+
+    The archive of the week given by the rundown date is tried first.
+    """
+    candidates = sorted(directory.glob(f"*/W*{ARCHIVE_SUFFIX}"))
+    if (values := parse_rundown_name(name)) is not None:
+        path = week_directory(directory, values[0]).with_suffix(ARCHIVE_SUFFIX)
+        candidates.insert(0, path)
+
+    for path in candidates:
+        if path.exists():
+            with RundownArchive(path) as archive:
+                if name in archive.names():
+                    return path
+    return None
+
+
+def main() -> None:
+    """
+    Archive the week folders of the rundown files.
+    """
+
+    load_dotenv()  # Take environment variables from `.env`.
+
+    parser = argparse.ArgumentParser(description="The `cro.rundown.archive` program.")
+
+    parser.add_argument(
+        "-s",
+        "--source",
+        required=False,
+        help="The directory with the week folders e.g. `2022/W14`.",
+    )
+    parser.add_argument(
+        "-t",
+        "--target",
+        required=False,
+        help="The archive directory (default: the source directory).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=4,
+        help="The number of worker processes used to compress the folders.",
+    )
+    parser.add_argument(
+        "-l",
+        "--level",
+        type=int,
+        default=12,
+        help="The Zstandard compression level (default: 12).",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Archive the folders again even when the archive exists.",
+    )
+    parser.add_argument(
+        "-x",
+        "--extract",
+        nargs="+",
+        metavar="NAME",
+        help="Extract the rundown files from the archives in the target directory.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=".",
+        help="The directory of the extracted files (default: current directory).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the stage timers and counters as JSON.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        required=False,
+        help="Write the stage timers and counters to the JSON file.",
+    )
+
+    options = parser.parse_args()
+
+    metrics = (
+        Metrics()
+        if options.profile or options.metrics_out is not None
+        else NULL_METRICS
+    )
+
+    match options.source:
+        case None:
+            source = Path(os.getenv("RUNDOWN_EXPORT_PATH", "."))
+        case _:
+            source = Path(options.source)
+
+    target = source if options.target is None else Path(options.target)
+
+    if options.extract:
+        missing = []
+        for name in options.extract:
+            if (path := find_archive(target, name)) is None:
+                missing.append(name)
+                continue
+            with RundownArchive(path) as archive:
+                print(f"EXTRACTED {archive.extract(name, Path(options.output))}")
+        if missing:
+            print(failure_msg(f"Rundowns {', '.join(missing)} not found"))
+            sys.exit(1)
+        return
+
+    with metrics.timer("total"):
+        results, failures = archive_weeks(
+            source,
+            target,
+            workers=options.workers,
+            level=options.level,
+            force=options.force,
+            metrics=metrics,
+        )
+
+    for result in results:
+        ratio = result.compressed_size / result.size if result.size else 0
+        print(f"ARCHIVED {result.source} ==> {result.target} ({ratio:.1%})")
+
+    if metrics.enabled:
+        metrics.count("failed_folders", len(failures))
+        write_metrics(metrics, options.metrics_out)
+
+    if failures:
+        print(failure_msg(f"Folders {len(failures)} failed to archive"))
+        for week, error in failures:
+            print(f"{week} | {error}")
+        sys.exit(1)
+
+    print(success_msg(f"Folders {len(results)} archived"))
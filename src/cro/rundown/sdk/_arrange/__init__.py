@@ -1,23 +1,36 @@
 # -*- coding: utf-8 -*-
 
 
+import csv
+import errno
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import astuple, dataclass, fields
 from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from tqdm import tqdm
 
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics
 from cro.rundown.sdk._shared import failure_msg, success_msg
+from cro.rundown.sdk.helpers import file_digest
 
-__all__ = tuple(["inspect", "organize"])
+__all__ = tuple(["inspect", "organize", "plan", "week_directory", "ArrangeJournal"])
 
 
-def inspect(path: Path) -> Dict[date, List[Path]]:
+def inspect(path: Path, metrics: Optional[Metrics] = None) -> Dict[date, List[Path]]:
     """
     For each file in the given directory read the last modified date
     and add them to the dictionary with the last modified date as a key and
     file path as the value.
     Only files in the given folder not in subfoldres are !
+    The directory is scanned with `os.scandir`, so each entry is stat-ed once
+    (on Windows the stat is a part of the directory listing).
     Example:
         >>> _inspect(path)
         >>> Dict {
@@ -29,49 +42,267 @@ def inspect(path: Path) -> Dict[date, List[Path]]:
                 ...
             }
     """
+    metrics = NULL_METRICS if metrics is None else metrics
+
     rundowns: Dict[date, List[Path]] = {}
-    for item in path.iterdir():
-        if item.is_file():
-            mtime = datetime.fromtimestamp(item.stat().st_mtime).date()
-            if mtime in rundowns:
-                rundowns[mtime].append(item)
-            else:
-                rundowns[mtime] = [item]
+    with metrics.timer("inspect"), os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stat = entry.stat()
+                mtime = datetime.fromtimestamp(stat.st_mtime).date()
+                if mtime in rundowns:
+                    rundowns[mtime].append(Path(entry.path))
+                else:
+                    rundowns[mtime] = [Path(entry.path)]
+                metrics.count("files")
+                metrics.count("bytes", stat.st_size)
 
     return dict(sorted(rundowns.items()))
 
 
-def organize(directory: Path, sorted_rundowns: Dict[date, List[Path]]) -> None:
+def week_directory(directory: Path, day: date) -> Path:
+    """Get the ISO week directory of the given date e.g. `2022/W14`."""
+    year_num, week_num, _ = day.isocalendar()
+    return directory / f"{year_num}" / f"W{week_num:02d}"
+
+
+def plan(
+    directory: Path, sorted_rundowns: Dict[date, List[Path]]
+) -> Dict[Path, List[Tuple[Path, Path]]]:
     """
-    Key is date e.g "2020-30-12" and items are file paths e.g
-    [path1, path2, ...]
+    Plan the moves of the inspected files to the week directories.
+
+    The week directory is computed once for each date.
+
+    :returns: The source and target file paths by the week directory.
     """
+    moves: Dict[Path, List[Tuple[Path, Path]]] = {}
     for key, items in sorted_rundowns.items():
-        for item in tqdm(items):
+        week_path = week_directory(directory, key)
+        moves.setdefault(week_path, []).extend(
+            (item, week_path / item.name) for item in items
+        )
+    return moves
 
-            year_num, week_num, _ = key.isocalendar()
 
-            if week_num > 9:
-                week_str = f"{week_num}"
-            else:  # prefix with zero.
-                week_str = f"0{week_num}"
+@dataclass(frozen=True)
+class JournalEntry:
+    source: str  # The source file path.
+    target: str  # The target file path.
+    size: int  # The source file size in bytes.
+    digest: str  # The source file content hash.
+    state: str  # The `verified` (copied) or `deleted` (moved) state.
 
-            week_path = directory / f"{year_num}" / f"W{week_str}"
-            try:
-                # When a path already exist, continue.
-                week_path.mkdir(parents=True, exist_ok=False)
-                status = f"SUCCESS: {week_path} created."
-            except Exception as ex:
-                status = f"WARNING: {week_path} existed."
-            finally:
-                pass  # REMOVE print(status)
-
-            file_path = week_path / item.name
+
+class ArrangeJournal:
+    """
+    The journal of the files copied to the other file system (CSV).
+
+    The file is recorded as `verified` when its copy matches the source and
+    as `deleted` when the source was removed. When the interrupted run is
+    resumed, the verified copies are checked again and only the sources are
+    removed, the files are not copied twice.
+
+    >>> with ArrangeJournal(path) as journal:
+            organize(directory, inspect(directory), target=target, journal=journal)
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+        self._entries: Dict[str, JournalEntry] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self._path.exists():
+            with open(self._path, mode="r", encoding="utf-8", newline="") as file:
+                for row in csv.DictReader(file):
+                    entry = JournalEntry(
+                        row["source"],
+                        row["target"],
+                        int(row["size"]),
+                        row["digest"],
+                        row["state"],
+                    )
+                    self._entries[entry.source] = entry  # The last one wins.
+
+    def __enter__(self) -> "ArrangeJournal":
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self._path.exists()
+        self._file = open(self._path, mode="a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(field.name for field in fields(JournalEntry))
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._file.close()
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, source: Path) -> Optional[JournalEntry]:
+        """Get the last entry of the source file."""
+        return self._entries.get(str(source))
+
+    def record(
+        self, source: Path, target: Path, size: int, digest: str, state: str
+    ) -> None:
+        """Record the state of the source file (thread safe)."""
+        entry = JournalEntry(str(source), str(target), size, digest, state)
+        with self._lock:
+            self._entries[entry.source] = entry
+            if self._file is not None:
+                self._writer.writerow(astuple(entry))
+                self._file.flush()
+
+
+def _copy(
+    source: Path,
+    target: Path,
+    journal: Optional[ArrangeJournal] = None,
+    chunk_size: int = 2**20,
+) -> int:
+    """
+    Copy the file to the other file system, verify the copy and delete the source.
+
+    The file is copied in chunks to the temporary `.partial` file which is
+    renamed to the target when its content hash matches the source and
+    removed when the copy fails.
+
+    :returns: The number of copied bytes.
+    """
+    stat = source.stat()
+    entry = None if journal is None else journal.get(source)
+
+    if (
+        entry is not None
+        and entry.state == "verified"
+        and entry.target == str(target)
+        and entry.size == stat.st_size
+        and target.exists()
+        and file_digest(source) == entry.digest == file_digest(target)
+    ):
+        digest, copied = entry.digest, 0  # Copied in the interrupted run.
+    else:
+        partial = target.with_name(f"{target.name}.partial")
+        content_hash = hashlib.blake2b(digest_size=20)
+        try:
+            with open(source, mode="rb") as src, open(partial, mode="wb") as dst:
+                while chunk := src.read(chunk_size):
+                    content_hash.update(chunk)
+                    dst.write(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            digest, copied = content_hash.hexdigest(), stat.st_size
+            if file_digest(partial, chunk_size) != digest:
+                raise OSError(f"The copy of {source} does not match the source.")
+
+            shutil.copystat(source, partial)
+            os.replace(partial, target)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        if journal is not None:
+            journal.record(source, target, stat.st_size, digest, "verified")
+
+    # Don't delete the source changed during the copy.
+    if source.stat().st_mtime_ns != stat.st_mtime_ns:
+        raise OSError(f"The source {source} was changed during the copy.")
+
+    source.unlink()
+    if journal is not None:
+        journal.record(source, target, stat.st_size, digest, "deleted")
+
+    return copied
+
+
+def _move(
+    source: Path,
+    target: Path,
+    copy: bool,
+    journal: Optional[ArrangeJournal] = None,
+) -> Tuple[int, Optional[Exception], float]:
+    """
+    Move (rename) the file or copy it to the other file system.
+
+    :returns: The number of copied bytes, the error and the elapsed time.
+    """
+    start = time.perf_counter()
+    copied, error = 0, None
+    try:
+        if not copy:
             try:
-                # When a file already exist, continue.
-                item.rename(file_path)
-                status = f"SUCCESS: {file_path}"
-            except Exception as ex:
-                status = f"FAILURE: {file_path} | {ex}"
-            finally:
-                pass  # REMOVE print(status)
+                source.rename(target)
+            except OSError as ex:
+                if ex.errno != errno.EXDEV:
+                    raise
+                copy = True  # The target is on the other file system.
+        if copy:
+            copied = _copy(source, target, journal)
+    except Exception as ex:
+        error = ex
+    return copied, error, time.perf_counter() - start
+
+
+def organize(
+    directory: Path,
+    sorted_rundowns: Dict[date, List[Path]],
+    metrics: Optional[Metrics] = None,
+    workers: int = 1,
+    target: Optional[Path] = None,
+    journal: Optional[ArrangeJournal] = None,
+) -> List[Tuple[Path, Path, Exception]]:
+    """
+    Key is date e.g "2020-30-12" and items are file paths e.g
+    [path1, path2, ...]
+
+    Each week directory is created once and the files are moved (renamed)
+    in the given number of threads, which hides the round trips to the
+    network share.
+
+    When the target directory is on the other file system (mount, share)
+    the files are copied in chunks, verified by the content hash and only
+    then removed from the source directory.
+
+    :param target: The target directory, the source directory by default.
+    :param journal: The journal of the copied files to resume the interrupted run.
+    :returns: The source, target and error of the failed moves.
+    """
+    metrics = NULL_METRICS if metrics is None else metrics
+    moves = plan(directory if target is None else target, sorted_rundowns)
+
+    source_device = os.stat(directory).st_dev
+    copy = {}
+    with metrics.timer("mkdir"):
+        for week_path in moves:
+            # When a path already exist, continue.
+            week_path.mkdir(parents=True, exist_ok=True)
+            copy[week_path] = os.stat(week_path).st_dev != source_device
+
+    failures = []
+
+    with metrics.timer("move"), ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_move, source, file_path, copy[week_path], journal): (
+                source,
+                file_path,
+            )
+            for week_path, week_moves in moves.items()
+            for source, file_path in week_moves
+        }
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            (source, file_path), (copied, error, elapsed) = (
+                futures[future],
+                future.result(),
+            )
+            metrics.observe(elapsed)
+            if error is None:
+                metrics.count("moved_files")
+                metrics.count("copied_bytes", copied)
+            else:
+                metrics.count("failed_files")
+                failures.append((source, file_path, error))
+
+    return failures
@@ -2,14 +2,20 @@
 
 import argparse
 import os
+import sys
+from contextlib import nullcontext
 from pathlib import Path
 
 from dotenv import load_dotenv
 from tqdm import tqdm
 
 from cro.rundown.sdk import inspect, organize
+from cro.rundown.sdk._arrange import ArrangeJournal, plan
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics, write_metrics
 from cro.rundown.sdk._shared import failure_msg, success_msg
 
+JOURNAL_FILE_NAME = "arrange-journal.csv"
+
 
 def main() -> None:
     """
@@ -23,21 +29,100 @@ def main() -> None:
     parser.add_argument(
         "-s", "--source", required=False, help="The rundown source directory path."
     )
+    parser.add_argument(
+        "-t",
+        "--target",
+        required=False,
+        help="The target directory path (default: the source directory).",
+    )
+    parser.add_argument(
+        "-j",
+        "--journal",
+        required=False,
+        help=f"The journal of copied files (default: <target>/{JOURNAL_FILE_NAME}).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=8,
+        help="The number of threads used to move the files (default: 8).",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="Print the planned moves without moving the files.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the stage timers and counters as JSON.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        required=False,
+        help="Write the stage timers and counters to the JSON file.",
+    )
 
     options = parser.parse_args()
 
+    metrics = (
+        Metrics()
+        if options.profile or options.metrics_out is not None
+        else NULL_METRICS
+    )
+
     match options.source:
         case None:
             source = Path(os.getenv("RUNDOWN_EXPORT_PATH"))
         case _:
             source: str = Path(options.source)
 
+    target = source if options.target is None else Path(options.target)
+    journal_path = (
+        target / JOURNAL_FILE_NAME if options.journal is None else Path(options.journal)
+    )
+
+    failures = []
+
     try:
-        sorted_rundowns = inspect(source)
-        print(f"PREPARE: Rundown {len(sorted_rundowns.values())}")
-        organize(source, sorted_rundowns)
-        print(success_msg(f"Rundowns {len(sorted_rundowns.items())} processed"))
+        with metrics.timer("total"):
+            sorted_rundowns = inspect(source, metrics)
+            print(f"PREPARE: Rundown {len(sorted_rundowns.values())}")
+
+            if options.dry_run:
+                for week_path, moves in plan(target, sorted_rundowns).items():
+                    print(f"PLAN: {week_path} ({len(moves)} files)")
+                    for item, file_path in moves:
+                        print(f"    {item.name} ==> {file_path}")
+            else:
+                # The files are copied only to the other directory (file system).
+                with (
+                    nullcontext() if target == source else ArrangeJournal(journal_path)
+                ) as journal:
+                    failures = organize(
+                        source,
+                        sorted_rundowns,
+                        metrics,
+                        workers=options.workers,
+                        target=target,
+                        journal=journal,
+                    )
+
+        if failures:
+            print(failure_msg(f"Rundowns {len(failures)} failed to move"))
+            for item, file_path, error in failures:
+                print(f"{item} ==> {file_path} | {error}")
+        else:
+            print(success_msg(f"Rundowns {len(sorted_rundowns.items())} processed"))
 
     except Exception as ex:
 
         print(failure_msg(ex))
+
+    if metrics.enabled:
+        write_metrics(metrics, options.metrics_out)
+
+    if failures:
+        sys.exit(1)
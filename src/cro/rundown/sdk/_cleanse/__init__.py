@@ -1,25 +1,47 @@
 # -*- coding: utf-8 -*-
 
 
+import csv
+import io
+import os
+import threading
+import time
 import xml.etree.ElementTree as ET
+from contextlib import contextmanager
 from copy import deepcopy
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+from typing import Optional
+from xml.etree.ElementTree import _escape_attrib, _escape_cdata
 
 from cro.rundown.sdk._domain import Station, StationType
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics
+from cro.rundown.sdk._source import (
+    open_rundown,
+    rundown_name,
+    source_digest,
+    source_stat,
+)
+from cro.rundown.sdk._xml import backend_of, get_backend
 
 __all__ = tuple(
     [
         "STATON_CODE_TO_NAME",
         "STATION_NAME_TO_OBJECT",
+        "CLEAN_FIELD_IDS",
         "clean_rundown_name",
         "clean_rundown_content",
+        "clean_rundown_stream",
+        "cleanse_rundown_file",
+        "CleanseManifest",
     ]
 )
 
 
 # Maps the station ID to station object.
 STATION_NAME_TO_OBJECT: dict[str, Station] = {
-    "Plus": Station(11, "Plus", StationType.NATIONWIDE),
-    "Radiožurnál": Station(13, "Radiožurnál", StationType.NATIONWIDE),
+    "Plus": Station(13, "Plus", StationType.NATIONWIDE),
+    "Radiožurnál": Station(11, "Radiožurnál", StationType.NATIONWIDE),
     "Dvojka": Station(0, "Dvojka", StationType.NATIONWIDE),
     "Vltava": Station(0, "Vltava", StationType.NATIONWIDE),
     "Pohoda": Station(0, "Pohoda", StationType.NATIONWIDE),
@@ -77,6 +99,12 @@ STATON_CODE_TO_NAME: dict[int, str] = {
 }
 
 
+# The `<OM_FIELD>` IDs kept in the cleaned rundown.
+CLEAN_FIELD_IDS: frozenset[str] = frozenset(
+    "8 5016 1005 1000 5081 6 5070 5072 5082 12 321".split()
+)
+
+
 class RundownCleanErrror(Exception):
     ...
 
@@ -108,7 +136,9 @@ def clean_rundown_name(source: str) -> str:
     return (year, file_prefix_name + f"_{station.type.name[0]}_{clean_station_name}")
 
 
-def clean_rundown_content(tree: ET.ElementTree) -> ET.ElementTree:
+def clean_rundown_content(
+    tree: ET.ElementTree, inplace: bool = False
+) -> ET.ElementTree:
     """
     Clean the rundown XML file content.
 
@@ -116,61 +146,385 @@ def clean_rundown_content(tree: ET.ElementTree) -> ET.ElementTree:
     - unused `<OM_FIELD>` nodes
     - unused `<OM_UPLINK>` nodes
     - etc.
+
+    The Radio Rundown object is pruned in a single traversal.
+    The tree is parsed with any XML backend (see `get_backend`).
+
+    :param tree: The rundown XML tree.
+    :param inplace: Modify the given tree instead of its copy (halves the memory).
+    :returns: The cleaned rundown XML tree.
     """
-    tree = deepcopy(tree)  # Be sure you don't modify the original tree!
+    xml = backend_of(tree)
+
+    if not inplace:
+        tree = deepcopy(tree)  # Be sure you don't modify the original tree!
 
     # > Radio Rundown OM_OBJECT: only one node.
-    rr = tree.find('.//*[@TemplateName="Radio Rundown"]')
+    if (rr := tree.find('.//*[@TemplateName="Radio Rundown"]')) is None:
+        raise RundownCleanErrror("The Radio Rundown object not found.")
+
+    nodes = [rr]
+    while nodes:
+        node = nodes.pop()
+
+        # Clean OM_RECORD(S)
+        if node.tag == "OM_RECORD":
+            node[:] = [
+                child
+                for child in node
+                if child.get("IsEmpty") != "yes"
+                and child.tag != "OM_UPLINK"
+                and (child.tag != "OM_FIELD" or child.get("FieldID") in CLEAN_FIELD_IDS)
+            ]
+
+        # Clean OM_OBJECT(s)
+        elif node.tag == "OM_OBJECT":
+            if node is not rr:
+                node[:] = [
+                    child
+                    for child in node
+                    if child.tag != "OM_UPLINK"
+                    and (
+                        child.tag != "OM_FIELD"
+                        or child.get("FieldID") in CLEAN_FIELD_IDS
+                    )
+                ]
+
+            if (header := xml.header(node)) is not None:
+                header[:] = [
+                    child
+                    for child in header
+                    if child.get("IsEmpty") != "yes"
+                    and (
+                        child.tag != "OM_FIELD"
+                        or child.get("FieldID") in CLEAN_FIELD_IDS
+                    )
+                ]
+
+        nodes.extend(node)
+
+    return tree
+
+
+def clean_rundown_stream(source, target, backend: Optional[str] = None) -> None:
+    """
+    Clean the rundown XML file content without building the whole tree.
+
+    Reads the XML file as the `iterparse` events, drops the same nodes as the
+    `clean_rundown_content` on the fly and writes the rest straight to the
+    target, so the output is byte-identical to the written cleaned tree but
+    the memory stays bounded whatever the file size.
+
+    :param source: The rundown XML file name or file object.
+    :param target: The target XML file name or binary file object.
+    :param backend: The XML backend name (see `get_backend`).
+    """
+    with _open_writer(target) as file:
+        write = file.write
+
+        # The open (kept) elements: [element, kind, opened, header_seen].
+        stack: list[list] = []
+        dropped = closed = None  # The (element, parent) pairs to release.
+        skip, rr_found = 0, False
+
+        iterparse = get_backend(backend).iterparse
+        for event, element in iterparse(source, ("start", "end")):
+
+            # Skip the events of the dropped subtree.
+            if skip:
+                if event == "start":
+                    skip += 1
+                elif (skip := skip - 1) == 0:
+                    _release(*dropped)
+                continue
+
+            # The tail of the last closed element is known now.
+            if closed is not None:
+                if closed[0].tail:
+                    write(_escape_cdata(closed[0].tail))
+                _release(*closed)
+                closed = None
+
+            if event == "start":
+                parent = stack[-1] if stack else None
+
+                if parent is not None and not _keep_node(parent[1], element):
+                    dropped, skip = (element, parent[0]), 1
+                    continue
+
+                if parent is not None and not parent[2]:
+                    text = parent[0].text
+                    write(f">{_escape_cdata(text)}" if text else ">")
+                    parent[2] = True
 
-    header = rr.find("./OM_HEADER")
-    for field in header.findall('*[@IsEmpty="yes"]'):
-        header.remove(field)
+                kind = _node_kind(parent, element, rr_found)
+                rr_found = rr_found or kind == "rundown"
+                stack.append([element, kind, False, False])
 
-    for field in header.findall("./OM_FIELD"):
+                write(f"<{element.tag}")
+                for key, value in element.items():
+                    write(f' {key}="{_escape_attrib(value)}"')
+
+            else:
+                element, _, opened, _ = stack.pop()
+
+                if opened:
+                    write(f"</{element.tag}>")
+                elif text := element.text:
+                    write(f">{_escape_cdata(text)}</{element.tag}>")
+                else:
+                    write(" />")
+
+                closed = (element, stack[-1][0] if stack else None)
+
+        if closed is not None and closed[0].tail:
+            write(_escape_cdata(closed[0].tail))
+
+    if not rr_found:
+        raise RundownCleanErrror("The Radio Rundown object not found.")
+
+
+def _node_kind(parent: Optional[list], node: ET.Element, rr_found: bool) -> str:
+    """
+    Get the kind of the kept node which determines the cleaning of its children.
+    """
+    if parent is None or parent[1] == "outside":
         if (
-            field.attrib["FieldID"]
-            not in "8 5016 1005 1000 5081 6 5070 5072 5082 12 321".split()
+            parent is not None
+            and not rr_found
+            and node.get("TemplateName") == "Radio Rundown"
         ):
-            header.remove(field)
+            return "rundown"
+        return "outside"
 
-    # Clean OM_RECORD(S)
-    for omr in rr.findall(".//OM_RECORD"):
+    match node.tag:
+        case "OM_RECORD":
+            return "record"
+        case "OM_OBJECT":
+            return "object"
+        case "OM_HEADER" if parent[1] in ("rundown", "object") and not parent[3]:
+            parent[3] = True  # Only the first header is cleaned.
+            return "header"
 
-        for field in omr.findall('*[@IsEmpty="yes"]'):
-            omr.remove(field)
+    return "inside"
 
-        for field in omr.findall("./OM_FIELD"):
-            if (
-                field.attrib["FieldID"]
-                not in "8 5016 1005 1000 5081 6 5070 5072 5082 12 321".split()
-            ):
-                omr.remove(field)
 
-        for field in omr.findall("./OM_UPLINK"):
-            omr.remove(field)
+def _keep_node(kind: str, node: ET.Element) -> bool:
+    """
+    Check whether the node is kept in the parent node of the given kind.
+    """
+    match kind:
+        case "record":
+            return (
+                node.get("IsEmpty") != "yes"
+                and node.tag != "OM_UPLINK"
+                and (node.tag != "OM_FIELD" or node.get("FieldID") in CLEAN_FIELD_IDS)
+            )
+        case "object":
+            return node.tag != "OM_UPLINK" and (
+                node.tag != "OM_FIELD" or node.get("FieldID") in CLEAN_FIELD_IDS
+            )
+        case "header":
+            return node.get("IsEmpty") != "yes" and (
+                node.tag != "OM_FIELD" or node.get("FieldID") in CLEAN_FIELD_IDS
+            )
+    return True
+
+
+def _release(node: ET.Element, parent: Optional[ET.Element]) -> None:
+    """
+    Release the finished node so the parsed tree does not grow.
+    """
+    node.clear()
+    if parent is not None:
+        parent.remove(node)
+
 
-    # Clean OM_OBJECT(s)
-    for omb in rr.findall(".//OM_OBJECT"):
+@contextmanager
+def _open_writer(target):
+    """
+    Open the text writer with the same settings as the `ElementTree.write`.
+    """
+    if hasattr(target, "write"):
+        file = io.TextIOWrapper(
+            target, encoding="utf-8", errors="xmlcharrefreplace", newline="\n"
+        )
+        try:
+            yield file
+        finally:
+            file.flush()
+            file.detach()
+    else:
+        with open(
+            target,
+            mode="w",
+            encoding="utf-8",
+            errors="xmlcharrefreplace",
+            newline="\n",
+        ) as file:
+            yield file
+
+
+def cleanse_rundown_file(
+    source: Path,
+    target_dir: Path,
+    stream: bool = False,
+    metrics: Optional[Metrics] = None,
+    backend: Optional[str] = None,
+) -> Path:
+    """
+    Clean the rundown XML file name and content and write the result
+    to the year folder in the target directory.
 
-        header = omb.find(".//OM_HEADER")
-        for field in header.findall('*[@IsEmpty="yes"]'):
-            header.remove(field)
+    The function is meant to be called in the worker process.
 
-        for field in header.findall("./OM_FIELD"):
-            if (
-                field.attrib["FieldID"]
-                not in "8 5016 1005 1000 5081 6 5070 5072 5082 12 321".split()
-            ):
-                header.remove(field)
+    :param source: The rundown XML file path (see `open_rundown`).
+    :param target_dir: The target directory path.
+    :param stream: Clean the file without building the whole tree.
+    :param metrics: The metrics of the cleansing stages.
+    :param backend: The XML backend name (see `get_backend`).
+    :returns: The cleaned rundown XML file path.
+    """
+    metrics = NULL_METRICS if metrics is None else metrics
+    start = time.perf_counter()
+
+    year, name = clean_rundown_name(Path(rundown_name(source)))
+
+    path = target_dir / year / f"{name}.xml"
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # The file is written aside and renamed when complete, so the file which
+    # failed (e.g. broken in the middle) leaves no truncated target behind.
+    partial = path.with_name(f"{path.name}.partial")
+    try:
+        if stream:
+            with metrics.timer("clean"):  # The parsing and writing is a part of it.
+                with open_rundown(source) as file:
+                    clean_rundown_stream(file, partial, backend)
+        else:
+            xml = get_backend(backend)
+            with metrics.timer("parse"):
+                with open_rundown(source) as file:
+                    tree = xml.parse(file)
+            with metrics.timer("clean"):
+                tree = clean_rundown_content(tree=tree, inplace=True)
+            with metrics.timer("write"):
+                with open(partial, mode="wb+") as file:
+                    xml.write(tree, file)
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    if metrics.enabled:
+        metrics.count("files")
+        metrics.count("bytes", source_stat(source)[0])
+        metrics.count("written_bytes", path.stat().st_size)
+        metrics.observe(time.perf_counter() - start)
+
+    return path
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    source: str  # The source file path relative to the source directory.
+    size: int  # The source file size in bytes.
+    mtime: int  # The source file modification time in nanoseconds.
+    digest: str  # The source file content hash.
+    target: str  # The target file path relative to the target directory.
+
+
+class CleanseManifest:
+    """
+    The manifest of the successfully cleansed rundown files (CSV).
 
-        for field in omb.findall("./OM_FIELD"):
-            if (
-                field.attrib["FieldID"]
-                not in "8 5016 1005 1000 5081 6 5070 5072 5082 12 321".split()
-            ):
-                omb.remove(field)
+    Each processed file is appended to the manifest immediately, so the
+    interrupted run resumes where it stopped. The file is processed again
+    when it is new, when its content changed or when its target is missing.
 
-        for field in omb.findall("./OM_UPLINK"):
-            omb.remove(field)
+    >>> with CleanseManifest(path, source_dir, target_dir) as manifest:
+            sources = [source for source in sources if source not in manifest]
+            ...  # process the sources
+            manifest.add(source, target)
+    """
 
-    return tree
+    def __init__(self, path: Path, source_dir: Path, target_dir: Path) -> None:
+        self._path = Path(path)
+        self._source_dir = Path(source_dir)
+        self._target_dir = Path(target_dir)
+        self._entries: dict[str, ManifestEntry] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+        if self._path.exists():
+            with open(self._path, mode="r", encoding="utf-8", newline="") as file:
+                for row in csv.DictReader(file):
+                    entry = ManifestEntry(
+                        row["source"],
+                        int(row["size"]),
+                        int(row["mtime"]),
+                        row["digest"],
+                        row["target"],
+                    )
+                    self._entries[entry.source] = entry  # The last one wins.
+
+    def __enter__(self) -> "CleanseManifest":
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self._path.exists()
+        self._file = open(self._path, mode="a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(field.name for field in fields(ManifestEntry))
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._file.close()
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, source: Path) -> bool:
+        """Check whether the source file was already cleansed and did not change."""
+        entry = self._entries.get(self._key(source))
+
+        if entry is None or not (self._target_dir / entry.target).exists():
+            return False
+
+        size, mtime = source_stat(source)
+        if size != entry.size:
+            return False
+        if mtime == entry.mtime:
+            return True
+
+        # The file was touched (e.g. exported again) so compare the content.
+        if source_digest(source) != entry.digest:
+            return False
+        self._append(entry.source, size, mtime, entry.digest, entry.target)
+        return True
+
+    def add(self, source: Path, target: Path, digest: Optional[str] = None) -> None:
+        """
+        Record the successfully cleansed source file and its target file.
+
+        :param digest: The source digest when already computed (e.g. by the
+            worker process), so the source is not read again.
+        """
+        size, mtime = source_stat(source)
+        self._append(
+            self._key(source),
+            size,
+            mtime,
+            source_digest(source) if digest is None else digest,
+            Path(target).relative_to(self._target_dir).as_posix(),
+        )
+
+    def _key(self, source: Path) -> str:
+        return Path(source).relative_to(self._source_dir).as_posix()
+
+    def _append(self, *values) -> None:
+        entry = ManifestEntry(*values)
+        with self._lock:  # The files are added from the threads (thread safe).
+            self._entries[entry.source] = entry
+            if self._file is not None:
+                self._writer.writerow(astuple(entry))
+                self._file.flush()
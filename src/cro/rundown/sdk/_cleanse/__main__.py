@@ -3,13 +3,99 @@
 
 import argparse
 import sys
-import xml.etree.ElementTree as ET
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
 from pathlib import Path
+from typing import Generator
 
 from tqdm import tqdm
 
-from cro.rundown.sdk import clean_rundown_content, clean_rundown_name
+from cro.rundown.sdk import cleanse_rundown_file
+from cro.rundown.sdk._cleanse import CleanseManifest
+from cro.rundown.sdk._index import RundownIndex
+from cro.rundown.sdk._metrics import (
+    NULL_METRICS,
+    Metrics,
+    collect_metrics,
+    write_metrics,
+)
 from cro.rundown.sdk._shared import failure_msg, success_msg
+from cro.rundown.sdk._source import source_digest
+
+MANIFEST_FILE_NAME = "cleanse-manifest.csv"
+
+
+def _cleanse_digest_file(
+    source: Path,
+    target_dir: Path,
+    stream: bool = False,
+    metrics: Metrics = NULL_METRICS,
+) -> tuple[Path, str]:
+    """
+    Cleanse the rundown file and compute the source digest for the manifest.
+
+    The function is meant to be called in the worker process, so the source
+    is hashed in parallel and not again in the main process.
+    """
+    target = cleanse_rundown_file(source, target_dir, stream, metrics)
+    with metrics.timer("digest"):
+        return target, source_digest(source)
+
+
+def cleanse_files(
+    sources: list[Path],
+    target_dir: Path,
+    workers: int = 1,
+    stream: bool = False,
+    metrics: Metrics = NULL_METRICS,
+) -> Generator[tuple[Path, Path | Exception, str | None], None, None]:
+    """
+    Cleanse the given rundown files in the worker processes.
+
+    At most `2 * workers` files are in flight, so the pending results don't
+    pile up for large directories. Yields the source path, the target path
+    and the source digest for each file in order of completion or the
+    exception and `None` when the file fails. The metrics of the workers
+    are merged into the given metrics.
+    """
+    if workers <= 1:
+        for source in sources:
+            try:
+                yield source, *_cleanse_digest_file(source, target_dir, stream, metrics)
+            except Exception as ex:
+                yield source, ex, None
+        return
+
+    def outcome(future):
+        if (exception := future.exception()) is not None:
+            return exception, None
+        if not metrics.enabled:
+            return future.result()
+        result, worker_metrics = future.result()
+        metrics.merge(worker_metrics)
+        return result
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for source in sources:
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), *outcome(future)
+            arguments = (_cleanse_digest_file, source, target_dir, stream)
+            future = (
+                executor.submit(collect_metrics, *arguments)
+                if metrics.enabled
+                else executor.submit(*arguments)
+            )
+            pending[future] = source
+
+        for future in as_completed(list(pending)):
+            yield pending.pop(future), *outcome(future)
 
 
 def main():
@@ -19,7 +105,7 @@ def main():
     2. Clean each XML file.
     3: Result write to the output folder e.g. `data/target`.
 
-    Use batch or (async) stream?
+    Use `--workers` option to process the files in parallel.
     """
 
     parser = argparse.ArgumentParser(description="The `cro.rundown.cleanse` program.")
@@ -41,9 +127,49 @@ def main():
 
     parser.add_argument("-s", "--source", required=False, help="The source directory.")
     parser.add_argument("-t", "--target", required=False, help="The target directory.")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of worker processes used to cleanse the files.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Clean the files without building the whole XML tree.",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        required=False,
+        help=f"The processed files manifest (default: <target>/{MANIFEST_FILE_NAME}).",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Cleanse all files even when they are in the manifest.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the stage timers and counters as JSON.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        required=False,
+        help="Write the stage timers and counters to the JSON file.",
+    )
 
     options = parser.parse_args()
 
+    metrics = (
+        Metrics()
+        if options.profile or options.metrics_out is not None
+        else NULL_METRICS
+    )
+
     verbose = options.verbose
 
     # if options.usage:
@@ -68,43 +194,61 @@ def main():
         case _:
             target_dir = Path(options.target)
 
-    # Read files for processing.
-    sources = [file for file in tqdm(source_dir.glob("**/*.xml"))]
-    # TODO Sort the by ?
-    # TODO Create them to batch of size ?
+    # Read files for processing, the unrecognized names are not opened.
+    with metrics.timer("index"):
+        index = RundownIndex.scan(source_dir)
+    sources = [file.path for file in index.select()]
 
-    try:
-        targets = {}
-        processed_files = []
-
-        # Process the files.
-        for source in sources:
-            processed_files.append(source)
-            year, file_name = clean_rundown_name(source)
-            print(f"CLEANING {len(processed_files)}/{len(sources)}:  ==> {file_name}")
-            targets[file_name] = clean_rundown_content(tree=ET.parse(source))
-
-            # Save the processed file on each iteration.
-            tree, name = targets[file_name], file_name
-
-            path = target_dir / year / f"{name}.xml"
-
-            with open(path, mode="wb+") as file:
-                tree.write(file, encoding="utf-8")
-
-        # Save the processed files after processing.
-        # for name, tree in tqdm(targets.items()):
-        # tree.write(target_dir / year / f"{name}.xml", encoding="utf8")
-
-        if verbose:
-            print(success_msg())
-            sys.exit(0)
+    manifest_path = (
+        target_dir / MANIFEST_FILE_NAME
+        if options.manifest is None
+        else Path(options.manifest)
+    )
 
-        # TODO Dump a processed files statistics as CSV:
-        # `source file name`, `target file name`
+    with (
+        metrics.timer("total"),
+        CleanseManifest(manifest_path, source_dir, target_dir) as manifest,
+    ):
+        # Skip the files processed in the previous runs.
+        if not options.force:
+            with metrics.timer("manifest"):
+                count = len(sources)
+                sources = [source for source in sources if source not in manifest]
+            metrics.count("skipped_files", count - len(sources))
+        print(f"PREPARE: Rundowns {len(sources)} ({len(manifest)} in manifest)")
 
-    except Exception as ex:
-        print(f"Failure: {str(ex)}, {processed_files[-1]}")
-        # TODO Dump all succesfully processed files (CSV) to be
-        # able to skip them in another run.
-        raise ex  # sys.exit(1)
+        # Process the files.
+        errors = [
+            (source, ValueError("The rundown file name is not recognized."))
+            for source in index.unknown
+        ]
+        for source, target, digest in tqdm(
+            cleanse_files(
+                sources,
+                target_dir,
+                workers=options.workers,
+                stream=options.stream,
+                metrics=metrics,
+            ),
+            total=len(sources),
+        ):
+            if isinstance(target, Exception):
+                errors.append((source, target))
+                continue
+            with metrics.timer("manifest"):
+                manifest.add(source, target, digest)
+            if verbose:
+                tqdm.write(f"CLEANED {source.name} ==> {target.name}")
+
+    if metrics.enabled:
+        metrics.count("failed_files", len(errors))
+        write_metrics(metrics, options.metrics_out)
+
+    if errors:
+        total = len(sources) + len(index.unknown)
+        print(failure_msg(f"Rundowns {len(errors)}/{total} failed"))
+        for source, error in errors:
+            print(f"{source} | {error}")
+        sys.exit(1)
+
+    print(success_msg(f"Rundowns {len(sources)} processed"))
@@ -3,19 +3,39 @@
 
 """
 A domain model values, entities and services.
-"""
 
+The model types are slotted (no per-instance dictionary). The records of the
+rundown and the respondents of the record are created from the rundown tree
+only when they are accessed first time and then they are kept:
+
+    >>> rundown.date, rundown.station  # The records are not created.
+    >>> for record in rundown.records:
+            record.respondents
+"""
 
 import datetime as dt
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Optional
+from typing import Any, List, Optional
 from xml.etree.ElementTree import ElementTree
 
-__all__ = tuple(["Rundown", "Respondent", "Station", "Name"])
+__all__ = tuple(["Rundown", "Record", "Respondent", "Station", "Name"])
+
+
+_PARSER = None
+
+
+def _parser():
+    # Imported lazily as the parser module depends on the domain model.
+    global _PARSER
+    if _PARSER is None:
+        from cro.rundown.sdk._extract import RundownParser
 
+        _PARSER = RundownParser()
+    return _PARSER
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Name:
     given: str
     family: str
@@ -27,7 +47,7 @@ class Name:
             raise ValueError("The family name value must be non empty string.")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Respondent:
     """
     A respondent extracted form the rundown file.
@@ -52,24 +72,86 @@ class StationType(Enum):
     # from string
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Station:
     id: int
     name: str
     type: StationType
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True, init=False, eq=False)
 class Record:
-    since: dt.time
-    till: dt.time
-    respondents: tuple[Respondent]
+    """
+    The rundown record: the Radio Story.
+
+    :param since: The start time.
+    :param till: The end time.
+    :param respondents: The respondents (default: created from the element).
+    :param itemcode: The story item code.
+    :param element: The Radio Story object of the rundown tree.
+    """
 
+    since: Optional[dt.time]
+    till: Optional[dt.time]
+    itemcode: Optional[str] = None
+    element: Any = field(default=None, repr=False, compare=False)
+    _respondents: Optional[tuple] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __init__(
+        self,
+        since: Optional[dt.time],
+        till: Optional[dt.time],
+        respondents: Optional[tuple[Respondent, ...]] = None,
+        itemcode: Optional[str] = None,
+        element: Any = None,
+    ) -> None:
+        # The respondents are the third argument as they were before the
+        # records were created lazily from the rundown tree.
+        object.__setattr__(self, "since", since)
+        object.__setattr__(self, "till", till)
+        object.__setattr__(self, "itemcode", itemcode)
+        object.__setattr__(self, "element", element)
+        object.__setattr__(
+            self, "_respondents", None if respondents is None else tuple(respondents)
+        )
 
-@dataclass(frozen=True)
+    @property
+    def respondents(self) -> tuple[Respondent, ...]:
+        """The respondents of the Contact Item records (created on first access)."""
+        if self._respondents is None:
+            respondents = (
+                ()
+                if self.element is None
+                else tuple(_parser().respondents(self.element))
+            )
+            object.__setattr__(self, "_respondents", respondents)
+        return self._respondents
+
+    def __eq__(self, other: object) -> bool:
+        # The lazy respondents are created from the element to be compared.
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.since, self.till, self.itemcode, self.respondents) == (
+            other.since,
+            other.till,
+            other.itemcode,
+            other.respondents,
+        )
+
+    def __hash__(self) -> int:
+        # The respondents are not hashable (the labels are lists).
+        return hash((self.since, self.till, self.itemcode))
+
+
+@dataclass(frozen=True, slots=True)
 class Rundown:
     """
     The radio rundown domain model.
+
+    The records are created from the original content when given, otherwise
+    from the cleaned content (without the respondent fields).
     """
 
     date: dt.date
@@ -78,9 +160,27 @@ class Rundown:
     cleaned_name: str
     original_name: Optional[str] = None
     original_content: Optional[ElementTree] = None
+    _records: Optional[tuple] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
-    def records(self) -> tuple[Record]:
-        return tuple([])
+    def records(self) -> tuple[Record, ...]:
+        """
+        The records of the rundown (created on first access).
+
+        The cleaned content has no end time and no respondent fields, so
+        without the original content the `till` of the records is always
+        `None` and their respondents are empty.
+        """
+        if self._records is None:
+            content = (
+                self.cleaned_content
+                if self.original_content is None
+                else self.original_content
+            )
+            records = () if content is None else tuple(_parser().records(content))
+            object.__setattr__(self, "_records", records)
+        return self._records
 
     # >  ordering
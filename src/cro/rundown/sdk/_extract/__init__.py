@@ -6,17 +6,41 @@ The rundown file data extraction.
 
 from __future__ import annotations
 
-import datetime
-import datetime as dt
-import math
+import os
+import pickle
+import time
 import xml.etree.ElementTree as ET
-from collections import OrderedDict
 from pathlib import Path
-from typing import Generator, List, Optional
+from typing import Dict, Generator, List, NamedTuple, Optional, Tuple
 
 from loguru import logger
 
-__all__ = tuple(["RundownParser", "format_code_vs_names", "table_columns"])
+from cro.rundown.sdk._domain import Name, Record, Respondent
+from cro.rundown.sdk._extract._decode import (
+    decode_date,
+    decode_datetime,
+    decode_timespan,
+)
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics
+from cro.rundown.sdk._registry import RespondentRegistry
+from cro.rundown.sdk._source import open_rundown, source_digest, source_stat
+from cro.rundown.sdk._xml import XmlBackend, backend_of, get_backend
+
+__all__ = tuple(
+    [
+        "PARSER_VERSION",
+        "ExtractCache",
+        "Row",
+        "RundownParser",
+        "format_code_vs_names",
+        "parse_rundown_file",
+        "table_columns",
+    ]
+)
+
+# The version of the extracted rows, bump it when the rows change
+# to invalidate the cached rows.
+PARSER_VERSION = "2"
 
 
 format_code_vs_name = {
@@ -71,6 +95,40 @@ table_columns = [
 ]
 
 
+class Row(NamedTuple):
+    """
+    The extracted row with the values ordered by the `table_columns`.
+
+    The row is a plain tuple (no per-row dictionary) so millions of rows
+    stay compact and are cheap to pickle between the worker processes.
+
+    >>> row.itemcode, row[9]
+    ('PS5362007', 'PS5362007')
+    >>> row._asdict()  # The dictionary when needed.
+    """
+
+    category: Optional[str]
+    station: Optional[str]
+    date: Optional[str]
+    block: Optional[str]
+    since: Optional[str]
+    till: Optional[str]
+    duration: Optional[str]
+    format: Optional[str]
+    target: Optional[str]
+    itemcode: Optional[str]
+    incode: Optional[str]
+    topic: Optional[str]
+    creator: Optional[str]
+    author: Optional[str]
+    editorial: Optional[str]
+    approved_station: Optional[str]
+    approved_editorial: Optional[str]
+    title1: Optional[str]
+    title2: Optional[str]
+    title3: Optional[str]
+
+
 def postprocess_result(dct: dict) -> pd.DataFrame:
     """Post process the parsed values."""
     # Post process the pandas dataframe: normalize = lowercase, strip, replace...
@@ -85,209 +143,400 @@ class RundownParser:
             ... # process data
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        metrics: Optional[Metrics] = None,
+        backend: Optional[str] = None,
+        registry: Optional[RespondentRegistry] = None,
+    ) -> None:
         self._files = []
+        self._metrics = NULL_METRICS if metrics is None else metrics
+        self._xml = get_backend(backend)  # The backend of the `stream` method.
+        self._registry = registry  # The respondents are registered when given.
         self._errors: List = []
 
     @property
     def errors(self) -> List:
         return tuple(self._errors)
 
-    def __call__(self, rundown: ET.ElementTree) -> Generator[OrderedDict, None, None]:
+    def __call__(self, rundown: ET.ElementTree) -> Generator[Row, None, None]:
         """
         Parse the  rundown XML files one by one.
-        TODO: Make the parsing concurrent/parallel.
+        See the `parse_rundown_file` to parse the files in worker processes.
+        The tree is parsed with any XML backend (see `get_backend`).
 
         :returns: The generator of parsed file objects.
         """
+        xml = backend_of(rundown)
+
         try:
             root = rundown.getroot()
 
             # [1] RADIO RUNDOWN OBJECT
-            if (
-                radio_rundown := root.find("./OM_OBJECT[@TemplateName='Radio Rundown']")
-            ) is None:
+            if (radio_rundown := xml.radio_rundown(root)) is None:
                 return "RADIO RUNDOWN NOT FOUND"
 
             date = self._extract_date(radio_rundown[0])  # [0] => first node = header
             # hours_station_date: str = self._extract_station_date_hours(radio_rundown[0])
 
             # [2] RADIO RUNDOWN (HOURLY BLOCK) RECORDS
-            for rr_record in radio_rundown.findall("./OM_RECORD"):
+            for rr_record in xml.records(radio_rundown):
 
                 rr_record_id = rr_record.attrib["RecordID"]
 
                 # [3] HOURLY RUNDOWN OBJECT (one for each hourly block record)
-                if (
-                    hourly_rundown_object := rr_record.find(
-                        "./OM_OBJECT[@TemplateName='Hourly Rundown']"
-                    )
-                ) is None:
+                if (hourly_rundown_object := xml.hourly_rundown(rr_record)) is None:
                     logger.error("NEOBSAHUJE HOURLY RUNDOWN")
                     continue  # or sys.exit(1) ?
 
                 hour_block = self._extract_station_hour_block(hourly_rundown_object)
 
-                category1 = hourly_rundown_object.attrib["TemplateName"]
-
                 # [4] HOURLY RUNDOWN RECORDS
-                for hr_record in hourly_rundown_object.findall("./OM_RECORD"):
-                    title1 = str(self._extract_title(hr_record)).replace("=", "#")
-                    hr_record_id = hr_record.attrib["RecordID"]
-
-                    duration = self._extract_duration(hr_record)
-                    if duration is not None:
-                        duration = math.ceil(int(duration) / 1000 / 60)  # minutes
+                for hr_record in xml.records(hourly_rundown_object):
 
                     # [5] RADIO STORY
-                    for obj in hr_record.findall(
-                        './/OM_OBJECT[@TemplateName="Radio Story"]'
-                    ):
+                    for obj in xml.stories(hr_record):
+                        yield from self._parse_story(
+                            obj,
+                            hr_record,
+                            xml=xml,
+                            rr_record_id=rr_record_id,
+                            date=date,
+                            hour_block=hour_block,
+                        )
 
-                        header = obj.find("./OM_HEADER")
+        except Exception as ex:
+            logger.error(ex)
+            self._errors.append((str(), str(ex)))
+            # raise ex
 
-                        oid = obj.attrib["ObjectID"]
-                        otn = obj.attrib["TemplateName"]
+    def stream(self, source) -> Generator[Row, None, None]:
+        """
+        Parse the rundown XML file incrementally with `iterparse`.
 
-                        format_code = self._extract_format(header)
-                        format_name = format_code_vs_name.get(format_code, "")
+        Yields the same rows as the `__call__` method but never holds the
+        whole document in memory: the rows are produced as soon as each
+        Radio Story object is closed and the finished subtrees are released.
 
-                        incode = self._extract_incode(header)
-                        itemcode = self._extract_itemcode(header)
-                        title2 = str(self._extract_title(header)).replace("=", "#")
-                        category2 = self._extract_text(
-                            header, "./OM_FIELD[@FieldID='5001']/OM_STRING"
-                        )
+        The record fields (title, duration) are expected before the nested
+        Radio Story object, which is how OpenMedia writes the export.
 
-                        target = self._extract_target(header)
-                        if target is not None:
-                            target = target.lower().strip()
-
-                        station_id = self._extract_station_id(header)
-                        author = self._extract_author(header)
-                        creator = self._extract_creator(header)
-
-                        editorial = self._extract_editorial(header)
-                        if editorial is not None:
-                            editorial = editorial.replace("-", "###").strip()
-
-                        approved_station = self._extract_approved_station(header)
-                        approved_editorial = self._extract_approved_editorial(header)
-                        topic = self._extract_topic(header)
-                        since = self._extract_since(header)
-                        till = self._extract_till(header)
-                        time = self._extract_time(header)
-
-                        if time is not None:
-                            time = dt.datetime.strptime(time, "%Y%m%dT%H%M%S,%f").time()
-
-                        if since is not None:
-                            since = dt.datetime.strptime(
-                                since, "%Y%m%dT%H%M%S,%f"
-                            ).time()
-
-                        if till is not None:
-                            till = dt.datetime.strptime(till, "%Y%m%dT%H%M%S,%f").time()
-
-                        result_part1 = OrderedDict(
-                            [
-                                # SYSTEM
-                                # ("oid", oid),
-                                # ("tn", otn),
-                                # ("rr_rid", rr_record_id),
-                                # ("hr_rid", hr_record_id),
-                                ("category1", category1),
-                                ("category2", category2),
-                                # BROADCAST
-                                ("station", station_id),
-                                ("date", date),
-                                ("block", hour_block),
-                                ("since", since),
-                                ("till", till),
-                                ("duration", duration),
-                                ("target", target),
-                                ("itemcode", itemcode),
-                                ("incode", incode),
-                                ("title1", title1),
-                                ("title2", title2),
-                                ("format", format_name),
-                                ("author", author),
-                                ("creator", creator),
-                                ("editorial", editorial),
-                                ("approved_station", approved_station),
-                                ("approved_editorial", approved_editorial),
-                                ("topic", topic),
-                            ]
-                        )
+        :param source: The rundown XML file name or file object.
+        :returns: The generator of parsed file objects.
+        """
+        stack: List[ET.Element] = []
+        radio_rundown = rr_record = hourly_rundown_object = hr_record = None
+        date, header_seen, hour_block, open_stories = None, False, None, 0
 
-                        result_parts2 = []
-                        # [6] RECORDS in stories e.g. contact, audio etc. (may not be present)
-                        for rs_record in (rs_records := obj.findall("./OM_RECORD")):
-                            logger.debug(
-                                f"Radio Rundown Record ID = {rr_record_id}, Hourly Rundown Record ID = {hr_record_id}, Radio Story Record ID {rs_record.attrib['RecordID']}"
-                            )
-                            title3 = (
-                                str(self._extract_title(rs_record))
-                                .replace("=", "#")
-                                .strip()
-                            )
+        try:
+            for event, element in self._xml.iterparse(source, ("start", "end")):
+
+                if event == "start":
+                    parent = stack[-1] if stack else None
+                    stack.append(element)
+
+                    # [1] RADIO RUNDOWN OBJECT
+                    if radio_rundown is None:
+                        if (
+                            len(stack) == 2
+                            and element.tag == "OM_OBJECT"
+                            and element.get("TemplateName") == "Radio Rundown"
+                        ):
+                            radio_rundown = element
+
+                    # [2] RADIO RUNDOWN (HOURLY BLOCK) RECORDS
+                    elif parent is radio_rundown and element.tag == "OM_RECORD":
+                        rr_record, hourly_rundown_object = element, None
+
+                    # [3] HOURLY RUNDOWN OBJECT (one for each hourly block record)
+                    elif (
+                        parent is rr_record
+                        and hourly_rundown_object is None
+                        and element.tag == "OM_OBJECT"
+                        and element.get("TemplateName") == "Hourly Rundown"
+                    ):
+                        hourly_rundown_object = element
 
-                            category3 = self._extract_text(
-                                rs_record, "./OM_FIELD[@FieldID='5001']/OM_STRING"
-                            )
+                    # [4] HOURLY RUNDOWN RECORDS
+                    elif parent is hourly_rundown_object and element.tag == "OM_RECORD":
+                        hr_record = element
+                        # The header is complete as it precedes the records.
+                        hour_block = self._extract_station_hour_block(parent)
 
-                            if category3 is not None:
-                                category3 = (
-                                    category3.replace("Item", "")
-                                    .replace("Bin", "")
-                                    .strip()
-                                    .lower()
-                                )
-
-                            # if ".//OM_OBJECT[@TemplateName='Contact Item']"
-                            #   openmedia_id = self._extract_unique_id(om_object)
-                            #   given_name = self._extract_given_name(om_object)
-                            #   family_name = self._extract_family_name(om_object)
-                            #   labels = self._extract_labels(om_object)
-                            #   gender = self._extract_gender(om_object)
-                            #   affiliation = self._extract_affiliation(om_object)
-                            # <<<
-                            result_part2 = OrderedDict(
-                                [
-                                    # SYSTEM
-                                    ("category", category3),
-                                    # BROADCAST
-                                    ("itemcode", itemcode),
-                                    ("title3", title3),
-                                    # RESPONDENT
-                                    # ("openmedia_id", openmedia_id),
-                                    # ("given_name", given_name),
-                                    # ("family_name", family_name),
-                                    # ("labels", labels),
-                                    # ("gender", gender),
-                                    # ("affiliation", affiliation),
-                                ]
+                    # [5] RADIO STORY
+                    elif (
+                        hr_record is not None
+                        and element.tag == "OM_OBJECT"
+                        and element.get("TemplateName") == "Radio Story"
+                    ):
+                        open_stories += 1
+
+                    continue
+
+                stack.pop()
+                parent = stack[-1] if stack else None
+
+                if element is hr_record:
+                    hr_record = None
+                elif element is rr_record:
+                    if hourly_rundown_object is None:
+                        logger.error("NEOBSAHUJE HOURLY RUNDOWN")
+                    rr_record = hourly_rundown_object = None
+                elif (
+                    radio_rundown is not None
+                    and parent is radio_rundown
+                    and not header_seen
+                ):
+                    # [0] => first node = header
+                    date, header_seen = self._extract_date(element), True
+                    continue
+                elif (
+                    hr_record is not None
+                    and element.tag == "OM_OBJECT"
+                    and element.get("TemplateName") == "Radio Story"
+                ):
+                    open_stories -= 1
+                    if open_stories > 0:
+                        continue  # Nested story is parsed with the outer one.
+
+                    # Keep the document order of nested stories.
+                    for obj in element.iter("OM_OBJECT"):
+                        if obj.get("TemplateName") == "Radio Story":
+                            yield from self._parse_story(
+                                obj,
+                                hr_record,
+                                xml=self._xml,
+                                rr_record_id=rr_record.attrib["RecordID"],
+                                date=date,
+                                hour_block=hour_block,
                             )
-                            result_parts2.append(result_part2)
+                else:
+                    continue
 
-                        results = (
-                            [result_part1 | rp2 for rp2 in result_parts2]
-                            if len(result_parts2)
-                            else [result_part1 | {"category3": None, "title3": None}]
-                        )
+                # Release the finished subtree.
+                element.clear()
+                parent.remove(element)
 
-                        for result in results:
-                            yield {
-                                k: str(v).strip()
-                                for k, v in result.items()
-                                if v is not None
-                            }
+            if radio_rundown is None:
+                return "RADIO RUNDOWN NOT FOUND"
 
         except Exception as ex:
             logger.error(ex)
             self._errors.append((str(), str(ex)))
             # raise ex
 
+    def _parse_story(
+        self,
+        obj: ET.Element,
+        hr_record: ET.Element,
+        *,
+        xml: XmlBackend,
+        rr_record_id: str,
+        date: Optional[str],
+        hour_block: Optional[str],
+    ) -> Generator[Row, None, None]:
+        """
+        Parse the Radio Story object and its hourly rundown record.
+
+        :returns: The generator of rows, one for each story record.
+        """
+        hr_record_fields = self._index_fields(hr_record)
+
+        title1 = str(hr_record_fields.get("8")).replace("=", "#").strip()
+        hr_record_id = hr_record.attrib["RecordID"]
+
+        duration = hr_record_fields.get("1026")
+        if duration is not None:
+            duration = decode_timespan(duration)  # minutes
+
+        header = self._index_fields(xml.header(obj))
+
+        format_code = header.get("321")
+        format_name = format_code_vs_name.get(format_code, "")
+
+        incode = header.get("5072")
+        itemcode = header.get("5082")
+        title2 = str(header.get("8")).replace("=", "#").strip()
+
+        target = header.get("5079")
+        if target is not None:
+            target = target.lower().strip()
+
+        station_id = header.get("5081")
+        author = header.get("6")
+        creator = header.get("5")
+
+        editorial = header.get("12")
+        if editorial is not None:
+            editorial = editorial.replace("-", "###").strip()
+
+        approved_station = header.get("5071")
+        approved_editorial = header.get("5070")
+        topic = header.get("5016")
+        since = header.get("1000")
+        till = header.get("1001")
+
+        with self._metrics.timer("decode"):
+            if since is not None:
+                since = decode_datetime(since).time()
+
+            if till is not None:
+                till = decode_datetime(till).time()
+
+        # The story values shared by all its records in the `table_columns`
+        # order between the `category` and the `title3` columns. The values
+        # are already stripped by the `_index_fields` method.
+        story = (
+            station_id,
+            date,
+            hour_block,
+            None if since is None else str(since),
+            None if till is None else str(till),
+            None if duration is None else str(duration),
+            format_name,
+            target,
+            itemcode,
+            incode,
+            topic,
+            creator,
+            author,
+            editorial,
+            approved_station,
+            approved_editorial,
+            title1,
+            title2,
+        )
+
+        if self._registry is not None:
+            self._register_respondents(obj, xml, station_id, date)
+
+        # [6] RECORDS in stories e.g. contact, audio etc. (may not be present)
+        if (rs_records := xml.records(obj)) == []:
+            yield Row(None, *story, None)
+
+        for rs_record in rs_records:
+            logger.debug(
+                f"Radio Rundown Record ID = {rr_record_id}, Hourly Rundown Record ID = {hr_record_id}, Radio Story Record ID {rs_record.attrib['RecordID']}"
+            )
+            rs_record_fields = self._index_fields(rs_record)
+
+            title3 = str(rs_record_fields.get("8")).replace("=", "#").strip()
+
+            category3 = rs_record_fields.get("5001")
+
+            if category3 is not None:
+                category3 = (
+                    category3.replace("Item", "").replace("Bin", "").strip().lower()
+                )
+
+            # The respondents of the Contact Item records are not in the rows,
+            # see the `respondents` method and the `Record.respondents`.
+            # They are recorded in the registry when given.
+            yield Row(category3, *story, title3)
+
+    def records(self, rundown: ET.ElementTree) -> Generator[Record, None, None]:
+        """
+        Create the domain records, one for each Radio Story of the rundown.
+
+        The respondents of the records are created when accessed.
+
+        :returns: The generator of records in document order.
+        """
+        xml = backend_of(rundown)
+
+        if (radio_rundown := xml.radio_rundown(rundown.getroot())) is None:
+            return
+
+        for rr_record in xml.records(radio_rundown):
+            if (hourly_rundown_object := xml.hourly_rundown(rr_record)) is None:
+                continue
+            for hr_record in xml.records(hourly_rundown_object):
+                for obj in xml.stories(hr_record):
+                    header = self._index_fields(xml.header(obj))
+                    since, till = header.get("1000"), header.get("1001")
+                    yield Record(
+                        None if since is None else decode_datetime(since).time(),
+                        None if till is None else decode_datetime(till).time(),
+                        itemcode=header.get("5082"),
+                        element=obj,
+                    )
+
+    def respondents(self, story: ET.Element) -> Generator[Respondent, None, None]:
+        """
+        Create the respondents of the Contact Item records of the Radio Story.
+
+        The contacts without the given or family name are skipped.
+        """
+        xml = backend_of(story)
+
+        for obj in xml.contact_items(story):
+            if (respondent := self._parse_respondent(obj, xml=xml)) is not None:
+                yield respondent
+
+    def _register_respondents(
+        self,
+        story: ET.Element,
+        xml: XmlBackend,
+        station_id: Optional[str],
+        date: Optional[str],
+    ) -> None:
+        """
+        Record the respondents of the Radio Story in the registry.
+
+        The respondent already registered is not created again.
+        """
+        for obj in xml.contact_items(story):
+            header = self._index_fields(xml.header(obj))
+            respondent = self._registry.get(header.get("5087"))
+            if respondent is None:
+                if (respondent := self._respondent_of(header)) is None:
+                    continue
+            self._registry.add(respondent, station_id, date)
+
+    def _parse_respondent(
+        self, obj: ET.Element, *, xml: XmlBackend
+    ) -> Optional[Respondent]:
+        """Parse the Contact Item object."""
+        return self._respondent_of(self._index_fields(xml.header(obj)))
+
+    def _respondent_of(self, header: Dict[str, Optional[str]]) -> Optional[Respondent]:
+        """Create the respondent from the Contact Item header fields."""
+        given_name, family_name = header.get("421"), header.get("422")
+        if not given_name or not family_name:
+            logger.warning(f"The contact {header.get('5087')} has no name.")
+            return None
+
+        # The labels are separated by the semicolon e.g. `lékařka; epidemioložka`.
+        labels = [label.strip() for label in (header.get("424") or "").split(";")]
+
+        return Respondent(
+            id=header.get("5087"),
+            name=Name(given_name, family_name),
+            labels=[label for label in labels if label],
+            affiliation=header.get("5015"),
+            gender=header.get("5088"),
+        )
+
+    def _index_fields(self, element: ET.Element) -> Dict[str, Optional[str]]:
+        """
+        Index the `<OM_FIELD>` children of the given node by the field ID
+        in a single pass e.g. from `<OM_FIELD FieldID="8"><OM_STRING>text
+        </OM_STRING></OM_FIELD>` get `{"8": "text"}`.
+
+        As with the `_extract_*` methods only the first field with the given
+        ID and a value node is used and the text is stripped.
+        """
+        fields = {}
+
+        for field in element:
+            if field.tag != "OM_FIELD" or len(field) == 0:
+                continue
+            if (field_id := field.get("FieldID")) not in fields:
+                text = field[0].text
+                fields[field_id] = text if text is None else text.strip()
+
+        return fields
+
     def _extract_text(self, element: ET.Element, xpath: str) -> Optional[str]:
         """
         Extract the text from the given XML node e.g
@@ -332,11 +581,7 @@ class RundownParser:
 
     def _extract_date(self, element) -> Optional[str]:
         text = self._extract_text(element, "./OM_FIELD[@FieldID='1000']/OM_DATETIME")
-        return (
-            text
-            if text is None
-            else str(datetime.datetime.strptime(text.split("T")[0], "%Y%m%d").date())
-        )
+        return text if text is None else str(decode_date(text))
 
     def _extract_since(self, element: ET.Element) -> Optional[str]:
         return self._extract_text(element, "./OM_FIELD[@FieldID='1000']/OM_DATETIME")
@@ -404,3 +649,185 @@ class RundownParser:
     # expertise
     # email
     # phone
+
+
+def parse_rundown_file(
+    path: Path,
+    stream: bool = False,
+    cache: Optional[ExtractCache] = None,
+    metrics: Optional[Metrics] = None,
+    backend: Optional[str] = None,
+    registry: Optional[RespondentRegistry] = None,
+) -> Tuple[List[tuple], Tuple[tuple, ...]]:
+    """
+    Parse the rundown XML file into the compact row batch.
+
+    The function is meant to be called in the worker process, so it returns
+    the rows as the `Row` tuples ordered by the `table_columns` (cheap to pickle)
+    together with the parser errors.
+
+    :param path: The rundown XML file path (see `open_rundown`).
+    :param stream: Parse the file incrementally with constant memory.
+    :param cache: The cache of already extracted rows.
+    :param metrics: The metrics of the parsing stages.
+    :param backend: The XML backend name (see `get_backend`).
+    :param registry: The registry of the respondents (filled in place).
+    :returns: The tuple of rows and errors.
+    """
+    metrics = NULL_METRICS if metrics is None else metrics
+    start = time.perf_counter()
+
+    if cache is not None:
+        with metrics.timer("cache"):
+            digest = source_digest(path)
+            entry = cache.load(digest)
+        # The entry stored without the respondents is parsed again for them.
+        if entry is not None and (registry is None or entry[1] is not None):
+            batch, respondents = entry
+            if registry is not None:
+                registry.merge(respondents)
+            metrics.count("cache_hits")
+            _count_file(metrics, path, batch, (), start)
+            return batch, ()
+
+    # The respondents of the file are cached together with its rows.
+    respondents = registry
+    if cache is not None and registry is not None:
+        respondents = RespondentRegistry()
+
+    parser = RundownParser(metrics, backend, respondents)
+
+    with open_rundown(path) as file:
+        if stream:
+            with metrics.timer("extract"):  # The parsing is a part of the extraction.
+                batch = list(parser.stream(file))
+        else:
+            with metrics.timer("parse"):
+                tree = get_backend(backend).parse(file)
+            with metrics.timer("extract"):
+                batch = list(parser(tree))
+
+    if cache is not None and not parser.errors:
+        with metrics.timer("cache"):
+            cache.put(digest, batch, respondents)
+    if respondents is not registry:
+        registry.merge(respondents)
+
+    _count_file(metrics, path, batch, parser.errors, start)
+
+    return batch, parser.errors
+
+
+def _count_file(
+    metrics: Metrics, path: Path, batch: List[tuple], errors: tuple, start: float
+) -> None:
+    if metrics.enabled:
+        metrics.count("files")
+        metrics.count("bytes", source_stat(path)[0])
+        metrics.count("rows", len(batch))
+        metrics.count("errors", len(errors))
+        metrics.observe(time.perf_counter() - start)
+
+
+class ExtractCache:
+    """
+    The on-disk cache of the extracted rows.
+
+    The rows of each rundown file are stored column by column in a pickle
+    file keyed by the file content hash and the parser version, so the
+    unchanged files are never parsed again. The respondents of the file are
+    stored with the rows when they were registered. The least recently used
+    entries are evicted when the cache exceeds the given size.
+
+    Don't share the cache directory with untrusted users, the entries are
+    loaded with `pickle`.
+
+    >>> cache = ExtractCache(Path(".cache"), max_size=2**30)
+    >>> batch, errors = parse_rundown_file(path, cache=cache)
+    >>> cache.evict()
+    """
+
+    def __init__(
+        self, directory: Path, version: str = PARSER_VERSION, max_size: int = 2**30
+    ) -> None:
+        self.directory = Path(directory)
+        self.version = version
+        self.max_size = max_size
+
+    def get(self, digest: str) -> Optional[List[Row]]:
+        """Load the rows for the given file content hash or `None` when missing."""
+        entry = self.load(digest)
+        return None if entry is None else entry[0]
+
+    def load(
+        self, digest: str
+    ) -> Optional[Tuple[List[Row], Optional[RespondentRegistry]]]:
+        """
+        Load the rows and the respondents (`None` when they were not stored)
+        for the given file content hash or `None` when missing.
+        """
+        path = self._path(digest)
+        try:
+            with open(path, mode="rb") as file:
+                columns, respondents = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.warning(f"Invalid cache entry {path}: {ex}")
+            return None
+
+        os.utime(path)  # Mark the entry as recently used.
+        batch = [Row._make(row) for row in zip(*columns)] if columns else []
+        return batch, respondents
+
+    def put(
+        self,
+        digest: str,
+        batch: List[tuple],
+        respondents: Optional[RespondentRegistry] = None,
+    ) -> None:
+        """Store the rows (and the respondents) for the given file content hash."""
+        path = self._path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        columns = [list(column) for column in zip(*batch)]
+
+        # Write the temporary file first, other workers may read the entry.
+        temp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp, mode="wb") as file:
+            pickle.dump((columns, respondents), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, path)
+
+    def evict(self) -> int:
+        """
+        Remove the least recently used entries (of any parser version)
+        until the cache fits into the maximal size.
+
+        :returns: The number of removed entries.
+        """
+        entries = [(path, path.stat()) for path in self.directory.glob("*/*/*.pickle")]
+        entries.sort(key=lambda entry: entry[1].st_mtime)
+
+        size, removed = sum(stat.st_size for _, stat in entries), 0
+        for path, stat in entries:
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size, removed = size - stat.st_size, removed + 1
+
+        return removed
+
+    def clear(self) -> int:
+        """
+        Remove all entries (invalidate the cache).
+
+        :returns: The number of removed entries.
+        """
+        removed = 0
+        for path in self.directory.glob("*/*/*.pickle"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / self.version / digest[:2] / f"{digest}.pickle"
@@ -4,24 +4,151 @@
 The module with command line program.
 """
 
-
 import argparse
+import csv
+import datetime as dt
+import os
 import sys
 import xml.etree.ElementTree as ET
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
 from pathlib import Path
+from typing import Generator
 
-import pandas as pd
 from dotenv import load_dotenv
 from loguru import logger
 from tqdm import tqdm
 
-from cro.rundown.sdk import RundownParser, table_columns
-from cro.rundown.sdk.helpers import flatten
+from cro.rundown.sdk import parse_rundown_file, table_columns
+from cro.rundown.sdk._domain import StationType
+from cro.rundown.sdk._extract import ExtractCache
+from cro.rundown.sdk._extract._postgres import PostgresSink
+from cro.rundown.sdk._extract._sinks import SINKS, open_sink
+from cro.rundown.sdk._index import RundownIndex, confirm_rundown_header
+from cro.rundown.sdk._metrics import (
+    NULL_METRICS,
+    Metrics,
+    collect_metrics,
+    write_metrics,
+)
+from cro.rundown.sdk._registry import RespondentRegistry
+
+
+def _parse_respondents(
+    path: Path,
+    stream: bool,
+    cache: ExtractCache | None,
+    metrics: Metrics | None = None,
+) -> tuple[list, tuple, RespondentRegistry]:
+    """Parse the file in the worker process and return its respondents too."""
+    registry = RespondentRegistry()
+    return (
+        *parse_rundown_file(path, stream, cache, metrics, registry=registry),
+        registry,
+    )
+
 
-STATION_NAMES = {
-    "nationwide": ("Plus", "Radiožurnál"),
-    "regional": ("Olomouc", "Pardubice"),
-}  # not complete
+def extract_files(
+    paths: list[Path],
+    workers: int = 1,
+    stream: bool = False,
+    cache: ExtractCache | None = None,
+    metrics: Metrics = NULL_METRICS,
+    registry: RespondentRegistry | None = None,
+) -> Generator[tuple[Path, list, tuple], None, None]:
+    """
+    Parse the given rundown files in the worker processes.
+    The rows of unchanged files are loaded from the cache when given.
+
+    Yields the path, rows and errors for each file in order of completion.
+    When the parsing of the file fails the exception is yielded instead of
+    rows so the other files are not affected. The metrics of the workers
+    are merged into the given metrics. The respondents are recorded in the
+    given registry, the registries of the workers are merged into it.
+
+    The files are submitted at most `2 * workers` ahead of the first file
+    not yet yielded, so neither the pending results nor the results waiting
+    to be written in order pile up behind the slow file.
+    """
+    if workers <= 1:
+        for path in paths:
+            try:
+                yield path, *parse_rundown_file(
+                    path, stream, cache, metrics, registry=registry
+                )
+            except Exception as ex:
+                yield path, ex, ()
+        return
+
+    def outcome(future):
+        if (exception := future.exception()) is not None:
+            return exception, ()
+        result = future.result()
+        if metrics.enabled:
+            result, worker_metrics = result
+            metrics.merge(worker_metrics)
+        if registry is not None:
+            *result, respondents = result
+            registry.merge(respondents)
+        return result
+
+    window = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        yielded = set()  # The yielded files after the first file not yielded.
+        first = 0
+        for index, path in enumerate(paths):
+            while index >= first + window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = pending.pop(future)
+                    yield paths[position], *outcome(future)
+                    yielded.add(position)
+                while first in yielded:
+                    yielded.remove(first)
+                    first += 1
+            arguments = (
+                parse_rundown_file if registry is None else _parse_respondents,
+                path,
+                stream,
+                cache,
+            )
+            future = (
+                executor.submit(collect_metrics, *arguments)
+                if metrics.enabled
+                else executor.submit(*arguments)
+            )
+            pending[future] = index
+
+        for future in as_completed(list(pending)):
+            yield paths[pending.pop(future)], *outcome(future)
+
+
+def write_respondents(registry: RespondentRegistry, path: Path) -> None:
+    """Write the respondent appearances to the CSV file."""
+    with open(path, mode="w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ["id", "given", "family", "labels", "affiliation", "gender"]
+            + ["station", "date"]
+        )
+        for respondent, station, date in registry.appearances():
+            writer.writerow(
+                [
+                    respondent.id,
+                    respondent.name.given,
+                    respondent.name.family,
+                    ";".join(respondent.labels),
+                    respondent.affiliation,
+                    respondent.gender,
+                    station,
+                    date,
+                ]
+            )
 
 
 def main():
@@ -32,18 +159,116 @@ def main():
 
     parser = argparse.ArgumentParser(description="The `cro.rundown.extract` program.")
 
-    parser.add_argument("-i", "--input", required=True, help="The import directory.")
-    parser.add_argument("-o", "--output", required=True, help="The export directory.")
+    parser.add_argument("-i", "--input", required=False, help="The import directory.")
+    parser.add_argument("-o", "--output", required=False, help="The export directory.")
     parser.add_argument(
         "-s",
         "--station",
         required=False,
-        help="The station type: nationwide | regional | all",
+        help=(
+            "The station type: nationwide | regional | all (default) "
+            "or the comma separated station names e.g. Plus,Brno."
+        ),
+    )
+    parser.add_argument(
+        "--since",
+        type=dt.date.fromisoformat,
+        help="The first rundown date e.g. 2022-04-01.",
+    )
+    parser.add_argument(
+        "--until",
+        type=dt.date.fromisoformat,
+        help="The last rundown date e.g. 2022-04-30.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse the files incrementally with constant memory.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of worker processes used to parse the files.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(SINKS),
+        default="xlsx",
+        help="The output file format (default: xlsx).",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        required=False,
+        default=os.getenv("RUNDOWN_EXTRACT_CACHE"),
+        help="The cache directory of extracted rows (env: RUNDOWN_EXTRACT_CACHE).",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="The maximal cache size in MB (default: 1024).",
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove all cached rows and exit.",
+    )
+    parser.add_argument(
+        "--database",
+        required=False,
+        default=os.getenv("RUNDOWN_DATABASE_URL"),
+        help="Load the rows of each file to the PostgreSQL database"
+        " (env: RUNDOWN_DATABASE_URL).",
+    )
+    parser.add_argument(
+        "--table",
+        default="rundown_rows",
+        help="The PostgreSQL table of the rows (default: rundown_rows).",
+    )
+    parser.add_argument(
+        "--respondents",
+        required=False,
+        help="Write the respondent appearances to the CSV file.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the stage timers and counters as JSON.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        required=False,
+        help="Write the stage timers and counters to the JSON file.",
     )
     parser.add_argument("--verbose", action="store_true")
 
     options = parser.parse_args()
 
+    metrics = (
+        Metrics()
+        if options.profile or options.metrics_out is not None
+        else NULL_METRICS
+    )
+
+    cache = (
+        None
+        if options.cache is None
+        else ExtractCache(Path(options.cache), max_size=options.cache_size * 2**20)
+    )
+
+    if options.clear_cache:
+        if cache is None:
+            parser.error("the --clear-cache option requires the cache directory")
+        logger.info(f"Removed {cache.clear()} cached files.")
+        sys.exit(0)
+
+    if options.input is None or options.output is None:
+        parser.error("the following arguments are required: -i/--input, -o/--output")
+
     # ################################################################### #
     # [1] Load XML files in the given path.                               #
     # ################################################################### #
@@ -62,66 +287,130 @@ def main():
         logger.info(f"RUNDOWN IMPORT PATH: {import_path}")
         logger.info(f"RUNDOWN EXPORT PATH: {export_path}")
 
-    # TODO
-    # if options.station is not None:
-    #     match options.station:
-    #         case "nationwide":
-    #             STATIONS = STATION_NAMES["nationwide"]
-    #         case "regional":
-    #             STATIONS = STATION_NAMES["regional"]
-    #         case _:
-    #             print("Station type not recognized, use 'nationwide' or 'regional'.")
-    #             sys.exit(1)
-    # else:
-    #     STATIONS = STATION_NAMES["nationwide"] + STATION_NAMES["regional"]
+    match options.station:
+        case None | "all":
+            stations, station_type = None, None
+        case "nationwide":
+            stations, station_type = None, StationType.NATIONWIDE
+        case "regional":
+            stations, station_type = None, StationType.REGIONAL
+        case _:
+            stations, station_type = options.station.split(","), None
 
-    parser = RundownParser()
+    result: dict[Path, list] = {}
 
-    result: dict[str, list] = {}
+    # The files are selected by the names, the unrecognized names are skipped.
+    with metrics.timer("index"):
+        index = RundownIndex.scan(import_path)
+    for path in index.unknown:
+        logger.warning(f"Skipped the file with unrecognized name: {path}")
+    metrics.count("skipped_files", len(index.unknown))
 
-    paths = (
-        p
-        for p in Path(import_path).glob("**/*.xml")
-        if p.is_file() and any(s in p.stem for s in STATION_NAMES)  # [HARD CODED]
-        # Use `any` vs `not any` for nationwide vs regional stations.
-    )
+    try:
+        files = index.select(options.since, options.until, stations, station_type)
+    except ValueError as ex:
+        parser.error(str(ex))
 
-    # ################################################################### #
-    # [2] Parse XML files.                                                #
-    # ################################################################### #
+    # The selected files are confirmed by the rundown header before the full
+    # extract. The broken files are left to the extract to report the error.
+    # The file whose header does not match its name fails.
     errors = []
-    for path in tqdm(paths):
-        try:
-            result[path.stem] = list(parser(ET.parse(path)))
-        except Exception as ex:
-            errors.append((path.stem, ex))
+    if (stations, station_type, options.since, options.until) != (None,) * 4:
+        with metrics.timer("header"):
+            confirmed = []
+            for file in files:
+                try:
+                    if not confirm_rundown_header(file):
+                        logger.error(f"The header does not match the name: {file.path}")
+                        errors.append(
+                            (
+                                file.path.stem,
+                                ValueError("The header does not match the file name."),
+                            )
+                        )
+                        continue
+                except ET.ParseError:
+                    pass
+                confirmed.append(file)
+        files = confirmed
+
+    logger.info(f"Selected {len(files)} of {len(index)} rundown files.")
+
+    paths = [file.path for file in files]
 
     # ################################################################### #
-    # [3] Write CSV/XLSX files.                                           #
+    # [2] Parse XML files and write the output file.                      #
     # ################################################################### #
-    df = pd.DataFrame([x for x in flatten(result.values()) if len(x) > 0])
-    df = df[table_columns]
+    registry = None if options.respondents is None else RespondentRegistry()
+    outcomes = extract_files(
+        paths,
+        workers=options.workers,
+        stream=options.stream,
+        cache=cache,
+        metrics=metrics,
+        registry=registry,
+    )
+
+    database = None
+    if options.database is not None:
+        database = PostgresSink(options.database, options.table)
+        database.create_table()
+
+    with (
+        metrics.timer("total"),
+        open_sink(options.format, export_path, table_columns) as sink,
+    ):
+        position = 0
+        for path, rows, parser_errors in tqdm(outcomes, total=len(paths)):
+            if isinstance(rows, Exception):
+                errors.append((path.stem, rows))
+                rows, complete = [], False
+            else:
+                errors.extend((path.stem, error) for error in parser_errors)
+                complete = not parser_errors
+            result[path] = rows, complete
+
+            # The output order is given by the file paths not by the worker
+            # scheduling, so write the finished files in order.
+            while position < len(paths) and paths[position] in result:
+                rows, complete = result.pop(paths[position])
+                with metrics.timer("write"):
+                    sink.write(rows)
+                # The incomplete rows would replace (delete) the loaded rows
+                # of the file's blocks, so the file with errors is not loaded.
+                if database is not None and complete:
+                    with metrics.timer("load"):
+                        database.load(rows)
+                position += 1
+
+        with metrics.timer("write"):
+            sink.close()  # The Excel file is written when closed.
+
+    if database is not None:
+        database.close()
+        logger.info(f"The {database.rows} rows were loaded to {options.table}.")
+
+    if registry is not None:
+        write_respondents(registry, Path(options.respondents))
+        logger.info(f"The {len(registry)} respondents were written.")
+
+    if cache is not None:
+        cache.evict()
+
+    if metrics.enabled:
+        metrics.count("failed_files", sum(isinstance(e, Exception) for _, e in errors))
+        write_metrics(metrics, options.metrics_out)
 
     print("---\n")
-    print(df.size)
-    print(date_min := df["date"].min())
-    print(date_max := df["date"].max())
+    print(sink.rows)
+    print(sink.date_min)
+    print(sink.date_max)
     print("\n---")
 
-    output_file_name = f"RUNDOWN_{date_min}_{date_max}.xlsx"
-    output_file_path = export_path / output_file_name
-
-    with pd.ExcelWriter(output_file_path) as writer:
-        df.to_excel(
-            writer,
-            sheet_name=f"RUNDOWN_{date_min}_{date_max}",
-            index=False,
-            header=True,
-        )
-    # TODO
-    # Save the file at least to the root folder.
-    # except IOError as ex:
-    #   logger.warning(f"The file was writen to {path}.")
+    if sink.path is None:
+        logger.warning("No rows were extracted, no output file was written.")
+    else:
+        logger.info(f"The rows were written to {sink.path}.")
 
     if len(errors) > 0:
         logger.error("FINISHED with FAILURE")
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+The decoders of the OpenMedia date, time and duration values.
+
+The OpenMedia export writes the `OM_DATETIME` values in the fixed format
+`20220404T104056,500` and the `OM_TIMESPAN` values in milliseconds. The
+decoders slice the fixed positions instead of calling `strptime` and fall
+back to `strptime` for any other text, so the result (and the error) is
+always the same as with `strptime`.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+
+__all__ = tuple(
+    [
+        "DATETIME_FORMAT",
+        "decode_date",
+        "decode_datetime",
+        "decode_timespan",
+    ]
+)
+
+DATETIME_FORMAT = "%Y%m%dT%H%M%S,%f"
+
+# The maximal length of the datetime text: 15 + 1 separator + 6 fraction digits.
+_DATETIME_LENGTH = 22
+
+
+def _is_fixed_datetime(text: str) -> bool:
+    return (
+        16 < len(text) <= _DATETIME_LENGTH
+        and text[8] == "T"
+        and text[15] == ","
+        and text[:8].isdigit()
+        and text[9:15].isdigit()
+        and text[16:].isdigit()
+        and text.isascii()
+    )
+
+
+def decode_datetime(text: str) -> dt.datetime:
+    """
+    Decode the `OM_DATETIME` value e.g. `20220404T104056,500`.
+
+    The fraction is left aligned as with the `%f` directive, so
+    the `,500` means 500 milliseconds.
+    """
+    if not _is_fixed_datetime(text):
+        return dt.datetime.strptime(text, DATETIME_FORMAT)
+
+    return dt.datetime(
+        int(text[0:4]),
+        int(text[4:6]),
+        int(text[6:8]),
+        int(text[9:11]),
+        int(text[11:13]),
+        int(text[13:15]),
+        int(text[16:].ljust(6, "0")),
+    )
+
+
+def decode_date(text: str) -> dt.date:
+    """Decode the date part of the `OM_DATETIME` value."""
+    date = text.split("T")[0]
+
+    if len(date) != 8 or not date.isdigit() or not date.isascii():
+        return dt.datetime.strptime(date, "%Y%m%d").date()
+
+    return dt.date(int(date[0:4]), int(date[4:6]), int(date[6:8]))
+
+
+def decode_timespan(text: str) -> int:
+    """Decode the `OM_TIMESPAN` value (milliseconds) to whole minutes rounded up."""
+    return -(-int(text) // 60000)
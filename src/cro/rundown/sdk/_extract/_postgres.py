@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+The PostgreSQL sink for the extracted rows.
+
+The rows of each rundown file are streamed to the staging table with the
+`COPY FROM STDIN` and upserted into the rows table by the natural key
+(station, date, block, itemcode, record) in one transaction, so the file
+is loaded again without duplicates. The `record` is the position of the
+row among the rows of the same story (the itemcode) in the file. The rows
+of the loaded blocks which are no longer in the file are deleted.
+
+    >>> with PostgresSink("postgresql://localhost/rundown") as sink:
+            sink.create_table()
+            sink.load(rows)
+
+The connections are taken from the small pool, so the files are loaded
+from several threads at once.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from cro.rundown.sdk._extract import table_columns
+
+__all__ = tuple(["KEY_COLUMNS", "PostgresSink", "copy_text"])
+
+KEY_COLUMNS = ("station", "date", "block", "itemcode", "record")
+
+# The rows of the loaded blocks are replaced by the rows of the file.
+BLOCK_COLUMNS = ("station", "date", "block")
+
+# The COPY text format escapes.
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_text(rows: Iterable[Sequence], columns: Sequence[str]) -> Iterator[str]:
+    """
+    Encode the rows as the COPY text format lines with the `record` column.
+
+    The key columns are not nullable, the missing key values are empty. The
+    keys are normalized before the records are counted, so the `None` and
+    the empty key are the same story (the upsert must not see one key twice).
+    """
+    key_indexes = {columns.index(name) for name in KEY_COLUMNS if name in columns}
+    story_index = [columns.index(name) for name in KEY_COLUMNS[:-1]]
+    records: dict[tuple, int] = {}
+
+    for row in rows:
+        row = [
+            "" if value is None and index in key_indexes else value
+            for index, value in enumerate(row)
+        ]
+        story = tuple(str(row[index]) for index in story_index)
+        record = records[story] = records.get(story, -1) + 1
+        values = [
+            "\\N" if value is None else str(value).translate(_ESCAPES) for value in row
+        ]
+        values.append(str(record))
+        yield "\t".join(values) + "\n"
+
+
+class _CopyStream:
+    """The file-like object which encodes the rows while they are copied."""
+
+    def __init__(self, lines: Iterator[str]) -> None:
+        self._lines = lines
+        self._buffer = ""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+            self.rows += 1
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class PostgresSink:
+    """
+    The PostgreSQL sink of the extracted rows.
+
+    :param dsn: The connection string e.g. `postgresql://user@host/db`.
+    :param table: The rows table name.
+    :param columns: The column names of the rows.
+    :param max_connections: The maximal number of the pooled connections.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        table: str = "rundown_rows",
+        columns: Sequence[str] = table_columns,
+        max_connections: int = 4,
+    ) -> None:
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.table = table
+        self.columns: List[str] = list(columns)
+        self.rows = 0
+        self._pool = ThreadedConnectionPool(1, max_connections, dsn)
+
+    def __enter__(self) -> PostgresSink:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self._pool.closed:
+            self._pool.closeall()
+
+    def _execute(self, statement, *args) -> None:
+        connection = self._pool.getconn()
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(statement, *args)
+        finally:
+            self._pool.putconn(connection)
+
+    def create_table(self) -> None:
+        """Create the rows table unless it exists."""
+        from psycopg2 import sql
+
+        key_columns = [name for name in KEY_COLUMNS if name in self.columns]
+        definitions = [
+            (
+                sql.SQL("{} text NOT NULL DEFAULT ''")
+                if name in key_columns
+                else sql.SQL("{} text")
+            ).format(sql.Identifier(name))
+            for name in self.columns
+        ]
+        self._execute(
+            sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {} ({}, {} integer NOT NULL,"
+                " PRIMARY KEY ({}))"
+            ).format(
+                sql.Identifier(self.table),
+                sql.SQL(", ").join(definitions),
+                sql.Identifier("record"),
+                _identifiers(KEY_COLUMNS),
+            )
+        )
+
+    def load(self, rows: Iterable[Sequence]) -> int:
+        """
+        Load the rows of one rundown file.
+
+        The rows must be all rows of the file (extracted without errors), the
+        rows of its blocks missing from the given rows are deleted.
+
+        :returns: The number of the loaded rows.
+        """
+        from psycopg2 import sql
+
+        columns = self.columns + ["record"]
+        table = sql.Identifier(self.table)
+        staging = sql.Identifier(f"{self.table}_staging")
+        names = _identifiers(columns)
+        keys = _identifiers(KEY_COLUMNS)
+        updates = sql.SQL(", ").join(
+            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(name))
+            for name in columns
+            if name not in KEY_COLUMNS
+        )
+        stream = _CopyStream(copy_text(rows, self.columns))
+
+        connection = self._pool.getconn()
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(
+                    sql.SQL(
+                        "CREATE TEMPORARY TABLE IF NOT EXISTS {}"
+                        " (LIKE {} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                    ).format(staging, table)
+                )
+                cursor.copy_expert(
+                    sql.SQL("COPY {} ({}) FROM STDIN").format(staging, names), stream
+                )
+                cursor.execute(
+                    sql.SQL(
+                        "INSERT INTO {0} ({1}) SELECT {1} FROM {2}"
+                        " ON CONFLICT ({3}) DO UPDATE SET {4}"
+                    ).format(table, names, staging, keys, updates)
+                )
+                # The rows removed from the file (e.g. the story was deleted).
+                cursor.execute(
+                    sql.SQL(
+                        "DELETE FROM {0} AS t USING (SELECT DISTINCT {1} FROM {2}) AS b"
+                        " WHERE ({3}) = ({4}) AND NOT EXISTS"
+                        " (SELECT 1 FROM {2} AS s WHERE ({5}) = ({6}))"
+                    ).format(
+                        table,
+                        _identifiers(BLOCK_COLUMNS),
+                        staging,
+                        _identifiers(BLOCK_COLUMNS, "t"),
+                        _identifiers(BLOCK_COLUMNS, "b"),
+                        _identifiers(KEY_COLUMNS, "s"),
+                        _identifiers(KEY_COLUMNS, "t"),
+                    )
+                )
+        finally:
+            self._pool.putconn(connection)
+
+        self.rows += stream.rows
+        return stream.rows
+
+
+def _identifiers(names: Iterable[str], alias: Optional[str] = None):
+    """The comma separated quoted column names (qualified by the table alias)."""
+    from psycopg2 import sql
+
+    prefix = () if alias is None else (alias,)
+    return sql.SQL(", ").join(sql.Identifier(*prefix, name) for name in names)
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+
+"""
+The output sinks for the extracted rows.
+
+Each sink writes the row batches incrementally to the output file, so the
+rows are written while the other files are still parsed. The output file
+is named by the date range of the written rows when the sink is closed
+(unless the name is given). The partial file is discarded when the sink
+is left with an exception.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence
+from uuid import uuid4
+
+from loguru import logger
+
+__all__ = tuple(
+    ["RowSink", "CsvSink", "ParquetSink", "ArrowSink", "ExcelSink", "open_sink"]
+)
+
+
+class RowSink:
+    """
+    The base class of the output sinks.
+
+    >>> with open_sink("csv", Path("."), table_columns) as sink:
+            sink.write(batch)
+    >>> sink.path
+    """
+
+    extension: str = ""
+
+    def __init__(
+        self, directory: Path, columns: Sequence[str], name: Optional[str] = None
+    ) -> None:
+        self.columns = list(columns)
+        self.directory = Path(directory)
+        self.name = name
+        # The final path known after closing (`None` when no rows were written).
+        self.path: Optional[Path] = None
+        self.rows = 0
+        self.date_min: Optional[str] = None
+        self.date_max: Optional[str] = None
+        self._date_index = self.columns.index("date") if "date" in columns else None
+        self._closed = False
+        # The unique name, the sinks of other threads may write to the directory.
+        self._partial_path = (
+            self.directory / f".RUNDOWN_{os.getpid()}_{uuid4().hex}.{self.extension}"
+        )
+        self._open(self._partial_path)
+
+    def __enter__(self) -> RowSink:
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is not None:
+            self.discard()
+        else:
+            self.close()
+
+    def write(self, batch: List[tuple]) -> None:
+        """Write the batch of rows ordered by the columns."""
+        if not batch:
+            return
+
+        if (index := self._date_index) is not None:
+            dates = [row[index] for row in batch if row[index] is not None]
+            if dates:
+                low, high = min(dates), max(dates)
+                if self.date_min is None or low < self.date_min:
+                    self.date_min = low
+                if self.date_max is None or high > self.date_max:
+                    self.date_max = high
+
+        self.rows += len(batch)
+        self._write(batch)
+
+    def close(self) -> None:
+        """Finish the output file and rename it by the date range or the name."""
+        if self._closed:
+            return
+        self._closed = True
+
+        self._close()
+
+        if self.rows == 0:
+            logger.warning("No rows were extracted, the output file is not written.")
+            self._partial_path.unlink(missing_ok=True)
+            return
+
+        name = self.name or f"RUNDOWN_{self.date_min}_{self.date_max}"
+        self.path = self.directory / f"{name}.{self.extension}"
+        os.replace(self._partial_path, self.path)
+
+    def discard(self) -> None:
+        """Remove the partial output file without renaming it."""
+        if self._closed:
+            return
+        self._closed = True
+
+        try:
+            self._close()
+        except Exception as ex:
+            logger.warning(f"The partial output file was not closed: {ex}")
+        self._partial_path.unlink(missing_ok=True)
+
+    def _open(self, path: Path) -> None:
+        raise NotImplementedError
+
+    def _write(self, batch: List[tuple]) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        raise NotImplementedError
+
+
+class CsvSink(RowSink):
+    """Write the rows to the CSV file."""
+
+    extension = "csv"
+
+    def _open(self, path: Path) -> None:
+        self._file = open(path, mode="w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def _write(self, batch: List[tuple]) -> None:
+        self._writer.writerows(batch)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class _ArrowSink(RowSink):
+    """
+    The base class of the sinks using the `pyarrow` package.
+
+    The rows are buffered and written in the record batches of the given size.
+    """
+
+    batch_size = 65536
+
+    def _open(self, path: Path) -> None:
+        try:
+            import pyarrow as pa
+        except ImportError as ex:
+            raise ImportError(
+                f"Install the `pyarrow` package to write {self.extension} files."
+            ) from ex
+
+        self._pa = pa
+        self._schema = pa.schema([(column, pa.string()) for column in self.columns])
+        self._buffer: List[tuple] = []
+        self._writer = self._open_writer(path)
+
+    def _write(self, batch: List[tuple]) -> None:
+        self._buffer.extend(batch)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        arrays = [
+            self._pa.array(column, type=self._pa.string())
+            for column in zip(*self._buffer)
+        ]
+        self._write_batch(self._pa.record_batch(arrays, schema=self._schema))
+        self._buffer = []
+
+    def _open_writer(self, path: Path):
+        raise NotImplementedError
+
+    def _write_batch(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+
+class ParquetSink(_ArrowSink):
+    """Write the rows to the Parquet file (one row group per record batch)."""
+
+    extension = "parquet"
+
+    def _open_writer(self, path: Path):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(path, self._schema)
+
+
+class ArrowSink(_ArrowSink):
+    """Write the rows to the Arrow IPC file."""
+
+    extension = "arrow"
+
+    def _open_writer(self, path: Path):
+        return self._pa.ipc.new_file(str(path), self._schema)
+
+
+class ExcelSink(RowSink):
+    """
+    Write the rows to the Excel file (write-only mode).
+
+    Excel sheet is limited to 1048576 rows including the header.
+    """
+
+    extension = "xlsx"
+    max_rows = 1048575
+
+    def _open(self, path: Path) -> None:
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(self.columns)
+
+    def write(self, batch: List[tuple]) -> None:
+        if self.rows + len(batch) > self.max_rows:
+            raise ValueError(
+                f"Excel sheet is limited to {self.max_rows} rows, use other format."
+            )
+        super().write(batch)
+
+    def _write(self, batch: List[tuple]) -> None:
+        for row in batch:
+            self._sheet.append(row)
+
+    def _close(self) -> None:
+        self._sheet.title = f"RUNDOWN_{self.date_min}_{self.date_max}"[:31]
+        self._workbook.save(self._partial_path)
+
+
+# The sinks by the output format name.
+SINKS: dict[str, type[RowSink]] = {
+    "xlsx": ExcelSink,
+    "csv": CsvSink,
+    "parquet": ParquetSink,
+    "arrow": ArrowSink,
+}
+
+
+def open_sink(
+    format: str, directory: Path, columns: Sequence[str], name: Optional[str] = None
+) -> RowSink:
+    """
+    Open the sink for the given output format e.g. `parquet`.
+
+    :param format: The output format name: xlsx | csv | parquet | arrow
+    :param directory: The output directory.
+    :param columns: The column names.
+    :param name: The output file name without the extension (default: by the
+        date range e.g. `RUNDOWN_2022-04-04_2022-04-10`).
+    """
+    if format not in SINKS:
+        raise ValueError(f"The output format must be one of {', '.join(SINKS)}.")
+    return SINKS[format](directory, columns, name)
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+"""
+The index of rundown files derived from the file names.
+
+The rundown file names carry the date, the hour block and the station, so
+the files can be selected without opening them. Both the OpenMedia export
+names and the cleansed names are recognized:
+
+    RR_10-12_Plus_20220404.xml           (export)
+    RUNDOWN_2022-04-04_10-12_N_Plus.xml  (cleansed)
+
+    >>> index = RundownIndex.scan(Path("data/source"))
+    >>> index.select(since=dt.date(2022, 4, 1), stations=["Plus"])
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import re
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from cro.rundown.sdk._archive import ARCHIVE_SUFFIX
+from cro.rundown.sdk._cleanse import STATION_NAME_TO_OBJECT
+from cro.rundown.sdk._domain import StationType
+from cro.rundown.sdk._extract._decode import decode_date
+from cro.rundown.sdk._source import archive_members, open_rundown, rundown_name
+
+__all__ = tuple(
+    [
+        "STATION_TITLES",
+        "RundownFile",
+        "RundownHeader",
+        "RundownIndex",
+        "parse_rundown_name",
+        "station_key",
+    ]
+)
+
+
+# The OpenMedia export name e.g. `RR_10-12_Plus_20220404`.
+EXPORT_NAME = re.compile(r"^RR_(\d{2})-(\d{2})_(.+?)_?(\d{4})(\d{2})(\d{2})$")
+
+# The cleansed name e.g. `RUNDOWN_2022-04-04_10-12_N_Plus`.
+CLEANSED_NAME = re.compile(
+    r"^RUNDOWN_(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})_([NR])_(.+)$"
+)
+
+
+def _station_names() -> dict[str, str]:
+    """Map the station name variants (lower case) to the station key."""
+    names = {}
+    for key, station in STATION_NAME_TO_OBJECT.items():
+        cleansed = station.name.replace("_", "-").replace("ČRo-", "")
+        for name in (key, cleansed, cleansed.replace("-", "_")):
+            names[name.lower()] = key
+    return names
+
+
+_STATION_NAMES = _station_names()
+
+
+def station_key(name: str) -> Optional[str]:
+    """
+    Get the station key of the `STATION_NAME_TO_OBJECT` from the station name
+    in the export name (`ČRo_Brno`), in the cleansed name (`Brno`) or typed by
+    the user (`brno`).
+    """
+    return _STATION_NAMES.get(name.strip().lower())
+
+
+class RundownFile(NamedTuple):
+    """The rundown file described by its name."""
+
+    date: dt.date
+    block: str  # The hour block e.g. `10-12`.
+    station: str  # The key of the `STATION_NAME_TO_OBJECT`.
+    type: StationType
+    path: Path
+    size: int
+
+
+def parse_rundown_name(
+    name: str,
+) -> Optional[Tuple[dt.date, str, str, StationType]]:
+    """
+    Parse the date, the hour block, the station key and the station type
+    from the rundown file name (with or without the suffix, compressed or not).
+
+    :returns: The parsed values or `None` when the name is not recognized.
+    """
+    name = rundown_name(name)
+    stem = name[:-4] if name.endswith(".xml") else name
+
+    if (match := EXPORT_NAME.match(stem)) is not None:
+        since, till, station, year, month, day = match.groups()
+        # The station may be followed by the description e.g. `Plus-Special`.
+        station = station.split("-")[0].strip("_")
+    elif (match := CLEANSED_NAME.match(stem)) is not None:
+        year, month, day, since, till, _, station = match.groups()
+    else:
+        return None
+
+    if (key := station_key(station)) is None:
+        return None
+
+    try:
+        date = dt.date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+    return date, f"{since}-{till}", key, STATION_NAME_TO_OBJECT[key].type
+
+
+def _scan(directory: str, suffix: str) -> Iterator[Tuple[Path, str, int]]:
+    """Yield the path, the rundown name and the size of the rundown files."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path, suffix)
+            elif not entry.is_file():
+                continue
+            elif entry.name.endswith(ARCHIVE_SUFFIX):
+                for member, size in archive_members(Path(entry.path)):
+                    if member.endswith(suffix):
+                        yield Path(entry.path, member), member.rsplit("/")[-1], size
+            elif (name := rundown_name(entry.name)).endswith(suffix):
+                yield Path(entry.path), name, entry.stat().st_size
+
+
+class RundownIndex:
+    """
+    The rundown files sorted by the date, the station and the hour block.
+
+    The files are selected by the date range with the binary search.
+    """
+
+    def __init__(
+        self, files: Iterable[RundownFile], unknown: Iterable[Path] = ()
+    ) -> None:
+        self._files = sorted(files, key=lambda f: (f.date, f.station, f.block, f.path))
+        self._dates = [file.date for file in self._files]
+        self.unknown: List[Path] = sorted(unknown)  # The unrecognized names.
+
+    @classmethod
+    def scan(cls, directory: Path, suffix: str = ".xml") -> RundownIndex:
+        """
+        Index the files in the directory and its subdirectories.
+
+        The compressed files and the members of the ZIP archives are indexed
+        too (see `open_rundown`). Each entry is stat-ed once (`os.scandir`)
+        and only the archive directories are read.
+        """
+        files, unknown = [], []
+        for path, name, size in _scan(str(directory), suffix):
+            if (values := parse_rundown_name(name)) is None:
+                unknown.append(path)
+            else:
+                files.append(RundownFile(*values, path, size))
+        return cls(files, unknown)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def __iter__(self) -> Iterator[RundownFile]:
+        return iter(self._files)
+
+    def select(
+        self,
+        since: Optional[dt.date] = None,
+        until: Optional[dt.date] = None,
+        stations: Optional[Iterable[str]] = None,
+        type: Optional[StationType] = None,
+    ) -> List[RundownFile]:
+        """
+        Select the files by the date range (inclusive), the station names
+        and the station type.
+
+        :raises ValueError: When the station name is not known.
+        """
+        low = 0 if since is None else bisect_left(self._dates, since)
+        high = len(self._files) if until is None else bisect_right(self._dates, until)
+        files = self._files[low:high]
+
+        if stations is not None:
+            keys = set()
+            for name in stations:
+                if (key := station_key(name)) is None:
+                    raise ValueError(f"The station {name} is not known.")
+                keys.add(key)
+            files = [file for file in files if file.station in keys]
+
+        if type is not None:
+            files = [file for file in files if file.type == type]
+
+        return files
+
+
+# The other names of the stations in the rundown titles (the station name
+# without the `ČRo_` prefix is always recognized) e.g. `06-09 Region SC`.
+STATION_TITLES: dict[str, Tuple[str, ...]] = {
+    "Radiožurnál": ("rž",),
+    "RŽ_Sport": ("radiožurnál sport",),
+    "ČRo_Region_SC": ("region", "středočeský kraj"),
+    "Radio_Prague_International": ("radio prague", "rpi"),
+}
+
+
+def _title_words(text: str) -> str:
+    return " ".join(text.lower().replace("_", " ").replace("-", " ").split())
+
+
+class RundownHeader(NamedTuple):
+    """The values of the Radio Rundown header."""
+
+    date: Optional[dt.date]  # The field 1000.
+    title: Optional[str]  # The field 8 e.g. `10-12 Plus - Mon, 04.04.2022`.
+    station: Optional[str]  # The OpenMedia station ID (field 5081) e.g. `11`.
+
+
+def read_rundown_header(path: Path) -> RundownHeader:
+    """
+    Read the date, the title and the station ID of the Radio Rundown header.
+
+    The header precedes the records, so only the first few kilobytes of the
+    file are parsed.
+
+    :raises ET.ParseError: When the file is not well-formed before the header end.
+    """
+    date = title = station = None
+    with open_rundown(path) as file:
+        for _, element in ET.iterparse(file):
+            if element.tag == "OM_HEADER":
+                if text := element.findtext("./OM_FIELD[@FieldID='1000']/OM_DATETIME"):
+                    date = decode_date(text)
+                title = element.findtext("./OM_FIELD[@FieldID='8']/OM_STRING")
+                if text := element.findtext("./OM_FIELD[@FieldID='5081']/OM_INT32"):
+                    station = text.strip()
+                break
+    return RundownHeader(date, title, station)
+
+
+def confirm_rundown_header(file: RundownFile) -> bool:
+    """
+    Confirm the date and the station parsed from the file name by the header.
+
+    The station is confirmed by the header station ID when the ID of the
+    station is known, otherwise by its name in the rundown title (see the
+    `STATION_TITLES`). The missing header values are not checked.
+
+    :raises ET.ParseError: When the file is not well-formed before the header end.
+    """
+    date, title, station_id = read_rundown_header(file.path)
+
+    if date is not None and date != file.date:
+        return False
+
+    station = STATION_NAME_TO_OBJECT[file.station]
+    if station_id is not None and station.id:
+        return station_id == str(station.id)
+
+    if title is not None:
+        names = (station.name.replace("ČRo_", ""),) + STATION_TITLES.get(
+            file.station, ()
+        )
+        title = f" {_title_words(title)} "
+        return any(f" {_title_words(name)} " in title for name in names)
+
+    return True
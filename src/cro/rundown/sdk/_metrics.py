@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+"""
+The stage timers and counters of the programs.
+
+The metrics are collected only when the `--profile` or `--metrics-out`
+option is given, otherwise the `NULL_METRICS` object is used and all calls
+are no-ops (the overhead is a method call per stage).
+
+    >>> metrics = Metrics()
+    >>> with metrics.timer("parse"):
+            tree = ET.parse(path)
+    >>> metrics.count("files")
+    >>> metrics.observe(0.25)  # The file latency in seconds.
+    >>> metrics.summary()
+
+The timers of the nested stages overlap e.g. the `decode` stage is a part of
+the `extract` stage. The timers of the worker processes are summed up, so
+they may exceed the `total` (wall clock) time.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+__all__ = tuple(["Metrics", "NULL_METRICS", "collect_metrics", "write_metrics"])
+
+# The upper bounds of the file latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+
+class _Timer:
+    __slots__ = ("_metrics", "_stage", "_start")
+
+    def __init__(self, metrics: Metrics, stage: str) -> None:
+        self._metrics = metrics
+        self._stage = stage
+
+    def __enter__(self) -> _Timer:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        timers = self._metrics.timers
+        timers[self._stage] = (
+            timers.get(self._stage, 0.0) + time.perf_counter() - self._start
+        )
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullTimer:
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+class Metrics:
+    """The stage timers, counters and file latencies."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.timers: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self.latencies: List[float] = []
+
+    def timer(self, stage: str) -> _Timer:
+        """Measure the time of the stage (the `with` block)."""
+        return _Timer(self, stage)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increase the counter by the value."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, seconds: float) -> None:
+        """Record the processing time of one file."""
+        self.latencies.append(seconds)
+
+    def merge(self, other: Optional[Metrics]) -> None:
+        """Add the metrics collected e.g. in the worker process."""
+        if other is None:
+            return
+        for stage, seconds in other.timers.items():
+            self.timers[stage] = self.timers.get(stage, 0.0) + seconds
+        for name, value in other.counters.items():
+            self.count(name, value)
+        self.latencies.extend(other.latencies)
+
+    def summary(self) -> dict:
+        """Return the metrics as the JSON serializable dictionary."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 6)
+
+        histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        for seconds in latencies:
+            histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+        return {
+            "timers_s": {
+                stage: round(seconds, 6) for stage, seconds in self.timers.items()
+            },
+            "counters": dict(self.counters),
+            "latency_s": {
+                "count": len(latencies),
+                "mean": (
+                    round(sum(latencies) / len(latencies), 6) if latencies else None
+                ),
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 6) if latencies else None,
+                "histogram": {
+                    f"<={bound}": count
+                    for bound, count in zip(LATENCY_BUCKETS, histogram)
+                }
+                | {f">{LATENCY_BUCKETS[-1]}": histogram[-1]},
+            },
+        }
+
+
+class _NullMetrics(Metrics):
+    """The metrics which collect nothing."""
+
+    enabled = False
+
+    _timer = _NullTimer()
+
+    def timer(self, stage: str) -> _NullTimer:
+        return self._timer
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def observe(self, seconds: float) -> None:
+        pass
+
+    def merge(self, other: Optional[Metrics]) -> None:
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+
+
+def collect_metrics(function: Callable, *args, **kwargs) -> Tuple[object, Metrics]:
+    """
+    Call the function with the new metrics and return the result and the metrics.
+
+    The function is meant to be called in the worker process, the returned
+    metrics are merged in the main process.
+    """
+    metrics = Metrics()
+    return function(*args, metrics=metrics, **kwargs), metrics
+
+
+def write_metrics(metrics: Metrics, path: Optional[Path] = None) -> None:
+    """Write the metrics summary as JSON to the given file or to the stderr."""
+    text = json.dumps(metrics.summary(), indent=2)
+    if path is None:
+        print(text, file=sys.stderr)
+    else:
+        Path(path).write_text(text, encoding="utf-8")
@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+
+"""
+The durable job queue of the rundown files backed by the SQLite database.
+
+The queue spreads the cleanse and extract work over the worker processes
+on one machine or on several machines sharing the export volume. The
+`ProcessRundownFile` commands are submitted once per rundown file name,
+so the file submitted again (e.g. by the other node) is not processed
+twice. The worker leases the jobs for the given seconds and completes or
+fails them; the job whose lease expired (e.g. the worker crashed) is
+leased again by another worker. The failed job is retried with the
+exponential backoff and moved to the dead letters after `max_attempts`.
+
+    >>> queue = JobQueue(Path("jobs.sqlite"))
+    >>> queue.submit(ProcessRundownFile("2022/W14/RR_10-12_Plus_20220404.xml", now))
+    >>> for job in queue.lease("node-1", count=4):
+            ...  # process the job
+            queue.complete(job)
+
+The database is written in the rollback journal mode (not WAL), so it is
+safe on the shared network volume with working file locks. Each lease is
+one short `BEGIN IMMEDIATE` transaction.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+
+from cro.rundown.sdk._message import ProcessRundownFile, RundownFileProcessed
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics
+
+__all__ = tuple(["Job", "JobQueue", "JobState", "commands", "work", "worker_name"])
+
+
+class JobState:
+    """The job states."""
+
+    READY = "ready"
+    LEASED = "leased"
+    DONE = "done"
+    DEAD = "dead"
+
+
+class Job(NamedTuple):
+    """The leased job."""
+
+    command: ProcessRundownFile
+    attempts: int  # The number of the leases including this one.
+    worker: str  # The worker which holds the lease.
+    lease_until: float
+
+    @property
+    def name(self) -> str:
+        return self.command.name
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    submitted_at REAL NOT NULL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_available ON jobs (state, available_at);
+"""
+
+
+def worker_name() -> str:
+    """The default worker name: the host name and the process id."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue:
+    """
+    The durable job queue.
+
+    :param path: The SQLite database file (created when missing).
+    :param lease: The seconds the job is leased to the worker.
+    :param max_attempts: The number of attempts before the job is dead.
+    :param retry_delay: The delay of the first retry (doubled on each retry).
+    :param clock: The current time in seconds (for testing).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        lease: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 30.0,
+        metrics: Optional[Metrics] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.lease_seconds = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._metrics = NULL_METRICS if metrics is None else metrics
+        self._clock = clock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The transactions are started explicitly (autocommit mode).
+        self._db = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=DELETE")
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> JobQueue:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def submit(self, command: ProcessRundownFile) -> bool:
+        """
+        Submit the command unless the job of the same file name exists.
+
+        :returns: Whether the job was added.
+        """
+        now = self._clock()
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO jobs (name, created_at, state, available_at,"
+            " submitted_at) VALUES (?, ?, ?, ?, ?)",
+            (command.name, command.created_at, JobState.READY, now, now),
+        )
+        added = cursor.rowcount == 1
+        self._metrics.count("submitted_jobs" if added else "duplicate_jobs")
+        return added
+
+    def submit_many(self, commands: List[ProcessRundownFile]) -> int:
+        """
+        Submit the commands in one transaction.
+
+        :returns: The number of the added jobs.
+        """
+        now = self._clock()
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (name, created_at, state, available_at,"
+                " submitted_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (command.name, command.created_at, JobState.READY, now, now)
+                    for command in commands
+                ],
+            )
+            added = self._db.total_changes - before
+        self._metrics.count("submitted_jobs", added)
+        self._metrics.count("duplicate_jobs", len(commands) - added)
+        return added
+
+    def lease(self, worker: Optional[str] = None, count: int = 1) -> List[Job]:
+        """
+        Lease the available jobs: the ready jobs and the jobs whose lease
+        expired. The expired job without the attempts left is dead.
+        """
+        worker = worker or worker_name()
+        now = self._clock()
+        lease_until = now + self.lease_seconds
+
+        with self._transaction():
+            self._db.execute(
+                "UPDATE jobs SET state = ?, worker = NULL, lease_until = NULL,"
+                " finished_at = ?, error = 'The lease expired.'"
+                " WHERE state = ? AND lease_until <= ? AND attempts >= ?",
+                (JobState.DEAD, now, JobState.LEASED, now, self.max_attempts),
+            )
+            rows = self._db.execute(
+                "SELECT name, created_at, attempts FROM jobs"
+                " WHERE (state = ? AND available_at <= ?)"
+                " OR (state = ? AND lease_until <= ?)"
+                " ORDER BY available_at, name LIMIT ?",
+                (JobState.READY, now, JobState.LEASED, now, count),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, worker = ?,"
+                " lease_until = ? WHERE name = ?",
+                [(JobState.LEASED, worker, lease_until, name) for name, *_ in rows],
+            )
+
+        self._metrics.count("leased_jobs", len(rows))
+        return [
+            Job(ProcessRundownFile(name, created_at), attempts + 1, worker, lease_until)
+            for name, created_at, attempts in rows
+        ]
+
+    def extend(self, job: Job) -> Optional[Job]:
+        """
+        Extend the lease of the long running job.
+
+        :returns: The job with the new lease or `None` when the lease was lost.
+        """
+        lease_until = self._clock() + self.lease_seconds
+        if not self._update(
+            job, "state = ?, lease_until = ?", (JobState.LEASED, lease_until)
+        ):
+            return None
+        return job._replace(lease_until=lease_until)
+
+    def complete(self, job: Job) -> Optional[RundownFileProcessed]:
+        """
+        Mark the job as done.
+
+        :returns: The event or `None` when the lease was lost (the job was
+            leased by another worker meanwhile).
+        """
+        now = self._clock()
+        if not self._update(
+            job,
+            "state = ?, worker = NULL, lease_until = NULL, finished_at = ?,"
+            " error = NULL",
+            (JobState.DONE, now),
+        ):
+            self._metrics.count("lost_jobs")
+            return None
+        self._metrics.count("completed_jobs")
+        return RundownFileProcessed(
+            job.name, dt.datetime.fromtimestamp(now).isoformat(timespec="milliseconds")
+        )
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Retry the failed job later or move it to the dead letters when there
+        is no attempt left.
+
+        :returns: Whether the job will be retried.
+        """
+        now = self._clock()
+        if job.attempts >= self.max_attempts:
+            updated = self._update(
+                job,
+                "state = ?, worker = NULL, lease_until = NULL, finished_at = ?,"
+                " error = ?",
+                (JobState.DEAD, now, error),
+            )
+            self._metrics.count("dead_jobs" if updated else "lost_jobs")
+            return False
+
+        delay = self.retry_delay * 2 ** (job.attempts - 1)
+        updated = self._update(
+            job,
+            "state = ?, worker = NULL, lease_until = NULL, available_at = ?,"
+            " error = ?",
+            (JobState.READY, now + delay, error),
+        )
+        self._metrics.count("retried_jobs" if updated else "lost_jobs")
+        return updated
+
+    def _update(self, job: Job, assignments: str, values: tuple) -> bool:
+        # Only the current lease holder updates the job.
+        cursor = self._db.execute(
+            f"UPDATE jobs SET {assignments}"
+            " WHERE name = ? AND state = ? AND worker = ? AND attempts = ?",
+            (*values, job.name, JobState.LEASED, job.worker, job.attempts),
+        )
+        return cursor.rowcount == 1
+
+    def dead_letters(self) -> List[Tuple[str, int, str]]:
+        """The dead jobs: the name, the attempts and the last error."""
+        return self._db.execute(
+            "SELECT name, attempts, error FROM jobs WHERE state = ? ORDER BY name",
+            (JobState.DEAD,),
+        ).fetchall()
+
+    def requeue(self, name: Optional[str] = None) -> int:
+        """
+        Move the dead job (or all dead jobs) back to the queue.
+
+        :returns: The number of the requeued jobs.
+        """
+        now = self._clock()
+        cursor = self._db.execute(
+            "UPDATE jobs SET state = ?, attempts = 0, available_at = ?,"
+            " finished_at = NULL WHERE state = ? AND (? IS NULL OR name = ?)",
+            (JobState.READY, now, JobState.DEAD, name, name),
+        )
+        return cursor.rowcount
+
+    def stats(self, window: float = 60.0) -> Dict[str, float]:
+        """
+        The number of the jobs by the state and the throughput: the jobs
+        completed per second in the last `window` seconds.
+        """
+        stats = {
+            state: 0
+            for state in (JobState.READY, JobState.LEASED, JobState.DONE, JobState.DEAD)
+        }
+        stats.update(
+            self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+        )
+        (completed,) = self._db.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = ? AND finished_at > ?",
+            (JobState.DONE, self._clock() - window),
+        ).fetchone()
+        stats["throughput"] = completed / window
+        return stats
+
+
+class _Transaction:
+    """The write transaction taking the database lock at the start."""
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self._db = db
+
+    def __enter__(self) -> None:
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *args) -> None:
+        self._db.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+
+
+def work(
+    queue: JobQueue,
+    source_dir: Path,
+    target_dir: Path,
+    process: Callable[[Path, Path], object],
+    worker: Optional[str] = None,
+    once: bool = False,
+    poll: float = 5.0,
+    batch: int = 1,
+    metrics: Optional[Metrics] = None,
+    should_stop: Callable[[], bool] = lambda: False,
+) -> Tuple[int, int]:
+    """
+    Lease and process the jobs until stopped.
+
+    :param process: The function called with the source file and the target
+        directory e.g. `process_rundown_file`.
+    :param once: Stop when there is no available job.
+    :param poll: The seconds to wait when there is no available job.
+    :param batch: The number of the jobs leased at once. The lease of each
+        job is extended when its processing starts, so the queue lease must
+        only be longer than the processing of one file.
+    :returns: The number of the completed and failed jobs.
+    """
+    metrics = NULL_METRICS if metrics is None else metrics
+    worker = worker or worker_name()
+    completed = failed = 0
+
+    while not should_stop():
+        jobs = queue.lease(worker, batch)
+        if not jobs:
+            if once:
+                break
+            time.sleep(poll)
+            continue
+
+        for job in jobs:
+            # The lease ran while the previous jobs of the batch were processed.
+            if (job := queue.extend(job)) is None:
+                metrics.count("lost_jobs")
+                continue
+            start = time.perf_counter()
+            try:
+                with metrics.timer("process"):
+                    process(source_dir / job.name, target_dir)
+            except Exception as ex:
+                logger.error(f"The job {job.name} failed: {ex}")
+                queue.fail(job, f"{type(ex).__name__}: {ex}")
+                metrics.count("failed_files")
+                failed += 1
+                continue
+            if queue.complete(job) is not None:
+                metrics.count("files")
+                metrics.observe(time.perf_counter() - start)
+                completed += 1
+
+    return completed, failed
+
+
+def commands(names: List[str]) -> List[ProcessRundownFile]:
+    """Create the commands for the rundown file names."""
+    created_at = dt.datetime.now().isoformat(timespec="milliseconds")
+    return [ProcessRundownFile(name, created_at) for name in names]
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from cro.rundown.sdk._extract._sinks import SINKS
+from cro.rundown.sdk._index import RundownIndex
+from cro.rundown.sdk._metrics import (
+    NULL_METRICS,
+    Metrics,
+    collect_metrics,
+    write_metrics,
+)
+from cro.rundown.sdk._queue import JobQueue, commands, work, worker_name
+from cro.rundown.sdk._shared import failure_msg, success_msg
+from cro.rundown.sdk._watch import process_rundown_file
+
+# The stop event of the worker process (see `_init_worker`).
+_stop_event = None
+
+
+def _stop_on_signals(event) -> None:
+    """Set the event on SIGINT or SIGTERM, so the workers finish their job and stop."""
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda signum, frame: event.set())
+
+
+def _init_worker(event) -> None:
+    """Initialize the worker process with the stop event of the main process."""
+    global _stop_event
+    _stop_event = event
+    _stop_on_signals(event)
+
+
+def run_worker(
+    database: Path,
+    source: Path,
+    target: Path,
+    format: str,
+    once: bool,
+    lease: float,
+    max_attempts: int,
+    index: int,
+    metrics=None,
+    should_stop=None,
+):
+    """Run the worker in the worker process with its own connection."""
+    if should_stop is None:
+        should_stop = (lambda: False) if _stop_event is None else _stop_event.is_set
+    with JobQueue(database, lease=lease, max_attempts=max_attempts) as queue:
+        return work(
+            queue,
+            source,
+            target,
+            partial(process_rundown_file, format=format),
+            worker=f"{worker_name()}-{index}",
+            once=once,
+            metrics=metrics,
+            should_stop=should_stop,
+        )
+
+
+def main() -> None:
+    """
+    Submit the rundown files to the durable job queue and process them.
+    """
+
+    load_dotenv()  # Take environment variables from `.env`.
+
+    parser = argparse.ArgumentParser(description="The `cro.rundown.queue` program.")
+
+    parser.add_argument(
+        "command",
+        choices=["submit", "work", "status", "requeue"],
+        help="Submit the files, process the jobs, print the queue status"
+        " or requeue the dead jobs.",
+    )
+    parser.add_argument(
+        "-d",
+        "--database",
+        default=os.getenv("RUNDOWN_QUEUE_PATH", "jobs.sqlite"),
+        help="The SQLite database of the queue (on the shared volume).",
+    )
+    parser.add_argument(
+        "-s",
+        "--source",
+        required=False,
+        help="The export directory of the rundown files.",
+    )
+    parser.add_argument(
+        "-t",
+        "--target",
+        default=".",
+        help="The directory of the cleansed and extracted files (default: .).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of worker processes on this machine.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(SINKS),
+        default="csv",
+        help="The output file format of the extracted rows (default: csv).",
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=300.0,
+        help="The seconds the job is leased to the worker (default: 300).",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="The number of attempts before the job is dead (default: 3).",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Stop the workers when there is no available job.",
+    )
+    parser.add_argument(
+        "--name",
+        required=False,
+        help="The name of the dead job to requeue (default: all dead jobs).",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the stage timers and counters as JSON.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        required=False,
+        help="Write the stage timers and counters to the JSON file.",
+    )
+
+    options = parser.parse_args()
+
+    metrics = (
+        Metrics()
+        if options.profile or options.metrics_out is not None
+        else NULL_METRICS
+    )
+
+    match options.source:
+        case None:
+            source = Path(os.getenv("RUNDOWN_EXPORT_PATH", "."))
+        case _:
+            source = Path(options.source)
+
+    database = Path(options.database)
+
+    match options.command:
+        case "submit":
+            index = RundownIndex.scan(source)
+            names = [
+                file.path.relative_to(source).as_posix() for file in index.select()
+            ]
+            with JobQueue(database, metrics=metrics) as queue:
+                added = queue.submit_many(commands(names))
+            print(success_msg(f"Jobs {added} of {len(names)} submitted"))
+
+        case "work":
+            worker = partial(
+                run_worker,
+                database,
+                source,
+                Path(options.target),
+                options.format,
+                options.once,
+                options.lease,
+                options.max_attempts,
+            )
+            # The workers finish their leased job and stop on SIGINT or SIGTERM.
+            stop = multiprocessing.Event()
+            handlers = {
+                signum: signal.getsignal(signum)
+                for signum in (signal.SIGINT, signal.SIGTERM)
+            }
+            _stop_on_signals(stop)
+            try:
+                with metrics.timer("total"):
+                    if options.workers <= 1:
+                        completed, failed = worker(
+                            0, metrics=metrics, should_stop=stop.is_set
+                        )
+                    else:
+                        with ProcessPoolExecutor(
+                            max_workers=options.workers,
+                            initializer=_init_worker,
+                            initargs=(stop,),
+                        ) as executor:
+                            futures = [
+                                (
+                                    executor.submit(collect_metrics, worker, index)
+                                    if metrics.enabled
+                                    else executor.submit(worker, index)
+                                )
+                                for index in range(options.workers)
+                            ]
+                            completed = failed = 0
+                            for future in futures:
+                                result = future.result()
+                                if metrics.enabled:
+                                    result, worker_metrics = result
+                                    metrics.merge(worker_metrics)
+                                completed += result[0]
+                                failed += result[1]
+            finally:
+                for signum, handler in handlers.items():
+                    signal.signal(signum, handler)
+
+            if metrics.enabled:
+                write_metrics(metrics, options.metrics_out)
+
+            if failed:
+                print(failure_msg(f"Jobs {failed} failed (see the status)"))
+                sys.exit(1)
+
+            print(success_msg(f"Jobs {completed} completed"))
+
+        case "status":
+            with JobQueue(database) as queue:
+                print(json.dumps(queue.stats(), indent=2))
+                for name, attempts, error in queue.dead_letters():
+                    print(f"DEAD {name} ({attempts} attempts) | {error}")
+
+        case "requeue":
+            with JobQueue(database) as queue:
+                requeued = queue.requeue(options.name)
+            if options.name is not None and requeued == 0:
+                print(failure_msg(f"Dead job {options.name} not found"))
+                sys.exit(1)
+            print(success_msg(f"Jobs {requeued} requeued"))
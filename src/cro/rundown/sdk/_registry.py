@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+The registry of the respondents appearing in the rundowns.
+
+The same respondents (the Contact Items with the OpenMedia ID) appear in
+thousands of rundowns. The registry keeps one `Respondent` (and one `Name`)
+instance for each ID and stores the appearances as the integer references
+in the compact arrays, so the memory grows with the number of the unique
+respondents and not with the number of the appearances.
+
+    >>> registry = RespondentRegistry()
+    >>> parser = RundownParser(registry=registry)
+    >>> rows = list(parser(tree))
+    >>> registry.appearances(respondent="CI-000123", since=dt.date(2022, 1, 1))
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import sys
+from array import array
+from dataclasses import replace
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Union
+
+from cro.rundown.sdk._domain import Name, Respondent, Rundown
+
+__all__ = tuple(["Appearance", "RespondentRegistry"])
+
+
+class Appearance(NamedTuple):
+    """The respondent appearance in the rundown."""
+
+    respondent: Respondent
+    station: Optional[str]
+    date: Optional[dt.date]
+
+
+def _key(respondent: Respondent) -> Hashable:
+    # The respondents without the OpenMedia ID are identified by the name.
+    return respondent.name if respondent.id is None else respondent.id
+
+
+class RespondentRegistry:
+    """
+    The registry of the interned respondents and their appearances.
+
+    The station is the OpenMedia station ID (e.g. `11`) or name as given.
+    """
+
+    def __init__(self) -> None:
+        self._respondents: List[Respondent] = []
+        self._index: Dict[Hashable, int] = {}
+        self._names: Dict[Name, Name] = {}
+        self._stations: List[Optional[str]] = []
+        self._station_index: Dict[Optional[str], int] = {}
+        # The appearances: the respondent index, the station index and the
+        # date ordinal (0 for the unknown date).
+        self._appearance_respondents = array("i")
+        self._appearance_stations = array("h")
+        self._appearance_dates = array("i")
+
+    def __len__(self) -> int:
+        """The number of the unique respondents."""
+        return len(self._respondents)
+
+    def __iter__(self) -> Iterator[Respondent]:
+        return iter(self._respondents)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._index
+
+    def get(self, id: Optional[str]) -> Optional[Respondent]:
+        """Get the respondent by the OpenMedia ID."""
+        index = self._index.get(id)
+        return None if index is None else self._respondents[index]
+
+    def intern(self, respondent: Respondent) -> Respondent:
+        """Get the registered instance of the respondent (register it when new)."""
+        key = _key(respondent)
+        if (index := self._index.get(key)) is not None:
+            return self._respondents[index]
+
+        name = self._names.setdefault(respondent.name, respondent.name)
+        respondent = replace(
+            respondent,
+            name=name,
+            labels=[sys.intern(label) for label in respondent.labels],
+            affiliation=(
+                respondent.affiliation
+                if respondent.affiliation is None
+                else sys.intern(respondent.affiliation)
+            ),
+        )
+        self._index[key] = len(self._respondents)
+        self._respondents.append(respondent)
+        return respondent
+
+    def add(
+        self,
+        respondent: Respondent,
+        station: Optional[str],
+        date: Union[dt.date, str, None],
+    ) -> Respondent:
+        """
+        Record the appearance of the respondent.
+
+        :param date: The rundown date (or the ISO date string).
+        :returns: The registered instance of the respondent.
+        """
+        respondent = self.intern(respondent)
+
+        if (station_index := self._station_index.get(station)) is None:
+            station_index = self._station_index[station] = len(self._stations)
+            self._stations.append(station)
+
+        if isinstance(date, str):
+            date = dt.date.fromisoformat(date)
+
+        self._appearance_respondents.append(self._index[_key(respondent)])
+        self._appearance_stations.append(station_index)
+        self._appearance_dates.append(0 if date is None else date.toordinal())
+        return respondent
+
+    def add_rundown(self, rundown: Rundown, station: Optional[str] = None) -> None:
+        """
+        Record the respondents of the rundown records.
+
+        :param station: The station (default: the rundown station name).
+        """
+        station = rundown.station.name if station is None else station
+        for record in rundown.records:
+            for respondent in record.respondents:
+                self.add(respondent, station, rundown.date)
+
+    def merge(self, other: RespondentRegistry) -> None:
+        """Add the respondents and appearances e.g. of the worker process."""
+        for index, station, date in zip(
+            other._appearance_respondents,
+            other._appearance_stations,
+            other._appearance_dates,
+        ):
+            self.add(
+                other._respondents[index],
+                other._stations[station],
+                None if date == 0 else dt.date.fromordinal(date),
+            )
+        for respondent in other._respondents:
+            self.intern(respondent)  # The respondents without appearances.
+
+    def appearances(
+        self,
+        respondent: Optional[str] = None,
+        station: Optional[str] = None,
+        since: Optional[dt.date] = None,
+        until: Optional[dt.date] = None,
+    ) -> Iterator[Appearance]:
+        """
+        Find the appearances in the order they were recorded.
+
+        :param respondent: The respondent OpenMedia ID.
+        :param station: The station.
+        :param since: The first date (inclusive).
+        :param until: The last date (inclusive).
+        """
+        if (
+            respondent is not None
+            and (respondent_index := self._index.get(respondent)) is None
+        ):
+            return
+        if (
+            station is not None
+            and (station_index := self._station_index.get(station)) is None
+        ):
+            return
+        first = 1 if since is None else since.toordinal()
+        last = sys.maxsize if until is None else until.toordinal()
+        dated = since is not None or until is not None
+
+        for index, station_at, date in zip(
+            self._appearance_respondents,
+            self._appearance_stations,
+            self._appearance_dates,
+        ):
+            if respondent is not None and index != respondent_index:
+                continue
+            if station is not None and station_at != station_index:
+                continue
+            if dated and not first <= date <= last:
+                continue
+            yield Appearance(
+                self._respondents[index],
+                self._stations[station_at],
+                None if date == 0 else dt.date.fromordinal(date),
+            )
+
+    def respondents(
+        self,
+        station: Optional[str] = None,
+        since: Optional[dt.date] = None,
+        until: Optional[dt.date] = None,
+    ) -> List[Respondent]:
+        """Find the unique respondents appearing on the station in the date range."""
+        seen: Dict[int, Respondent] = {}
+        for appearance in self.appearances(None, station, since, until):
+            seen.setdefault(id(appearance.respondent), appearance.respondent)
+        return list(seen.values())
+
+    def count(self, respondent: str) -> int:
+        """The number of the respondent appearances."""
+        if (index := self._index.get(respondent)) is None:
+            return 0
+        return self._appearance_respondents.count(index)
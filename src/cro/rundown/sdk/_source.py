@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+The rundown sources: the plain, compressed and archived rundown files.
+
+The rundown file is read from the plain XML file, the compressed XML file
+(`.xml.gz`, `.xml.xz`, `.xml.zst`) or the member of the ZIP archive e.g.
+the week archive created by the `cro.rundown.archive` program. The archive
+member is addressed by the path inside the archive file:
+
+    2022/W14.zip/RR_10-12_Plus_20220404.xml
+
+The content is decompressed while it is parsed, nothing is written to disk.
+
+    >>> with open_rundown(path) as file:
+            tree = ET.parse(file)
+
+The `.zst` files and the week archives require the `zstandard` package.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import gzip
+import hashlib
+import lzma
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Tuple
+
+from cro.rundown.sdk._archive import ARCHIVE_SUFFIX, RundownArchive, _zstd
+from cro.rundown.sdk.helpers import file_digest
+
+__all__ = tuple(
+    [
+        "COMPRESSION_SUFFIXES",
+        "archive_members",
+        "open_rundown",
+        "rundown_name",
+        "source_digest",
+        "source_stat",
+    ]
+)
+
+COMPRESSION_SUFFIXES = (".gz", ".xz", ".zst")
+
+
+def rundown_name(path: Path) -> str:
+    """
+    Get the rundown file name without the compression suffix
+    e.g. `RR_10-12_Plus_20220404.xml` for the `RR_10-12_Plus_20220404.xml.gz`.
+    """
+    name = Path(path).name
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def _archive(path: Path) -> Optional[Tuple[Path, str]]:
+    """
+    Get the archive and the member name of the archive member path
+    or `None` for the file.
+    """
+    for parent in path.parents:
+        if parent.suffix == ARCHIVE_SUFFIX and parent.is_file():
+            return parent, path.relative_to(parent).as_posix()
+    return None
+
+
+def archive_members(path: Path) -> Iterator[Tuple[str, int]]:
+    """List the rundown file names and their stored sizes in the ZIP archive."""
+    with RundownArchive(path) as archive:
+        for name in archive.names():
+            yield name, archive.getinfo(name).file_size
+
+
+@contextmanager
+def open_rundown(path: Path) -> Iterator[IO[bytes]]:
+    """
+    Open the rundown file for reading the decompressed XML content.
+
+    :param path: The plain, compressed or archived rundown file path.
+    """
+    path = Path(path)
+
+    if (member := _archive(path)) is not None:
+        with RundownArchive(member[0]) as archive, archive.open(member[1]) as file:
+            yield file
+        return
+
+    match path.suffix:
+        case ".gz":
+            file = gzip.open(path, "rb")
+        case ".xz":
+            file = lzma.open(path, "rb")
+        case ".zst":
+            # The file may consist of several frames e.g. when concatenated.
+            file = (
+                _zstd()
+                .ZstdDecompressor()
+                .stream_reader(open(path, "rb"), read_across_frames=True)
+            )
+        case _:
+            file = open(path, "rb")
+
+    with file:
+        yield file
+
+
+def source_stat(path: Path) -> Tuple[int, int]:
+    """
+    Get the size and the modification time (nanoseconds) of the rundown file.
+
+    The size is the stored (compressed) size of the file or archive member.
+    """
+    path = Path(path)
+
+    if (member := _archive(path)) is not None:
+        with RundownArchive(member[0]) as archive:
+            info = archive.getinfo(member[1])
+        mtime = dt.datetime(*info.date_time).timestamp()
+        return info.file_size, int(mtime * 10**9)
+
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def source_digest(path: Path, chunk_size: int = 2**20) -> str:
+    """
+    Compute the hex digest (BLAKE2b) of the rundown file.
+
+    The digest of the archive member is computed from its decompressed content.
+    """
+    path = Path(path)
+
+    if _archive(path) is None:
+        return file_digest(path, chunk_size)
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open_rundown(path) as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+
+"""
+The service which watches the export directory and processes the new
+rundown files as soon as they are exported.
+
+The watcher polls the export directory and emits the `ProcessRundownFile`
+command for each new or changed rundown file once the file is complete:
+its size and modification time did not change for the `settle` seconds,
+so the files still written by OpenMedia are not read. The commands are
+put into the bounded queue (the watcher waits when the queue is full) and
+the workers cleanse and extract the files in the process pool. The
+`RundownFileProcessed` event is published for each processed file.
+
+    >>> service = WatchService(Path("export"), Path("target"), workers=4)
+    >>> asyncio.run(service.run())
+
+The service stops when the `stop` method is called (e.g. on `SIGTERM`):
+no new commands are emitted, the queued commands are processed and then
+the workers are stopped.
+
+The processed files are recorded in the cleanse manifest, so the files
+are not processed again when the service is restarted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from cro.rundown.sdk._cleanse import (
+    CleanseManifest,
+    clean_rundown_content,
+    clean_rundown_name,
+)
+from cro.rundown.sdk._extract import RundownParser, table_columns
+from cro.rundown.sdk._extract._sinks import open_sink
+from cro.rundown.sdk._index import parse_rundown_name
+from cro.rundown.sdk._message import ProcessRundownFile, RundownFileProcessed
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics
+from cro.rundown.sdk._source import open_rundown, rundown_name
+from cro.rundown.sdk._xml import get_backend
+
+__all__ = tuple(
+    [
+        "MANIFEST_FILE_NAME",
+        "Debouncer",
+        "WatchService",
+        "process_rundown_file",
+    ]
+)
+
+MANIFEST_FILE_NAME = "watch-manifest.csv"
+
+# The published event handler: the plain or the async function.
+Publisher = Callable[[RundownFileProcessed], Union[None, Awaitable[None]]]
+
+
+def _now() -> str:
+    return dt.datetime.now().isoformat(timespec="milliseconds")
+
+
+def process_rundown_file(
+    source: Path, target_dir: Path, format: str = "csv", backend: Optional[str] = None
+) -> Tuple[Path, Path, int]:
+    """
+    Cleanse and extract the rundown file parsed once.
+
+    The cleansed file is written to the `cleansed/YEAR` folder and the rows
+    to the `extracted/YEAR` folder of the target directory, both named by the
+    cleansed name e.g. `RUNDOWN_2022-04-04_10-12_N_Plus`.
+
+    The function is meant to be called in the worker process.
+
+    :raises ValueError: When the rows are not extracted without errors.
+    :returns: The cleansed file path, the extracted file path and the rows count.
+    """
+    xml = get_backend(backend)
+    year, name = clean_rundown_name(Path(rundown_name(source)))
+
+    with open_rundown(source) as file:
+        tree = xml.parse(file)
+
+    # The rows are extracted before the tree is cleaned in place.
+    parser = RundownParser(backend=backend)
+    batch = list(parser(tree))
+    if parser.errors:
+        raise ValueError(f"The rows were not extracted: {parser.errors}")
+
+    cleansed = target_dir / "cleansed" / year / f"{name}.xml"
+    cleansed.parent.mkdir(parents=True, exist_ok=True)
+    tree = clean_rundown_content(tree, inplace=True)
+    # Written aside and renamed when complete (see `cleanse_rundown_file`).
+    partial = cleansed.with_name(f"{cleansed.name}.partial")
+    try:
+        with open(partial, mode="wb") as file:
+            xml.write(tree, file)
+        os.replace(partial, cleansed)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    extracted_dir = target_dir / "extracted" / year
+    extracted_dir.mkdir(parents=True, exist_ok=True)
+    with open_sink(format, extracted_dir, table_columns, name) as sink:
+        sink.write(batch)
+
+    return cleansed, sink.path, len(batch)
+
+
+class Debouncer:
+    """
+    Detect the complete files: the files with the same size and modification
+    time for the `settle` seconds.
+
+    Each complete file is returned once, then again only when it changes.
+    """
+
+    def __init__(self, settle: float = 2.0) -> None:
+        self.settle = settle
+        # The size, the modification time and the time since when they did
+        # not change (`None` when the file was already returned).
+        self._files: Dict[Path, Tuple[int, int, Optional[float]]] = {}
+
+    def __len__(self) -> int:
+        """The number of the incomplete files."""
+        return sum(since is not None for _, _, since in self._files.values())
+
+    def update(self, files: Dict[Path, Tuple[int, int]], now: float) -> List[Path]:
+        """
+        Update the files seen in the directory.
+
+        :param files: The size and the modification time (ns) by the path.
+        :param now: The monotonic time of the scan.
+        :returns: The files which became complete.
+        """
+        ready = []
+        for path, (size, mtime) in files.items():
+            seen = self._files.get(path)
+            if seen is None or seen[:2] != (size, mtime):
+                self._files[path] = (size, mtime, now)
+            elif seen[2] is not None and now - seen[2] >= self.settle:
+                self._files[path] = (size, mtime, None)
+                ready.append(path)
+        for path in self._files.keys() - files.keys():
+            del self._files[path]  # Removed or moved away.
+        return ready
+
+
+def _scan(directory: str) -> Iterator[os.DirEntry]:
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan(entry.path)
+            elif entry.is_file() and parse_rundown_name(entry.name) is not None:
+                yield entry
+
+
+class WatchService:
+    """
+    The watch-folder service.
+
+    :param source: The export directory.
+    :param target: The target directory of the cleansed and extracted files.
+    :param workers: The number of the worker processes.
+    :param queue_size: The maximal number of the waiting commands.
+    :param settle: The seconds the file must not change to be processed.
+    :param interval: The seconds between the directory scans.
+    :param format: The output format of the extracted rows.
+    :param publish: The handler of the published events.
+    :param once: Stop when all files present in the directory are processed.
+    """
+
+    def __init__(
+        self,
+        source: Path,
+        target: Path,
+        workers: int = 2,
+        queue_size: int = 64,
+        settle: float = 2.0,
+        interval: float = 1.0,
+        format: str = "csv",
+        publish: Optional[Publisher] = None,
+        once: bool = False,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.source = Path(source)
+        self.target = Path(target)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.interval = interval
+        self.format = format
+        self.once = once
+        self._debouncer = Debouncer(settle)
+        self._publish = publish
+        self._metrics = NULL_METRICS if metrics is None else metrics
+        self._stopping: Optional[asyncio.Event] = None
+        self._pending: set[Path] = set()  # The queued and processed files.
+        self.failures: List[Tuple[Path, Exception]] = []
+
+    def stop(self) -> None:
+        """Stop the service: process the queued files and exit."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run(self, executor: Optional[Executor] = None) -> None:
+        """
+        Run the service until stopped.
+
+        :param executor: The executor of the workers (default: the process pool).
+        """
+        self._stopping = asyncio.Event()
+        queue: asyncio.Queue[ProcessRundownFile] = asyncio.Queue(self.queue_size)
+
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        with CleanseManifest(
+            self.target / MANIFEST_FILE_NAME, self.source, self.target
+        ) as manifest:
+            workers = [
+                asyncio.create_task(self._work(queue, executor, manifest))
+                for _ in range(self.workers)
+            ]
+            try:
+                await self._watch(queue, manifest)
+                await queue.join()  # Drain the queued commands.
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if own_executor:
+                    executor.shutdown(wait=True)
+
+        logger.info("The watch service stopped.")
+
+    async def _watch(
+        self, queue: asyncio.Queue[ProcessRundownFile], manifest: CleanseManifest
+    ) -> None:
+        """Scan the directory and emit the commands until stopped."""
+        loop = asyncio.get_running_loop()
+
+        while not self._stopping.is_set():
+            with self._metrics.timer("scan"):
+                files = await loop.run_in_executor(None, self._stat_files)
+
+            for path in self._debouncer.update(files, time.monotonic()):
+                if path in self._pending:
+                    continue
+                # The changed file is hashed off the event loop.
+                if await asyncio.to_thread(manifest.__contains__, path):
+                    continue
+                self._pending.add(path)
+                command = ProcessRundownFile(
+                    path.relative_to(self.source).as_posix(), _now()
+                )
+                # Wait for the free slot in the queue (backpressure).
+                put = asyncio.ensure_future(queue.put(command))
+                stopping = asyncio.ensure_future(self._stopping.wait())
+                await asyncio.wait([put, stopping], return_when=asyncio.FIRST_COMPLETED)
+                stopping.cancel()
+                if not put.done():
+                    put.cancel()
+                    self._pending.discard(path)
+                    return
+                self._metrics.count("commands")
+
+            if self.once and len(self._debouncer) == 0:
+                return  # All files are queued or processed.
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _stat_files(self) -> Dict[Path, Tuple[int, int]]:
+        files = {}
+        for entry in _scan(str(self.source)):
+            stat = entry.stat()
+            files[Path(entry.path)] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    async def _work(
+        self,
+        queue: asyncio.Queue[ProcessRundownFile],
+        executor: Executor,
+        manifest: CleanseManifest,
+    ) -> None:
+        """Process the commands from the queue."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            command = await queue.get()
+            source = self.source / command.name
+            try:
+                with self._metrics.timer("process"):
+                    cleansed, _, rows = await loop.run_in_executor(
+                        executor,
+                        process_rundown_file,
+                        source,
+                        self.target,
+                        self.format,
+                    )
+                # The latency since the file was exported.
+                latency = time.time() - source.stat().st_mtime
+                await self._emit(RundownFileProcessed(command.name, _now()))
+                # Recorded only when published, so the event is not lost when
+                # the publisher fails (the file is processed again when changed
+                # or when the service restarts). Hashed off the event loop.
+                await asyncio.to_thread(manifest.add, source, cleansed)
+                self._metrics.count("files")
+                self._metrics.count("rows", rows)
+                self._metrics.observe(latency)
+            except Exception as ex:
+                # The worker keeps running, e.g. when the file was moved away
+                # or the publisher failed, so the queue is still drained.
+                logger.error(f"The rundown file {command.name} failed: {ex}")
+                self.failures.append((source, ex))
+                self._metrics.count("failed_files")
+            finally:
+                self._pending.discard(source)
+                queue.task_done()
+
+    async def _emit(self, event: RundownFileProcessed) -> None:
+        logger.info(f"Processed {event.name}")
+        if self._publish is not None:
+            if asyncio.iscoroutine(result := self._publish(event)):
+                await result
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from cro.rundown.sdk._extract._sinks import SINKS
+from cro.rundown.sdk._message import RundownFileProcessed
+from cro.rundown.sdk._metrics import NULL_METRICS, Metrics, write_metrics
+from cro.rundown.sdk._shared import failure_msg, success_msg
+from cro.rundown.sdk._watch import WatchService
+
+
+def main() -> None:
+    """
+    Watch the export directory and cleanse and extract the new rundown files.
+    """
+
+    load_dotenv()  # Take environment variables from `.env`.
+
+    parser = argparse.ArgumentParser(description="The `cro.rundown.watch` program.")
+
+    parser.add_argument(
+        "-s",
+        "--source",
+        required=False,
+        help="The export directory of the rundown files.",
+    )
+    parser.add_argument(
+        "-t",
+        "--target",
+        required=False,
+        help="The directory of the cleansed and extracted files (default: .).",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=2,
+        help="The number of worker processes used to process the files.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=list(SINKS),
+        default="csv",
+        help="The output file format of the extracted rows (default: csv).",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        help="The maximal number of the files waiting for the workers.",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="The seconds the file must not change to be processed (default: 2).",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="The seconds between the directory scans (default: 1).",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Process the files present in the directory and exit.",
+    )
+    parser.add_argument(
+        "--events",
+        required=False,
+        help="Append the processed file events to the JSON lines file.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the stage timers and counters as JSON.",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        required=False,
+        help="Write the stage timers and counters to the JSON file.",
+    )
+
+    options = parser.parse_args()
+
+    metrics = (
+        Metrics()
+        if options.profile or options.metrics_out is not None
+        else NULL_METRICS
+    )
+
+    match options.source:
+        case None:
+            source = Path(os.getenv("RUNDOWN_EXPORT_PATH", "."))
+        case _:
+            source = Path(options.source)
+
+    target = Path("." if options.target is None else options.target)
+
+    events = None if options.events is None else open(options.events, "a")
+
+    def publish(event: RundownFileProcessed) -> None:
+        print(f"PROCESSED {event.name}")
+        if events is not None:
+            events.write(json.dumps(asdict(event)) + "\n")
+            events.flush()
+
+    service = WatchService(
+        source,
+        target,
+        workers=options.workers,
+        queue_size=options.queue_size,
+        settle=options.settle,
+        interval=options.interval,
+        format=options.format,
+        publish=publish,
+        once=options.once,
+        metrics=metrics,
+    )
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, service.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported e.g. on Windows or outside the main thread.
+        await service.run()
+
+    try:
+        with metrics.timer("total"):
+            asyncio.run(run())
+    finally:
+        if events is not None:
+            events.close()
+
+    if metrics.enabled:
+        write_metrics(metrics, options.metrics_out)
+
+    if service.failures:
+        print(failure_msg(f"Rundowns {len(service.failures)} failed to process"))
+        for path, error in service.failures:
+            print(f"{path} | {error}")
+        sys.exit(1)
+
+    print(success_msg("Watch service stopped"))
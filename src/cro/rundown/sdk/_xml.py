@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+The XML backends of the rundown parser and cleanser.
+
+The `lxml` backend is used when the `lxml` package is installed, otherwise
+the `xml.etree.ElementTree` backend. Use the `RUNDOWN_XML_BACKEND`
+environment variable (`lxml` or `etree`) or the `backend` argument to choose
+the backend explicitly.
+
+The backend parses, serializes and queries the rundown trees. The queries
+are compiled once (`lxml.etree.XPath`) instead of parsing the path on each
+call. The extracted rows and the cleansed files are the same with both
+backends: the `lxml` output is written in the `ElementTree` format.
+
+    >>> xml = get_backend()
+    >>> tree = xml.parse(file)
+    >>> for story in xml.stories(record):
+            ...
+"""
+
+from __future__ import annotations
+
+import os
+import xml.etree.ElementTree as ET
+from typing import IO, Iterator, List, Optional, Tuple
+
+__all__ = tuple(["BACKENDS", "XmlBackend", "backend_of", "get_backend"])
+
+BACKENDS = ("lxml", "etree")
+
+# The element paths of the rundown objects.
+RADIO_RUNDOWN = "./OM_OBJECT[@TemplateName='Radio Rundown']"
+HOURLY_RUNDOWN = "./OM_OBJECT[@TemplateName='Hourly Rundown']"
+RADIO_STORY = ".//OM_OBJECT[@TemplateName='Radio Story']"
+RECORDS = "./OM_RECORD"
+HEADER = "./OM_HEADER"
+CONTACT_ITEMS = "./OM_RECORD/OM_OBJECT[@TemplateName='Contact Item']"
+
+
+class XmlBackend:
+    """The `xml.etree.ElementTree` backend."""
+
+    name = "etree"
+
+    def parse(self, source) -> ET.ElementTree:
+        """Parse the XML file name or binary file object."""
+        return ET.parse(source)
+
+    def iterparse(
+        self, source, events: Tuple[str, ...] = ("end",)
+    ) -> Iterator[Tuple[str, ET.Element]]:
+        """Parse the XML file incrementally."""
+        return ET.iterparse(source, events=events)
+
+    def write(self, tree: ET.ElementTree, file: IO[bytes]) -> None:
+        """Write the tree as UTF-8 without the XML declaration."""
+        tree.write(file, encoding="utf-8")
+
+    def radio_rundown(self, root: ET.Element) -> Optional[ET.Element]:
+        """Find the Radio Rundown object in the root."""
+        return root.find(RADIO_RUNDOWN)
+
+    def hourly_rundown(self, record: ET.Element) -> Optional[ET.Element]:
+        """Find the Hourly Rundown object in the record."""
+        return record.find(HOURLY_RUNDOWN)
+
+    def stories(self, record: ET.Element) -> List[ET.Element]:
+        """Find the Radio Story objects in the record (in document order)."""
+        return record.findall(RADIO_STORY)
+
+    def records(self, element: ET.Element) -> List[ET.Element]:
+        """Find the `OM_RECORD` children."""
+        return element.findall(RECORDS)
+
+    def header(self, element: ET.Element) -> Optional[ET.Element]:
+        """Find the `OM_HEADER` child."""
+        return element.find(HEADER)
+
+    def contact_items(self, story: ET.Element) -> List[ET.Element]:
+        """Find the Contact Item objects in the story records."""
+        return story.findall(CONTACT_ITEMS)
+
+
+class _LxmlBackend(XmlBackend):
+    """The `lxml` backend."""
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        from lxml import etree
+
+        self._etree = etree
+        # The comments and processing instructions are dropped as with the
+        # `ElementTree` parser.
+        self._parser = etree.XMLParser(
+            remove_comments=True, remove_pis=True, huge_tree=True
+        )
+        self._radio_rundown = etree.XPath(RADIO_RUNDOWN)
+        self._hourly_rundown = etree.XPath(HOURLY_RUNDOWN)
+        self._stories = etree.XPath(RADIO_STORY)
+        self._records = etree.XPath(RECORDS)
+        self._header = etree.XPath(HEADER)
+        self._contact_items = etree.XPath(CONTACT_ITEMS)
+
+    def parse(self, source):
+        return self._etree.parse(source, self._parser)
+
+    def iterparse(self, source, events=("end",)):
+        return self._etree.iterparse(
+            source, events=events, remove_comments=True, remove_pis=True, huge_tree=True
+        )
+
+    def write(self, tree, file):
+        data = self._etree.tostring(tree.getroot(), encoding="utf-8", with_tail=False)
+        if b"&#13;" in data:
+            # The carriage return in the text is written as is by `ElementTree`.
+            ET.ElementTree(ET.fromstring(data)).write(file, encoding="utf-8")
+            return
+        # The empty elements and the tabs in attributes as by `ElementTree`,
+        # the `/>` is not written in the text (the `>` is escaped).
+        file.write(data.replace(b"/>", b" />").replace(b"&#9;", b"&#09;"))
+
+    def radio_rundown(self, root):
+        return next(iter(self._radio_rundown(root)), None)
+
+    def hourly_rundown(self, record):
+        return next(iter(self._hourly_rundown(record)), None)
+
+    def stories(self, record):
+        return self._stories(record)
+
+    def records(self, element):
+        return self._records(element)
+
+    def header(self, element):
+        return next(iter(self._header(element)), None)
+
+    def contact_items(self, story):
+        return self._contact_items(story)
+
+
+_BACKENDS: dict[str, XmlBackend] = {}
+
+
+def get_backend(name: Optional[str] = None) -> XmlBackend:
+    """
+    Get the XML backend by the name (`lxml` or `etree`).
+
+    The `RUNDOWN_XML_BACKEND` environment variable is used when the name is
+    not given, then the `lxml` when it is installed.
+
+    :raises ValueError: When the backend is not known.
+    :raises ImportError: When the `lxml` backend is required but not installed.
+    """
+    name = name or os.getenv("RUNDOWN_XML_BACKEND")
+
+    if name is None:
+        try:
+            return get_backend("lxml")
+        except ImportError:
+            return get_backend("etree")
+
+    if name not in _BACKENDS:
+        match name:
+            case "lxml":
+                _BACKENDS[name] = _LxmlBackend()
+            case "etree":
+                _BACKENDS[name] = XmlBackend()
+            case _:
+                raise ValueError(
+                    f"The XML backend must be one of {', '.join(BACKENDS)}."
+                )
+
+    return _BACKENDS[name]
+
+
+def backend_of(tree) -> XmlBackend:
+    """Get the backend of the parsed tree or element."""
+    if isinstance(tree, (ET.ElementTree, ET.Element)):
+        return get_backend("etree")
+    return get_backend("lxml")
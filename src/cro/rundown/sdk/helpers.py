@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
 
 
-__all__ = tuple(["flatten"])
+import hashlib
+from pathlib import Path
+
+__all__ = tuple(["flatten", "file_digest"])
 
 
 def flatten(lst: list) -> list:
     """Flatten the given list."""
     return [item for sublist in lst for item in sublist]
+
+
+def file_digest(path: Path, chunk_size: int = 2**20) -> str:
+    """Compute the hex digest (BLAKE2b) of the given file content."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, mode="rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import datetime as dt
+import errno
+import os
+import shutil
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from cro.rundown.sdk._archive import (
+    RundownArchive,
+    archive_weeks,
+    train_dictionary,
+    week_directories,
+)
+from cro.rundown.sdk._archive.__main__ import main
+
+RUNDOWN_PATH = Path(__file__).parent.parent / "data" / "RR_10-12_Plus_20220404.xml"
+
+
+@pytest.fixture
+def weeks(tmp_path):
+    paths = []
+    for week, days in [("W14", range(4, 8)), ("W15", range(11, 13))]:
+        week_path = tmp_path / "source" / "2022" / week
+        week_path.mkdir(parents=True)
+        for day in days:
+            path = week_path / f"RR_10-12_Plus_202204{day:02d}.xml"
+            content = RUNDOWN_PATH.read_text(encoding="utf-8")
+            path.write_text(content.replace("04.04.2022", f"{day:02d}.04.2022"))
+            mtime = dt.datetime(2022, 4, day, 12).timestamp()
+            os.utime(path, (mtime, mtime))
+            paths.append(path)
+    (tmp_path / "source" / "2022" / "notes").mkdir()  # Not the week folder.
+    return paths
+
+
+def test_archive_week_directories(weeks, tmp_path):
+    assert week_directories(tmp_path / "source") == [
+        tmp_path / "source" / "2022" / "W14",
+        tmp_path / "source" / "2022" / "W15",
+    ]
+
+
+def test_archive_dictionary(weeks):
+    dictionary = train_dictionary(weeks * 20)
+
+    assert 0 < len(dictionary) <= 112_640
+    assert train_dictionary([]) == b""
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_archive_weeks(weeks, tmp_path, workers):
+    source, target = tmp_path / "source", tmp_path / "target"
+
+    results, failures = archive_weeks(source, target, workers=workers)
+
+    assert failures == []
+    assert [result.target for result in results] == [
+        target / "2022" / "W14.zip",
+        target / "2022" / "W15.zip",
+    ]
+    assert sum(result.files for result in results) == len(weeks)
+    assert all(result.compressed_size < result.size for result in results)
+
+    # The members are stored, so each one is read without the others.
+    with zipfile.ZipFile(target / "2022" / "W14.zip") as archive:
+        assert {info.compress_type for info in archive.infolist()} == {
+            zipfile.ZIP_STORED
+        }
+
+    with RundownArchive(target / "2022" / "W14.zip") as archive:
+        assert archive.names() == [path.name for path in weeks[:4]]
+        for path in weeks[:4]:
+            assert archive.read(path.name) == path.read_bytes()
+
+        extracted = archive.extract(weeks[1].name, tmp_path)
+        assert extracted.read_bytes() == weeks[1].read_bytes()
+        assert extracted.stat().st_mtime == weeks[1].stat().st_mtime
+
+    # The archived folders are skipped.
+    assert archive_weeks(source, target, workers=workers) == ([], [])
+
+
+def test_archive_weeks_failure(weeks, tmp_path, monkeypatch):
+    def writestr(self, info, data):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(zipfile.ZipFile, "writestr", writestr)
+    source, target = tmp_path / "source", tmp_path / "target"
+
+    results, failures = archive_weeks(source, target)
+
+    assert results == []
+    assert [week for week, _ in failures] == week_directories(source)
+    assert list((target / "2022").iterdir()) == []
+
+
+def test_archive_program(weeks, tmp_path, monkeypatch, capsys):
+    source, target = tmp_path / "source", tmp_path / "target"
+    argv = ["cro.rundown.archive", "-s", str(source), "-t", str(target)]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    main()
+    assert "SUCCESS: Folders 2 archived" in capsys.readouterr().out
+
+    shutil.rmtree(source)
+    name = weeks[-1].name
+    output = tmp_path / "output"
+    output.mkdir()
+    monkeypatch.setattr(sys, "argv", argv + ["-x", name, "-o", str(output)])
+
+    main()
+    assert (output / name).exists()
@@ -1,3 +1,143 @@
 # -*- coding: utf-8 -*-
 
+import datetime as dt
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+
 import pytest
+
+from cro.rundown.sdk import inspect, organize
+from cro.rundown.sdk._arrange import ArrangeJournal, _copy, plan
+from cro.rundown.sdk._arrange.__main__ import main
+from cro.rundown.sdk.helpers import file_digest
+
+
+@pytest.fixture
+def rundowns(tmp_path):
+    paths = []
+    for day in [dt.date(2022, 4, 3), dt.date(2022, 4, 4), dt.date(2022, 4, 10)]:
+        for hour in ["05-09", "09-12"]:
+            path = tmp_path / f"RR_{hour}_Plus_{day:%Y%m%d}.xml"
+            path.write_text("<OPENMEDIA/>")
+            mtime = dt.datetime.combine(day, dt.time(12)).timestamp()
+            os.utime(path, (mtime, mtime))
+            paths.append(path)
+    (tmp_path / "2021").mkdir()  # The directories are skipped.
+    return paths
+
+
+def test_arrange_inspect(rundowns, tmp_path):
+    result = inspect(tmp_path)
+
+    assert list(result) == [
+        dt.date(2022, 4, 3),
+        dt.date(2022, 4, 4),
+        dt.date(2022, 4, 10),
+    ]
+    assert sorted(path for paths in result.values() for path in paths) == sorted(
+        rundowns
+    )
+
+
+def test_arrange_plan(rundowns, tmp_path):
+    moves = plan(tmp_path, inspect(tmp_path))
+
+    assert list(moves) == [tmp_path / "2022" / "W13", tmp_path / "2022" / "W14"]
+    assert len(moves[tmp_path / "2022" / "W14"]) == 4
+    assert all(
+        target == week_path / source.name
+        for week_path, week_moves in moves.items()
+        for source, target in week_moves
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_arrange_organize(rundowns, tmp_path, workers):
+    failures = organize(tmp_path, inspect(tmp_path), workers=workers)
+
+    assert failures == []
+    assert not any(path.exists() for path in rundowns)
+    assert sorted(path.name for path in (tmp_path / "2022" / "W14").iterdir()) == [
+        "RR_05-09_Plus_20220404.xml",
+        "RR_05-09_Plus_20220410.xml",
+        "RR_09-12_Plus_20220404.xml",
+        "RR_09-12_Plus_20220410.xml",
+    ]
+
+
+def test_arrange_program_dry_run(rundowns, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["arrange", "-s", str(tmp_path), "--dry-run"])
+
+    main()
+
+    assert all(path.exists() for path in rundowns)
+    assert not (tmp_path / "2022").exists()
+    assert f"PLAN: {tmp_path / '2022' / 'W13'} (2 files)" in capsys.readouterr().out
+
+
+def test_arrange_cross_device(rundowns, tmp_path, monkeypatch):
+    def rename(self, target):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(Path, "rename", rename)
+    target = tmp_path / "target"
+    contents = {path.name: path.read_bytes() for path in rundowns}
+
+    with ArrangeJournal(target / "journal.csv") as journal:
+        failures = organize(
+            tmp_path, inspect(tmp_path), workers=4, target=target, journal=journal
+        )
+
+    assert failures == []
+    assert not any(path.exists() for path in rundowns)
+    week_path = target / "2022" / "W14"
+    assert {path.name: path.read_bytes() for path in week_path.iterdir()} == {
+        name: content for name, content in contents.items() if "0403" not in name
+    }
+    assert list(week_path.glob("*.partial")) == []
+
+    journal = ArrangeJournal(target / "journal.csv")
+    assert len(journal) == len(rundowns)
+    assert all(journal.get(path).state == "deleted" for path in rundowns)
+
+
+def test_arrange_journal_resume(rundowns, tmp_path):
+    with ArrangeJournal(tmp_path / "journal.csv") as journal:
+        # Copied and verified but not deleted in the interrupted run.
+        for source in rundowns[:2]:
+            target = tmp_path / f"{source.name}.copy"
+            shutil.copy2(source, target)
+            journal.record(
+                source, target, source.stat().st_size, file_digest(source), "verified"
+            )
+        (tmp_path / f"{rundowns[1].name}.copy").write_bytes(b"broken")
+
+        assert _copy(rundowns[0], tmp_path / f"{rundowns[0].name}.copy", journal) == 0
+        assert _copy(rundowns[1], tmp_path / f"{rundowns[1].name}.copy", journal) == 12
+
+    for source in rundowns[:2]:
+        assert not source.exists()
+        assert (tmp_path / f"{source.name}.copy").read_text() == "<OPENMEDIA/>"
+
+
+def test_arrange_copy_failure(rundowns, tmp_path, monkeypatch):
+    def fsync(fd):
+        raise OSError(errno.EIO, "Input/output error")
+
+    target = tmp_path / "target.xml"
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "fsync", fsync)
+        with pytest.raises(OSError, match="Input/output error"):
+            _copy(rundowns[0], target)
+    assert list(tmp_path.glob("*.partial")) == []
+
+    monkeypatch.setattr("cro.rundown.sdk._arrange.file_digest", lambda *_: "broken")
+    with pytest.raises(OSError, match="does not match"):
+        _copy(rundowns[0], target)
+
+    assert rundowns[0].exists()
+    assert not target.exists()
+    assert list(tmp_path.glob("*.partial")) == []
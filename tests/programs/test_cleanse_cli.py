@@ -1,3 +1,108 @@
 # -*- coding: utf-8 -*-
 
+import os
+import shutil
+import sys
+from pathlib import Path
+
 import pytest
+
+from cro.rundown.sdk._cleanse import CleanseManifest
+from cro.rundown.sdk._cleanse.__main__ import cleanse_files, main
+from cro.rundown.sdk._metrics import Metrics
+from cro.rundown.sdk._source import source_digest
+
+RUNDOWN_PATH = Path(__file__).parent.parent / "data" / "RR_10-12_Plus_20220404.xml"
+
+
+@pytest.fixture
+def rundowns(tmp_path):
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    paths = []
+    for day in range(4, 9):
+        path = source_dir / f"RR_10-12_Plus_2022040{day}.xml"
+        shutil.copy(RUNDOWN_PATH, path)
+        paths.append(path)
+    paths[-1].write_text("<OPENMEDIA>")  # The broken file.
+    return paths
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("stream", [False, True])
+def test_cleanse_files(rundowns, tmp_path, workers, stream):
+    target_dir = tmp_path / "target"
+
+    outcomes, digests = {}, {}
+    for source, target, digest in cleanse_files(rundowns, target_dir, workers, stream):
+        outcomes[source], digests[source] = target, digest
+
+    assert set(outcomes) == set(rundowns)
+    assert isinstance(outcomes.pop(rundowns[-1]), Exception)
+    assert digests.pop(rundowns[-1]) is None
+    assert all(digests[source] == source_digest(source) for source in digests)
+    assert sorted(target.name for target in outcomes.values()) == [
+        f"RUNDOWN_2022-04-0{day}_10-12_N_Plus.xml" for day in range(4, 8)
+    ]
+    assert all(target.parent == target_dir / "2022" for target in outcomes.values())
+    # The broken file leaves no (partial) target behind.
+    assert len(list((target_dir / "2022").iterdir())) == 4
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cleanse_metrics(rundowns, tmp_path, workers):
+    metrics = Metrics()
+
+    for _ in cleanse_files(rundowns, tmp_path / "target", workers, metrics=metrics):
+        pass
+
+    summary = metrics.summary()
+    assert summary["counters"]["files"] == 4
+    assert summary["latency_s"]["count"] == 4
+    assert {"parse", "clean", "write"} <= set(summary["timers_s"])
+
+
+def test_cleanse_manifest(rundowns, tmp_path):
+    sources, target_dir = rundowns[:-1], tmp_path / "target"
+
+    with CleanseManifest(
+        tmp_path / "manifest.csv", tmp_path / "source", target_dir
+    ) as manifest:
+        for source, target, digest in cleanse_files(sources[:2], target_dir):
+            manifest.add(source, target, digest)
+
+    # Resume the interrupted run.
+    manifest = CleanseManifest(
+        tmp_path / "manifest.csv", tmp_path / "source", target_dir
+    )
+    assert [source in manifest for source in sources] == [True, True, False, False]
+
+    # Touch the file without the content change.
+    os.utime(sources[0], ns=(0, 0))
+    assert sources[0] in manifest
+
+    # Change the file content.
+    sources[1].write_bytes(sources[1].read_bytes().replace(b"Kub", b"Kab"))
+    assert sources[1] not in manifest
+
+    # Remove the target file.
+    next(target_dir.glob("**/RUNDOWN_2022-04-04_*.xml")).unlink()
+    assert sources[0] not in manifest
+
+
+def test_cleanse_program_resume(rundowns, tmp_path, monkeypatch, capsys):
+    rundowns[-1].unlink()  # Remove the broken file.
+    argv = [
+        "cro.rundown.cleanse",
+        "-s",
+        str(tmp_path / "source"),
+        "-t",
+        str(tmp_path / "target"),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    main()
+    assert "PREPARE: Rundowns 4 (0 in manifest)" in capsys.readouterr().out
+
+    main()
+    assert "PREPARE: Rundowns 0 (4 in manifest)" in capsys.readouterr().out
@@ -1,3 +1,310 @@
 # -*- coding: utf-8 -*-
 
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
 import pytest
+
+from cro.rundown.sdk import parse_rundown_file, table_columns
+from cro.rundown.sdk._extract import ExtractCache
+from cro.rundown.sdk._extract.__main__ import extract_files, main
+from cro.rundown.sdk._extract._postgres import PostgresSink, copy_text
+from cro.rundown.sdk._extract._sinks import ExcelSink, open_sink
+from cro.rundown.sdk._metrics import Metrics
+from cro.rundown.sdk._registry import RespondentRegistry
+from cro.rundown.sdk._xml import get_backend
+from cro.rundown.sdk.helpers import file_digest
+
+RUNDOWN_PATH = Path(__file__).parent.parent / "data" / "RR_10-12_Plus_20220404.xml"
+
+
+@pytest.fixture
+def rundowns(tmp_path):
+    paths = []
+    for day in range(4, 8):
+        path = tmp_path / f"RR_10-12_Plus_2022040{day}.xml"
+        shutil.copy(RUNDOWN_PATH, path)
+        paths.append(path)
+    broken = tmp_path / "RR_10-12_Plus_20220408.xml"
+    broken.write_text("<OPENMEDIA>")
+    return paths + [broken]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_files(rundowns, workers):
+    outcomes = {
+        path: (rows, errors) for path, rows, errors in extract_files(rundowns, workers)
+    }
+
+    assert set(outcomes) == set(rundowns)
+    for path in rundowns[:-1]:
+        rows, errors = outcomes[path]
+        assert rows == parse_rundown_file(path)[0]
+        assert len(rows) == 5 and errors == ()
+    assert isinstance(outcomes[rundowns[-1]][0], Exception)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_metrics(rundowns, workers):
+    metrics = Metrics()
+
+    for _ in extract_files(rundowns, workers, metrics=metrics):
+        pass
+
+    summary = metrics.summary()
+    assert summary["counters"]["files"] == 4
+    assert summary["counters"]["rows"] == 20
+    assert summary["latency_s"]["count"] == 4
+    assert {"parse", "extract", "decode"} <= set(summary["timers_s"])
+
+
+def test_extract_cache(rundowns, tmp_path, monkeypatch):
+    cache = ExtractCache(tmp_path / "cache")
+    path = rundowns[0]
+
+    rows, errors = parse_rundown_file(path, cache=cache)
+    assert len(rows) == 5 and errors == ()
+
+    # The cached rows are loaded without parsing.
+    backend = type(get_backend())  # The default backend e.g. lxml.
+    monkeypatch.setattr(backend, "parse", lambda *args: pytest.fail("parsed again"))
+    assert parse_rundown_file(path, cache=cache) == (rows, ())
+    assert parse_rundown_file(rundowns[1], cache=cache) == (
+        rows,
+        (),
+    )  # The same content.
+    monkeypatch.undo()
+
+    # The cached rows are the rows not the plain tuples.
+    cached, _ = parse_rundown_file(path, cache=cache)
+    assert [row.itemcode for row in cached] == [row.itemcode for row in rows]
+
+    # The changed file is parsed again.
+    path.write_bytes(path.read_bytes().replace(b"PS5362007", b"PS0000000"))
+    changed, _ = parse_rundown_file(path, cache=cache)
+    assert changed != rows
+
+    assert ExtractCache(tmp_path / "cache", version="0").get(file_digest(path)) is None
+    assert ExtractCache(tmp_path / "cache", max_size=0).evict() == 2
+    assert cache.clear() == 0
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_respondents(rundowns, tmp_path, workers):
+    cache = ExtractCache(tmp_path / "cache")
+
+    # The second run loads the rows and the respondents from the cache.
+    for run in range(2):
+        registry, metrics = RespondentRegistry(), Metrics()
+        for _ in extract_files(
+            rundowns, workers, cache=cache, metrics=metrics, registry=registry
+        ):
+            pass
+        assert len(registry) == 2
+        assert registry.count("CI-000123") == 8  # Twice in each rundown.
+        assert registry.count("CI-000456") == 4
+    assert metrics.summary()["counters"]["cache_hits"] == 4
+
+    # The entry stored without the respondents is parsed again.
+    cache.put(file_digest(rundowns[0]), [])
+    registry = RespondentRegistry()
+    rows, _ = parse_rundown_file(rundowns[0], cache=cache, registry=registry)
+    assert len(rows) == 5 and registry.count("CI-000123") == 2
+
+
+@pytest.mark.parametrize("format", ["csv", "xlsx", "parquet", "arrow"])
+def test_extract_sinks(rundowns, tmp_path, format):
+    if format in ("parquet", "arrow"):
+        pytest.importorskip("pyarrow")
+
+    batches = [parse_rundown_file(path)[0] for path in rundowns[:2]]
+    batches[1] = [row[:2] + ("2022-04-05",) + row[3:] for row in batches[1]]
+
+    with open_sink(format, tmp_path, table_columns) as sink:
+        for batch in batches:
+            sink.write(batch)
+
+    assert sink.path == tmp_path / f"RUNDOWN_2022-04-04_2022-04-05.{format}"
+    assert list(tmp_path.glob(".RUNDOWN_*")) == []
+
+    match format:
+        case "csv":
+            df = pd.read_csv(sink.path, dtype=str, keep_default_na=False)
+        case "xlsx":
+            df = pd.read_excel(sink.path, dtype=str, keep_default_na=False)
+        case "parquet":
+            df = pd.read_parquet(sink.path)
+        case "arrow":
+            df = pd.read_feather(sink.path)
+
+    assert list(df.columns) == table_columns
+    assert len(df) == 10
+    assert df["itemcode"].tolist()[:3] == ["PS5362007", "PS5362007", "PS5362008"]
+
+
+@pytest.mark.parametrize("format", ["csv", "xlsx", "parquet", "arrow"])
+def test_extract_sinks_discard(rundowns, tmp_path, format):
+    if format in ("parquet", "arrow"):
+        pytest.importorskip("pyarrow")
+
+    with pytest.raises(RuntimeError):
+        with open_sink(format, tmp_path, table_columns) as sink:
+            sink.write(parse_rundown_file(rundowns[0])[0])
+            raise RuntimeError("The extraction failed.")
+
+    assert list(tmp_path.glob("*RUNDOWN_*")) == []
+
+
+def test_extract_sinks_empty_and_concurrent(rundowns, tmp_path):
+    batch = parse_rundown_file(rundowns[0])[0]
+
+    with open_sink("csv", tmp_path, table_columns) as empty:
+        pass
+    assert empty.path is None
+
+    # Two sinks of one process write to the same directory.
+    with open_sink("csv", tmp_path, table_columns, "first") as first:
+        with open_sink("csv", tmp_path, table_columns, "second") as second:
+            first.write(batch)
+            second.write(batch[:2])
+
+    assert len(pd.read_csv(first.path)) == 5 and len(pd.read_csv(second.path)) == 2
+    assert list(tmp_path.glob(".RUNDOWN_*")) == []
+
+
+def test_extract_excel_max_rows(rundowns, tmp_path, monkeypatch):
+    batch = parse_rundown_file(rundowns[0])[0]
+    monkeypatch.setattr(ExcelSink, "max_rows", 7)
+
+    with open_sink("xlsx", tmp_path, table_columns) as sink:
+        sink.write(batch)
+        with pytest.raises(ValueError):
+            sink.write(batch)
+
+    assert sink.rows == 5
+    assert len(pd.read_excel(sink.path)) == 5
+
+
+def test_extract_program_selection(rundowns, tmp_path, monkeypatch):
+    export_path = tmp_path / "export"
+    export_path.mkdir()
+    argv = ["cro.rundown.extract", "-i", str(tmp_path), "-o", str(export_path)]
+    # The file of 2022-04-05 has the header of 2022-04-04 (copied fixture).
+    argv += ["-f", "csv", "-s", "Plus,Brno", "--since", "2022-04-04"]
+    monkeypatch.setattr(sys, "argv", argv + ["--until", "2022-04-05"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()  # The file with other header fails.
+
+    assert exc_info.value.code == 1
+
+    df = pd.read_csv(
+        export_path / "RUNDOWN_2022-04-04_2022-04-04.csv",
+        dtype=str,
+        keep_default_na=False,
+    )
+    assert len(df) == len(parse_rundown_file(rundowns[0])[0])
+
+
+def test_extract_program_respondents(rundowns, tmp_path, monkeypatch):
+    export_path = tmp_path / "export"
+    export_path.mkdir()
+    respondents = tmp_path / "respondents.csv"
+    argv = ["cro.rundown.extract", "-i", str(tmp_path), "-o", str(export_path)]
+    argv += ["-f", "csv", "-w", "2"]
+    monkeypatch.setattr(sys, "argv", argv + ["--respondents", str(respondents)])
+
+    with pytest.raises(SystemExit):
+        main()  # The broken file fails.
+
+    df = pd.read_csv(respondents, dtype=str, keep_default_na=False)
+    assert df["id"].value_counts().to_dict() == {"CI-000123": 8, "CI-000456": 4}
+    assert set(df["station"]) == {"13"} and set(df["date"]) == {"2022-04-04"}
+
+
+def test_extract_program_unknown_station(rundowns, tmp_path, monkeypatch):
+    argv = ["cro.rundown.extract", "-i", str(tmp_path), "-o", str(tmp_path)]
+    monkeypatch.setattr(sys, "argv", argv + ["-s", "Unknown"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == 2
+
+
+def test_extract_copy_text():
+    columns = ["station", "date", "block", "itemcode", "title1"]
+    rows = [
+        ("11", "2022-04-04", "10:00-11:00", "PS1", "Tab\tand\\backslash"),
+        ("11", "2022-04-04", "10:00-11:00", "PS1", None),
+        ("11", "2022-04-04", "10:00-11:00", None, "Line\nbreak"),
+        ("11", "2022-04-04", "10:00-11:00", "", None),  # The same story as `None`.
+    ]
+
+    assert list(copy_text(rows, columns)) == [
+        "11\t2022-04-04\t10:00-11:00\tPS1\tTab\\tand\\\\backslash\t0\n",
+        "11\t2022-04-04\t10:00-11:00\tPS1\t\\N\t1\n",
+        "11\t2022-04-04\t10:00-11:00\t\tLine\\nbreak\t0\n",
+        "11\t2022-04-04\t10:00-11:00\t\t\\N\t1\n",
+    ]
+
+
+@pytest.mark.skipif(
+    "RUNDOWN_TEST_DATABASE_URL" not in os.environ,
+    reason="The RUNDOWN_TEST_DATABASE_URL of the local PostgreSQL is not set.",
+)
+def test_extract_postgres_sink():
+    import psycopg2
+
+    dsn = os.environ["RUNDOWN_TEST_DATABASE_URL"]
+    rows, _ = parse_rundown_file(RUNDOWN_PATH)
+
+    with PostgresSink(dsn, table="test_rundown_rows") as sink:
+        sink._execute("DROP TABLE IF EXISTS test_rundown_rows")
+        sink.create_table()
+        assert sink.load(rows) == len(rows)
+        assert sink.load(rows) == len(rows)  # Upserted, not duplicated.
+        sink.load(rows[:-1])  # The story removed from the file.
+
+    with psycopg2.connect(dsn) as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM test_rundown_rows")
+        assert cursor.fetchone() == (len(rows) - 1,)
+        cursor.execute("DROP TABLE test_rundown_rows")
+
+
+@pytest.mark.skipif(
+    "RUNDOWN_TEST_DATABASE_URL" not in os.environ,
+    reason="The RUNDOWN_TEST_DATABASE_URL of the local PostgreSQL is not set.",
+)
+def test_extract_program_database_errors(tmp_path, monkeypatch):
+    import psycopg2
+
+    dsn = os.environ["RUNDOWN_TEST_DATABASE_URL"]
+    source, export_path = tmp_path / "source", tmp_path / "export"
+    source.mkdir()
+    export_path.mkdir()
+    path = source / RUNDOWN_PATH.name
+    argv = ["cro.rundown.extract", "-i", str(source), "-o", str(export_path)]
+    argv += ["-f", "csv", "--database", dsn, "--table", "test_rundown_errors"]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    shutil.copy(RUNDOWN_PATH, path)
+    main()
+
+    # The third story is broken, the rows of its block extracted before it
+    # must not replace (delete) the loaded rows of the block.
+    content, start = path.read_bytes(), 0
+    for _ in range(3):
+        start = content.find(b'FieldID="1000"', start + 1)
+    start = content.find(b"<OM_DATETIME>", start) + len(b"<OM_DATETIME>")
+    path.write_bytes(content[:start] + b"X" + content[start + 1 :])
+    with pytest.raises(SystemExit):
+        main()
+
+    with psycopg2.connect(dsn) as connection, connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM test_rundown_errors")
+        assert cursor.fetchone() == (len(parse_rundown_file(RUNDOWN_PATH)[0]),)
+        cursor.execute("DROP TABLE test_rundown_errors")
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import signal
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from cro.rundown.sdk._message import ProcessRundownFile
+from cro.rundown.sdk._queue import JobQueue, JobState, work
+from cro.rundown.sdk._queue.__main__ import main
+
+RUNDOWN_PATH = Path(__file__).parent.parent / "data" / "RR_10-12_Plus_20220404.xml"
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    with JobQueue(
+        tmp_path / "jobs.sqlite", lease=10, max_attempts=2, retry_delay=5, clock=clock
+    ) as queue:
+        yield queue
+
+
+def command(name):
+    return ProcessRundownFile(name, "2022-04-04T12:00:00.000")
+
+
+def test_queue_submit_idempotent(queue):
+    assert queue.submit(command("a.xml"))
+    assert not queue.submit(command("a.xml"))
+    assert queue.submit_many([command("a.xml"), command("b.xml")]) == 1
+    assert queue.stats()[JobState.READY] == 2
+
+
+def test_queue_lease_and_complete(queue, tmp_path, clock):
+    queue.submit_many([command("a.xml"), command("b.xml")])
+
+    (job,) = queue.lease("node-1")
+    assert (job.name, job.attempts, job.worker) == ("a.xml", 1, "node-1")
+
+    # The other node (another connection to the same database).
+    with JobQueue(tmp_path / "jobs.sqlite", clock=clock) as other:
+        assert [job.name for job in other.lease("node-2", count=5)] == ["b.xml"]
+        assert other.lease("node-2") == []
+
+    event = queue.complete(job)
+    assert event.name == "a.xml"
+    assert queue.complete(job) is None  # Already completed.
+    assert queue.stats()[JobState.DONE] == 1
+    assert queue.stats(window=10)["throughput"] == 0.1
+
+
+def test_queue_expired_lease(queue, clock):
+    queue.submit(command("a.xml"))
+    (job,) = queue.lease("node-1")
+
+    clock.now += 11  # The worker crashed.
+    (again,) = queue.lease("node-2")
+    assert (again.worker, again.attempts) == ("node-2", 2)
+    assert queue.complete(job) is None  # The lease was lost.
+    assert queue.extend(again) is not None
+
+    clock.now += 20
+    assert queue.lease("node-3") == []  # No attempt left.
+    assert queue.dead_letters() == [("a.xml", 2, "The lease expired.")]
+
+
+def test_queue_retry_and_dead_letter(queue, clock):
+    queue.submit(command("a.xml"))
+
+    (job,) = queue.lease("node-1")
+    assert queue.fail(job, "ValueError: broken")
+    assert queue.lease("node-1") == []  # The retry is delayed.
+
+    clock.now += 5
+    (job,) = queue.lease("node-1")
+    assert not queue.fail(job, "ValueError: broken")
+    assert queue.dead_letters() == [("a.xml", 2, "ValueError: broken")]
+
+    assert queue.requeue("a.xml") == 1
+    assert [job.attempts for job in queue.lease("node-1")] == [1]
+
+
+def test_queue_work(queue, tmp_path):
+    queue.submit_many([command("a.xml"), command("b.xml")])
+
+    def process(source, target):
+        if source.name == "b.xml":
+            raise ValueError("broken")
+
+    assert work(queue, tmp_path, tmp_path, process, once=True) == (1, 1)
+    assert queue.stats()[JobState.DONE] == 1
+
+
+def test_queue_work_extends_batch_lease(queue, clock, tmp_path):
+    queue.submit_many([command("a.xml"), command("b.xml")])
+    stolen = []
+
+    def process(source, target):
+        clock.now += 8  # The lease is 10 seconds, the batch takes 16.
+        with JobQueue(queue.path, lease=10, clock=clock) as other:
+            stolen.extend(other.lease("other", count=2))
+
+    assert work(queue, tmp_path, tmp_path, process, once=True, batch=2) == (2, 0)
+    assert stolen == []
+    assert queue.stats()[JobState.DONE] == 2
+
+
+def test_queue_program(tmp_path, monkeypatch, capsys):
+    source, target = tmp_path / "export", tmp_path / "target"
+    (source / "W14").mkdir(parents=True)
+    shutil.copy(RUNDOWN_PATH, source / "W14" / RUNDOWN_PATH.name)
+    argv = ["cro.rundown.queue", "-d", str(tmp_path / "jobs.sqlite")]
+    argv += ["-s", str(source), "-t", str(target)]
+
+    for command, expected in [
+        ("submit", "SUCCESS: Jobs 1 of 1 submitted"),
+        ("submit", "SUCCESS: Jobs 0 of 1 submitted"),
+        ("work", "SUCCESS: Jobs 1 completed"),
+    ]:
+        monkeypatch.setattr(sys, "argv", argv + [command, "--once"])
+        main()
+        assert expected in capsys.readouterr().out
+
+    assert (target / "cleansed" / "2022").is_dir()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_queue_program_stop_signal(tmp_path, monkeypatch, capsys, workers):
+    source, database = tmp_path / "export", tmp_path / "jobs.sqlite"
+    (source / "W14").mkdir(parents=True)
+    for day in range(4, 8):
+        shutil.copy(RUNDOWN_PATH, source / "W14" / f"RR_10-12_Plus_2022040{day}.xml")
+    argv = ["cro.rundown.queue", "-d", str(database), "-s", str(source)]
+    monkeypatch.setattr(sys, "argv", argv + ["submit"])
+    main()
+
+    main_pid = os.getpid()
+
+    def process(path, target, format):
+        # As the `docker stop` the main process gets SIGTERM during the job.
+        os.kill(main_pid, signal.SIGTERM)
+        time.sleep(0.5)
+
+    monkeypatch.setattr("cro.rundown.sdk._queue.__main__.process_rundown_file", process)
+    monkeypatch.setattr(sys, "argv", argv + ["work", "-w", str(workers)])
+    main()  # Without `--once` the workers stop only on the signal.
+
+    # Each worker finishes at most its leased job, the other jobs stay ready.
+    with JobQueue(database) as queue:
+        stats = queue.stats()
+    assert 1 <= stats[JobState.DONE] <= workers
+    assert stats[JobState.READY] == 4 - stats[JobState.DONE]
+    assert f"Jobs {stats[JobState.DONE]} completed" in capsys.readouterr().out
+    assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
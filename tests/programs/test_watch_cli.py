@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cro.rundown.sdk._watch import Debouncer, WatchService, process_rundown_file
+from cro.rundown.sdk._watch.__main__ import main
+
+RUNDOWN_PATH = Path(__file__).parent.parent / "data" / "RR_10-12_Plus_20220404.xml"
+
+
+def test_watch_debouncer():
+    debouncer = Debouncer(settle=2.0)
+    path = Path("RR_10-12_Plus_20220404.xml")
+
+    assert debouncer.update({path: (10, 1)}, now=0.0) == []
+    assert debouncer.update({path: (20, 2)}, now=1.0) == []  # Still written.
+    assert debouncer.update({path: (20, 2)}, now=2.0) == []
+    assert len(debouncer) == 1
+    assert debouncer.update({path: (20, 2)}, now=3.0) == [path]
+    assert debouncer.update({path: (20, 2)}, now=9.0) == []  # Returned once.
+    assert len(debouncer) == 0
+
+    # The changed file is returned again.
+    assert debouncer.update({path: (30, 3)}, now=10.0) == []
+    assert debouncer.update({path: (30, 3)}, now=12.0) == [path]
+
+    assert debouncer.update({}, now=13.0) == []
+    assert len(debouncer) == 0
+
+
+def test_watch_process_rundown_file(tmp_path):
+    cleansed, extracted, rows = process_rundown_file(RUNDOWN_PATH, tmp_path)
+
+    assert cleansed == tmp_path / "cleansed" / "2022" / (
+        "RUNDOWN_2022-04-04_10-12_N_Plus.xml"
+    )
+    assert extracted == tmp_path / "extracted" / "2022" / (
+        "RUNDOWN_2022-04-04_10-12_N_Plus.csv"
+    )
+    assert rows > 0
+    assert len(extracted.read_text(encoding="utf-8").splitlines()) == rows + 1
+
+
+def test_watch_service(tmp_path):
+    source, target = tmp_path / "export", tmp_path / "target"
+    (source / "W14").mkdir(parents=True)
+    shutil.copy(RUNDOWN_PATH, source / "W14" / RUNDOWN_PATH.name)
+    (source / "notes.txt").write_text("Not the rundown file.")
+
+    events = []
+
+    async def run(service):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            await service.run(executor)
+
+    service = WatchService(
+        source, target, settle=0.05, interval=0.01, publish=events.append, once=True
+    )
+    asyncio.run(run(service))
+
+    assert service.failures == []
+    assert [event.name for event in events] == [f"W14/{RUNDOWN_PATH.name}"]
+    assert (target / "cleansed" / "2022").is_dir()
+
+    # The processed files are skipped when the service is restarted.
+    events.clear()
+    asyncio.run(run(service))
+    assert events == []
+
+
+def test_watch_service_publisher_fails(tmp_path):
+    source, target = tmp_path / "export", tmp_path / "target"
+    source.mkdir()
+    shutil.copy(RUNDOWN_PATH, source / RUNDOWN_PATH.name)
+
+    def publish(event):
+        raise RuntimeError("The broker is down.")
+
+    async def run(service):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            await asyncio.wait_for(service.run(executor), 10)
+
+    service = WatchService(
+        source,
+        target,
+        workers=1,
+        settle=0.05,
+        interval=0.01,
+        publish=publish,
+        once=True,
+    )
+    asyncio.run(run(service))
+
+    # The failure is recorded and the service is not stuck on the queue.
+    [(path, ex)] = service.failures
+    assert path == source / RUNDOWN_PATH.name
+    assert isinstance(ex, RuntimeError)
+
+    # The file is not recorded, so the event is published on the restart.
+    events = []
+    service = WatchService(
+        source,
+        target,
+        workers=1,
+        settle=0.05,
+        interval=0.01,
+        publish=events.append,
+        once=True,
+    )
+    asyncio.run(run(service))
+    assert [event.name for event in events] == [RUNDOWN_PATH.name]
+    assert list((target / "cleansed" / "2022").glob("*.partial")) == []
+
+
+def test_watch_program(tmp_path, monkeypatch, capsys):
+    source, target = tmp_path / "export", tmp_path / "target"
+    source.mkdir()
+    shutil.copy(RUNDOWN_PATH, source / RUNDOWN_PATH.name)
+    events = tmp_path / "events.jsonl"
+    argv = ["cro.rundown.watch", "-s", str(source), "-t", str(target), "-w", "1"]
+    argv += ["--settle", "0.05", "--interval", "0.01", "--once"]
+    monkeypatch.setattr(sys, "argv", argv + ["--events", str(events)])
+
+    main()
+
+    output = capsys.readouterr().out
+    assert f"PROCESSED {RUNDOWN_PATH.name}" in output
+    assert "SUCCESS: Watch service stopped" in output
+    assert json.loads(events.read_text())["name"] == RUNDOWN_PATH.name
@@ -1,8 +1,21 @@
 # -*- coding: utf-8 -*-
 
+import datetime as dt
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
 import pytest
 
-from cro.rundown.sdk._domain import Name, Respondent
+from cro.rundown.sdk._domain import (
+    Name,
+    Record,
+    Respondent,
+    Rundown,
+    Station,
+    StationType,
+)
+
+RUNDOWN_PATH = Path(__file__).parent / "data" / "RR_10-12_Plus_20220404.xml"
 
 
 @pytest.mark.domain
@@ -19,3 +32,71 @@ def test_respondent_model():
     assert respondent.name.family == "Landa"
     assert respondent.affiliation == "BEZPP"
     assert respondent.labels == ["programmer"]
+
+
+@pytest.mark.domain
+def test_rundown_lazy_records():
+    tree = ET.parse(RUNDOWN_PATH)
+    station = Station(13, "Plus", StationType.NATIONWIDE)
+    rundown = Rundown(dt.date(2022, 4, 4), station, tree, "RUNDOWN", None, tree)
+
+    assert not hasattr(rundown, "__dict__")
+    assert rundown._records is None  # Not created until accessed.
+
+    records = rundown.records
+    assert records is rundown.records  # Memoized.
+    assert [record.itemcode for record in records] == [
+        "PS5362007",
+        "PS5362008",
+        "PS5362011",
+    ]
+    assert records[0].since == dt.time(10, 15, 12)
+    assert records[1].till is None
+
+    assert records[0]._respondents is None
+    (respondent,) = records[0].respondents
+    assert records[0].respondents is records[0].respondents
+    assert respondent == Respondent(
+        id="CI-000123",
+        name=Name("Jan", "Kubáček"),
+        labels=["politolog"],
+        affiliation="BEZPP",
+        gender="1",
+    )
+    assert [r.name.family for r in records[2].respondents] == ["Dvořáková", "Kubáček"]
+    assert records[2].respondents[0].labels == ["lékařka", "epidemioložka"]
+    assert records[1].respondents == ()
+
+
+@pytest.mark.domain
+def test_record_model():
+    respondent = Respondent("UUID", Name("David", "Landa"), [], None)
+
+    record = Record(dt.time(10), dt.time(11), [respondent])
+
+    assert record.respondents == (respondent,)
+    assert record.itemcode is None and record.element is None
+    assert Record(dt.time(10), None).respondents == ()
+
+
+@pytest.mark.domain
+def test_record_equality():
+    respondent = Respondent("UUID", Name("David", "Landa"), [], None)
+    record = Record(dt.time(10), dt.time(11), [respondent], "PS5362007")
+
+    assert record == Record(dt.time(10), dt.time(11), (respondent,), "PS5362007")
+    assert record != Record(dt.time(10), dt.time(11), [], "PS5362007")
+    assert hash(record) == hash(Record(dt.time(10), dt.time(11), [], "PS5362007"))
+
+    # The lazy respondents are created from the element before comparing.
+    tree = ET.parse(RUNDOWN_PATH)
+    station = Station(13, "Plus", StationType.NATIONWIDE)
+    lazy = Rundown(dt.date(2022, 4, 4), station, tree, "RUNDOWN", None, tree).records
+    eager = [
+        Record(r.since, r.till, r.respondents, r.itemcode)
+        for r in Rundown(
+            dt.date(2022, 4, 4), station, tree, "RUNDOWN", None, tree
+        ).records
+    ]
+    assert list(lazy) == eager
+    assert lazy[2] != Record(lazy[2].since, lazy[2].till, (), lazy[2].itemcode)
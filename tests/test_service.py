@@ -1,14 +1,75 @@
 # -*- coding: utf-8  -*-
 
+import datetime as dt
+import gzip
 import io
+import lzma
+import shutil
+import xml.etree.ElementTree as ET
+from pathlib import Path
 
 import pytest
 
+from cro.rundown.sdk import (
+    RundownParser,
+    clean_rundown_content,
+    cleanse_rundown_file,
+    parse_rundown_file,
+    table_columns,
+)
+from cro.rundown.sdk._cleanse import CLEAN_FIELD_IDS, clean_rundown_stream
+from cro.rundown.sdk._domain import Rundown, Station, StationType
+from cro.rundown.sdk._extract._decode import (
+    DATETIME_FORMAT,
+    decode_date,
+    decode_datetime,
+    decode_timespan,
+)
+from cro.rundown.sdk._index import (
+    RundownFile,
+    RundownIndex,
+    confirm_rundown_header,
+    parse_rundown_name,
+    read_rundown_header,
+)
+from cro.rundown.sdk._registry import RespondentRegistry
+from cro.rundown.sdk._source import open_rundown, source_digest, source_stat
+from cro.rundown.sdk._xml import get_backend
+
+RUNDOWN_PATH = Path(__file__).parent / "data" / "RR_10-12_Plus_20220404.xml"
+
 
-@pytest.mark.skip
 @pytest.mark.service
 def test_rundown_cleanse():
-    assert False
+    tree = ET.parse(RUNDOWN_PATH)
+    size = len(list(tree.iter()))
+
+    cleaned = clean_rundown_content(tree)
+
+    assert cleaned is not tree
+    assert len(list(tree.iter())) == size  # The original tree is untouched.
+    assert len(list(cleaned.iter())) < size
+    assert cleaned.findall(".//OM_RECORD/OM_UPLINK") == []
+    assert cleaned.findall(".//OM_HEADER/*[@IsEmpty='yes']") == []
+    assert {
+        field.attrib["FieldID"] for field in cleaned.findall(".//OM_RECORD/OM_FIELD")
+    } <= CLEAN_FIELD_IDS
+    assert {
+        field.attrib["FieldID"] for field in cleaned.findall(".//OM_HEADER/OM_FIELD")
+    } <= CLEAN_FIELD_IDS
+
+    assert clean_rundown_content(tree, inplace=True) is tree
+    assert ET.tostring(tree.getroot()) == ET.tostring(cleaned.getroot())
+
+
+@pytest.mark.service
+def test_rundown_stream_cleanse(tmp_path):
+    expected = io.BytesIO()
+    clean_rundown_content(ET.parse(RUNDOWN_PATH)).write(expected, encoding="utf-8")
+
+    clean_rundown_stream(RUNDOWN_PATH, target := tmp_path / "rundown.xml")
+
+    assert target.read_bytes() == expected.getvalue()
 
 
 @pytest.mark.skip
@@ -18,34 +79,340 @@ def test_rundown_compress():
 
 
 # Parser tests.
-from cro.rundown.sdk import RundownParser
 
 
 @pytest.fixture
 def rundown():
-    return io.StringIO(
-        """\
-        <
+    return io.BytesIO(RUNDOWN_PATH.read_bytes())
+
+
+@pytest.mark.service
+def test_rundown_parse(rundown):
+    parser = RundownParser()
+    rows = list(parser(ET.parse(rundown)))
+
+    assert len(rows) == 5
+    assert parser.errors == ()
+    assert rows[0].date == "2022-04-04"
+    assert rows[0].block == "10:00-11:00"
+    assert rows[0].since == "10:15:12"
+    assert rows[0].duration == "26"
+    assert rows[0].title1 == "0404 JTV Kubáček # rozhovor"
+    assert rows[0].category == "contact"
+    assert rows[1].category == "audioclip"
+    assert [row.itemcode for row in rows] == [
+        "PS5362007",
+        "PS5362007",
+        "PS5362008",
+        "PS5362011",
+        "PS5362011",
+    ]
+    assert rows[0]._fields == tuple(table_columns)
+
+
+@pytest.mark.service
+def test_rundown_stream_parse(rundown):
+    expected = list(RundownParser()(ET.parse(RUNDOWN_PATH)))
+
+    parser = RundownParser()
+    rows = list(parser.stream(rundown))
+
+    assert parser.errors == ()
+    assert rows == expected
+
+
+@pytest.mark.service
+def test_rundown_index_fields(rundown):
+    parser = RundownParser()
+
+    for node in ET.parse(rundown).iter():
+        if node.tag not in ("OM_HEADER", "OM_RECORD"):
+            continue
+        fields = parser._index_fields(node)
+        for field in node.findall("./OM_FIELD"):
+            field_id, value = field.attrib["FieldID"], field[0].tag
+            assert fields[field_id] == parser._extract_text(
+                node, f"./OM_FIELD[@FieldID='{field_id}']/{value}"
+            )
+
 
+@pytest.mark.service
+@pytest.mark.parametrize(
+    "text",
+    [
+        "20220404T104056,500",
+        "20220404T101512,000",
+        "20221231T235959,999999",
+        "20220404T101512,5",
+        "2022044T101512,000",  # Not the fixed format but valid for `strptime`.
+    ],
+)
+def test_decode_datetime(text):
+    expected = dt.datetime.strptime(text, DATETIME_FORMAT)
 
-    """
+    assert decode_datetime(text) == expected
+    assert (
+        decode_date(text) == dt.datetime.strptime(text.split("T")[0], "%Y%m%d").date()
     )
 
 
-# Parser tests.
-from cro.rundown.sdk import RundownParser
+@pytest.mark.service
+def test_decode_datetime_invalid():
+    with pytest.raises(ValueError):
+        decode_datetime("20220431T101512,000")
+
+
+@pytest.mark.service
+def test_decode_timespan():
+    assert [decode_timespan(value) for value in ["1545500", "60000", "0"]] == [26, 1, 0]
+
+
+@pytest.mark.service
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("RR_10-12_Plus_20220404.xml", (dt.date(2022, 4, 4), "10-12", "Plus")),
+        ("RR_05-09_ČRo_Brno_20220404", (dt.date(2022, 4, 4), "05-09", "ČRo_Brno")),
+        ("RR_05-09_Plus-Special_20220404", (dt.date(2022, 4, 4), "05-09", "Plus")),
+        (
+            "RUNDOWN_2022-04-04_05-09_R_Hradec-Králové.xml",
+            (dt.date(2022, 4, 4), "05-09", "ČRo_Hradec_Králové"),
+        ),
+    ],
+)
+def test_parse_rundown_name(name, expected):
+    assert parse_rundown_name(name)[:3] == expected
+
+
+@pytest.mark.service
+@pytest.mark.parametrize(
+    "name",
+    ["notes.xml", "RR_10-12_Unknown_20220404.xml", "RR_10-12_Plus_20221304.xml"],
+)
+def test_parse_rundown_name_unknown(name):
+    assert parse_rundown_name(name) is None
+
+
+@pytest.mark.service
+def test_rundown_index_select(tmp_path):
+    for name in [
+        "RR_10-12_Plus_20220404.xml",
+        "RR_10-12_ČRo_Brno_20220405.xml",
+        "2022/RR_10-12_Radiožurnál_20220406.xml",
+        "RR_10-12_Plus_20220410.xml",
+        "notes.xml",
+    ]:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_text("<OPENMEDIA/>")
+
+    index = RundownIndex.scan(tmp_path)
+
+    assert len(index) == 4
+    assert index.unknown == [tmp_path / "notes.xml"]
+    assert all(file.size == 12 for file in index)
+
+    def dates(**kwargs):
+        return [file.date.day for file in index.select(**kwargs)]
+
+    assert dates() == [4, 5, 6, 10]
+    assert dates(since=dt.date(2022, 4, 5), until=dt.date(2022, 4, 6)) == [5, 6]
+    assert dates(stations=["plus", "Brno"]) == [4, 5, 10]
+    assert dates(type=StationType.REGIONAL) == [5]
+
+    with pytest.raises(ValueError):
+        index.select(stations=["Unknown"])
+
+
+@pytest.mark.service
+def test_rundown_header():
+    assert read_rundown_header(RUNDOWN_PATH) == (
+        dt.date(2022, 4, 4),
+        "10-12 Plus - Mon, 04.04.2022",
+        "13",
+    )
+
+    file = RundownFile(*parse_rundown_name(RUNDOWN_PATH.name), RUNDOWN_PATH, 0)
+    assert confirm_rundown_header(file)
+    assert not confirm_rundown_header(file._replace(date=dt.date(2022, 4, 5)))
+    assert not confirm_rundown_header(file._replace(station="Radiožurnál"))
+
+
+@pytest.mark.service
+@pytest.mark.parametrize(
+    "name, title, station, confirmed",
+    [
+        ("RR_06-09_ČRo_DAB_Praha_20220404", "06-09 ČRo DAB Praha - Mon", None, True),
+        ("RR_06-09_ČRo_Region_SC_20220404", "06-09 Region SC - Mon", None, True),
+        ("RR_06-09_ČRo_Region_SC_20220404", "06-09 Region - Mon", None, True),
+        ("RR_06-09_RŽ_Sport_20220404", "06-09 RŽ Sport - Mon", None, True),
+        ("RR_06-09_ČRo_Hradec_Králové_20220404", "06-09 Hradec Králové", None, True),
+        ("RR_06-09_ČRo_Brno_20220404", "06-09 ČRo Ostrava - Mon", None, False),
+        ("RR_06-09_ČRo_Brno_20220404", "06-09 ČRo Brno - Mon", "37", True),
+        # The station ID is compared when the station ID is known.
+        ("RR_06-09_Radiožurnál_20220404", "06-09 RŽ - Mon", "11", True),
+        ("RR_06-09_Radiožurnál_20220404", "06-09 Radiožurnál - Mon", "13", False),
+        ("RR_10-13_Plus_20220404", "10-13 Plus - Mon", "13", True),
+        ("RR_10-13_Plus_20220404", "10-13 Plus - Mon", "11", False),
+    ],
+)
+def test_rundown_header_stations(tmp_path, name, title, station, confirmed):
+    path = tmp_path / f"{name}.xml"
+    fields = [
+        f'<OM_FIELD FieldID="8"><OM_STRING>{title}</OM_STRING></OM_FIELD>',
+        '<OM_FIELD FieldID="1000"><OM_DATETIME>20220404T060000,000</OM_DATETIME>'
+        "</OM_FIELD>",
+    ]
+    if station is not None:
+        fields.append(
+            f'<OM_FIELD FieldID="5081"><OM_INT32>{station}</OM_INT32></OM_FIELD>'
+        )
+    path.write_text(
+        f"<OPENMEDIA><OM_OBJECT><OM_HEADER>{''.join(fields)}</OM_HEADER></OM_OBJECT>"
+        "</OPENMEDIA>",
+        encoding="utf-8",
+    )
+
+    file = RundownFile(*parse_rundown_name(path.name), path, 0)
+    assert read_rundown_header(path).station == station
+    assert confirm_rundown_header(file) is confirmed
 
 
 @pytest.fixture
-def rundown():
-    return io.StringIO(
-        """\
-        <
-    """
+def compressed(tmp_path):
+    """The test rundown as the compressed files and the archive member."""
+    content = RUNDOWN_PATH.read_bytes()
+    name = RUNDOWN_PATH.name
+
+    (tmp_path / f"{name}.gz").write_bytes(gzip.compress(content))
+    (tmp_path / f"{name}.xz").write_bytes(lzma.compress(content))
+    paths = [tmp_path / f"{name}.gz", tmp_path / f"{name}.xz"]
+
+    try:
+        import zstandard
+    except ImportError:
+        return paths
+
+    from cro.rundown.sdk._archive import archive_week
+
+    # The two frames as written by e.g. `cat a.zst b.zst` or `zstd -B`.
+    half = len(content) // 2
+    (tmp_path / f"{name}.zst").write_bytes(
+        zstandard.compress(content[:half]) + zstandard.compress(content[half:])
     )
+    week = tmp_path / "2022" / "W14"
+    week.mkdir(parents=True)
+    shutil.copy(RUNDOWN_PATH, week)
+    archive = archive_week(week, tmp_path / "W14.zip").target
+    shutil.rmtree(tmp_path / "2022")
+
+    return paths + [tmp_path / f"{name}.zst", archive / name]
 
 
-@pytest.mark.skip
 @pytest.mark.service
-def test_rundown_parse():
-    assert False
+def test_open_rundown(compressed):
+    for path in compressed:
+        with open_rundown(path) as file:
+            assert file.read() == RUNDOWN_PATH.read_bytes()
+
+    archived = compressed[-1]
+    if archived.parent.suffix == ".zip":
+        assert 0 < source_stat(archived)[0] < RUNDOWN_PATH.stat().st_size
+        assert len(source_digest(archived)) == 40
+
+
+@pytest.mark.service
+@pytest.mark.parametrize("stream", [False, True])
+def test_compressed_parse_and_cleanse(compressed, tmp_path, stream):
+    rows = parse_rundown_file(RUNDOWN_PATH, stream)
+    cleansed = cleanse_rundown_file(RUNDOWN_PATH, tmp_path / "plain", stream)
+
+    for path in compressed:
+        assert parse_rundown_file(path, stream) == rows
+        target = cleanse_rundown_file(path, tmp_path / "target", stream)
+        assert target.name == cleansed.name
+        assert target.read_bytes() == cleansed.read_bytes()
+
+
+@pytest.mark.service
+def test_rundown_index_compressed(compressed, tmp_path):
+    index = RundownIndex.scan(tmp_path)
+
+    assert sorted(file.path for file in index) == sorted(compressed)
+    assert {file.date for file in index} == {dt.date(2022, 4, 4)}
+    assert all(confirm_rundown_header(file) for file in index)
+
+
+@pytest.mark.service
+@pytest.mark.parametrize("stream", [False, True])
+def test_xml_backends(tmp_path, stream):
+    pytest.importorskip("lxml")
+
+    outcomes = {}
+    for backend in ["etree", "lxml"]:
+        rows = parse_rundown_file(RUNDOWN_PATH, stream, backend=backend)
+        target = cleanse_rundown_file(
+            RUNDOWN_PATH, tmp_path / backend, stream, None, backend
+        )
+        outcomes[backend] = rows, target.read_bytes()
+
+    assert outcomes["lxml"] == outcomes["etree"]
+
+
+@pytest.mark.service
+@pytest.mark.parametrize(
+    "content",
+    [
+        b'<a x="1&#9;2&#10;3" y="&gt;/&quot;"><b /><c>t/&gt; &amp;</c>\n</a>',
+        b"<a><!-- comment --><?pi data?><b>x&#13;y</b></a>",
+    ],
+)
+def test_xml_backend_write(content):
+    pytest.importorskip("lxml")
+
+    outputs = []
+    for backend in ["etree", "lxml"]:
+        xml = get_backend(backend)
+        output = io.BytesIO()
+        xml.write(xml.parse(io.BytesIO(content)), output)
+        outputs.append(output.getvalue())
+
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.service
+@pytest.mark.parametrize("stream", [False, True])
+def test_respondent_registry(stream):
+    registry = RespondentRegistry()
+    parser = RundownParser(registry=registry)
+    path = RUNDOWN_PATH
+
+    for _ in range(3):
+        list(parser.stream(str(path)) if stream else parser(ET.parse(path)))
+
+    assert parser.errors == ()
+    assert len(registry) == 2
+    assert registry.count("CI-000123") == 6  # Twice in each rundown.
+    assert registry.count("CI-000456") == 3
+    assert registry.count("CI-999") == 0
+
+    # One instance for each respondent.
+    appearances = list(registry.appearances(respondent="CI-000123"))
+    assert len({id(appearance.respondent) for appearance in appearances}) == 1
+    assert appearances[0].respondent is registry.get("CI-000123")
+    assert appearances[0][1:] == ("13", dt.date(2022, 4, 4))
+
+    assert len(registry.respondents(station="13")) == 2
+    assert registry.respondents(station="11") == []
+    assert registry.respondents(since=dt.date(2022, 4, 5)) == []
+    assert len(registry.respondents(until=dt.date(2022, 4, 4))) == 2
+
+    # The domain model rundowns and the registries of the workers.
+    other = RespondentRegistry()
+    tree = ET.parse(path)
+    station = Station(13, "Plus", StationType.NATIONWIDE)
+    other.add_rundown(Rundown(dt.date(2022, 4, 5), station, tree, "", None, tree))
+    registry.merge(other)
+
+    assert len(registry) == 2
+    assert registry.count("CI-000123") == 8
+    assert len(registry.respondents(station="Plus", since=dt.date(2022, 4, 5))) == 2